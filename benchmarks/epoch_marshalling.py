@@ -0,0 +1,51 @@
+"""Micro-benchmark for marshalling the ``epoch`` of a time series to R.
+
+Compares the former per-date conversion (two R calls per date) to the bulk conversion
+used by ``STSBasedAlgorithm._prepare_r_instance``.
+
+Run with ``python benchmarks/epoch_marshalling.py``.
+"""
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from epysurv._rsession import r_session
+from epysurv.models.timepoint._base import _get_epoch
+
+N_WEEKS = [52, 260, 520, 1040, 2080]
+REPEAT = 5
+
+
+def per_date_epoch(data: pd.DataFrame):
+    session = r_session()
+    r = session.r
+    return session.robjects.DateVector(
+        [r["as.numeric"](r["as.Date"](d.isoformat()))[0] for d in data.index.date]
+    )
+
+
+def bulk_epoch(data: pd.DataFrame):
+    return r_session().robjects.FloatVector(_get_epoch(data))
+
+
+def make_data(n_weeks: int) -> pd.DataFrame:
+    index = pd.date_range("2000-01-03", periods=n_weeks, freq="W-MON")
+    return pd.DataFrame({"n_cases": np.random.poisson(5, size=n_weeks)}, index=index)
+
+
+def main():
+    print(f"{'weeks':>8} {'per date [ms]':>15} {'bulk [ms]':>12} {'speedup':>9}")
+    for n_weeks in N_WEEKS:
+        data = make_data(n_weeks)
+        per_date = min(
+            timeit.repeat(lambda: per_date_epoch(data), number=1, repeat=REPEAT)
+        )
+        bulk = min(timeit.repeat(lambda: bulk_epoch(data), number=1, repeat=REPEAT))
+        print(
+            f"{n_weeks:>8} {per_date * 1e3:>15.2f} {bulk * 1e3:>12.3f} {per_date / bulk:>8.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
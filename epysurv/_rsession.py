@@ -0,0 +1,61 @@
+"""Lazy access to the embedded R interpreter.
+
+Starting R and loading the surveillance package takes seconds. It is therefore only done on first
+use through :func:`r_session` and not when importing ``epysurv``.
+"""
+import functools
+import platform
+
+
+def silence_r_output():
+    """Silence output from R code.
+
+    This is useful, because some algorithm otherwise print every time they are invoked.
+    """
+    from rpy2.robjects import r
+
+    if platform.system() == "Linux":
+        r.sink("/dev/null")
+    elif platform.system() == "Windows":
+        r.sink("NUL")
+
+
+class RSession:
+    """Handle to the embedded R interpreter with the surveillance package loaded.
+
+    Attributes
+    ----------
+    robjects
+        The ``rpy2.robjects`` module.
+    r
+        The R interpreter, i.e. ``rpy2.robjects.r``.
+    surveillance
+        The R package surveillance.
+    """
+
+    def __init__(self):
+        import rpy2.robjects as robjects
+        from rpy2.robjects import numpy2ri, pandas2ri
+        from rpy2.robjects.packages import importr
+
+        silence_r_output()
+        numpy2ri.activate()
+        pandas2ri.activate()
+        self.robjects = robjects
+        self.r = robjects.r
+        self.surveillance = importr("surveillance")
+        self._packages = {"surveillance": self.surveillance}
+
+    def importr(self, name: str):
+        """Import the R package ``name``, loading it only on the first call."""
+        from rpy2.robjects.packages import importr
+
+        if name not in self._packages:
+            self._packages[name] = importr(name)
+        return self._packages[name]
+
+
+@functools.lru_cache(maxsize=None)
+def r_session() -> RSession:
+    """Start R and load surveillance on the first call and return the session."""
+    return RSession()
@@ -0,0 +1,7 @@
+"""Implementations of the surveillance algorithms in numpy, that do not need R.
+
+The functions operate on the full time series, i.e. the history followed by the time points to
+predict, and return the alarms and upperbounds for the time points after the history. They
+reproduce the algorithms of the R package surveillance, so that the algorithms in
+:mod:`epysurv.models.timepoint` can run with ``engine="native"``.
+"""
@@ -0,0 +1,216 @@
+"""
+Fitting of stacks of independent GLMs with log link by batched iteratively reweighted least squares.
+
+Fitting many small GLMs one at a time is dominated by the overhead per call. The functions here
+fit a stack of problems at once: the designs are arrays of shape (problems, observations,
+coefficients), the weighted least squares steps of all problems are solved together and every
+problem stops iterating as soon as it has converged. Problems with fewer observations are padded
+with observations of prior weight zero.
+"""
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+# Defaults of ``glm.control`` in R.
+EPSILON = 1e-8
+MAX_ITERATIONS = 25
+# Anscombe residuals above this threshold are down-weighted.
+WEIGHTS_THRESHOLD = 1
+
+
+class BatchedGLMFit(NamedTuple):
+    """Fits of a stack of GLMs, with the problems along the first axis."""
+
+    coefficients: np.ndarray
+    fitted: np.ndarray
+    deviance: np.ndarray
+    converged: np.ndarray
+    working_weights: np.ndarray
+    """Prior weights times the IRLS weights of the last iteration."""
+    cov_unscaled: np.ndarray
+    """Inverse of the weighted cross product of the designs, i.e. the covariance of the
+    coefficients without the dispersion."""
+    df_residual: np.ndarray
+
+
+def poisson_deviances(y: np.ndarray, mu: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_ratio = np.where(y > 0, y * np.log(y / mu), 0)
+    return np.sum(weights * 2 * (log_ratio - (y - mu)), axis=-1)
+
+
+def negative_binomial_deviances(
+    y: np.ndarray, mu: np.ndarray, size: np.ndarray, weights: np.ndarray
+) -> np.ndarray:
+    size = size[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_ratio = np.where(y > 0, y * np.log(y / mu), 0)
+    residuals = 2 * (log_ratio - (y + size) * np.log((y + size) / (mu + size)))
+    return np.sum(weights * residuals, axis=-1)
+
+
+def fit_glms(
+    design: np.ndarray,
+    y: np.ndarray,
+    weights: Optional[np.ndarray] = None,
+    size: Optional[np.ndarray] = None,
+    eta_start: Optional[np.ndarray] = None,
+    epsilon: float = EPSILON,
+    max_iterations: int = MAX_ITERATIONS,
+) -> BatchedGLMFit:
+    """
+    Fit a stack of Poisson GLMs, or negative binomial GLMs with known sizes, with log link like
+    ``glm.fit`` in R.
+
+    Parameters
+    ----------
+    design
+        Designs of shape (problems, observations, coefficients).
+    y
+        Observed counts of shape (problems, observations).
+    weights
+        Prior weights of the observations. All ones by default.
+    size
+        Size of the negative binomial distribution of each problem. The variance is
+        :math:`\\mu + \\mu^2 / size`. Poisson GLMs are fitted if not given.
+    eta_start
+        Linear predictors to start the iterations from. By default the iterations start like
+        ``poisson()$initialize`` and ``negative.binomial()$initialize`` in R.
+    """
+    y = np.asarray(y, dtype=float)
+    prior = np.ones(y.shape) if weights is None else np.asarray(weights, dtype=float)
+    n_problems, _, n_coefficients = design.shape
+
+    def deviances(index, mu):
+        if size is None:
+            return poisson_deviances(y[index], mu, prior[index])
+        return negative_binomial_deviances(y[index], mu, size[index], prior[index])
+
+    if eta_start is not None:
+        eta = np.array(eta_start, dtype=float)
+        mu = np.exp(eta)
+    else:
+        mu = y + 0.1 if size is None else y + (y == 0) / 6
+        eta = np.log(mu)
+    everything = np.arange(n_problems)
+    deviance = deviances(everything, mu)
+    coefficients = np.zeros((n_problems, n_coefficients))
+    working_weights = prior * mu
+    converged = np.zeros(n_problems, dtype=bool)
+    active = everything
+    for _ in range(max_iterations):
+        # For the log link d eta / d mu is 1 / mu, so the IRLS weights are mu^2 / V(mu).
+        x = design[active]
+        z = eta[active] + (y[active] - mu[active]) / mu[active]
+        w = prior[active] * mu[active]
+        if size is not None:
+            w = w / (1 + mu[active] / size[active, None])
+        working_weights[active] = w
+        cross = np.einsum("bni,bn,bnj->bij", x, w, x)
+        rhs = np.einsum("bni,bn->bi", x, w * z)[..., None]
+        try:
+            beta = np.linalg.solve(cross, rhs)
+        except np.linalg.LinAlgError:
+            # Singular designs get the minimum norm solution.
+            beta = np.linalg.pinv(cross) @ rhs
+        coefficients[active] = beta[..., 0]
+        eta[active] = np.einsum("bni,bi->bn", x, coefficients[active])
+        mu[active] = np.exp(eta[active])
+        deviance_old = deviance[active]
+        deviance[active] = deviances(active, mu[active])
+        done = (
+            np.abs(deviance[active] - deviance_old) / (np.abs(deviance[active]) + 0.1)
+            < epsilon
+        )
+        converged[active[done]] = True
+        active = active[~done]
+        if len(active) == 0:
+            break
+    # R reports the weights and the covariance of the last weighted least squares step.
+    cov_unscaled = np.linalg.pinv(
+        np.einsum("bni,bn,bnj->bij", design, working_weights, design), hermitian=True
+    )
+    df_residual = np.sum(prior > 0, axis=1) - n_coefficients
+    return BatchedGLMFit(
+        coefficients,
+        mu,
+        deviance,
+        converged,
+        working_weights,
+        cov_unscaled,
+        df_residual,
+    )
+
+
+def quasi_poisson_dispersions(
+    fit: BatchedGLMFit, y: np.ndarray, weights: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Pearson estimates of the dispersions like ``summary.glm`` for the quasipoisson family."""
+    prior = np.ones(y.shape) if weights is None else weights
+    pearson = fit.working_weights * ((y - fit.fitted) / fit.fitted) ** 2
+    return np.sum(np.where(prior > 0, pearson, 0), axis=1) / fit.df_residual
+
+
+def hat_values(fit: BatchedGLMFit, design: np.ndarray) -> np.ndarray:
+    """Diagonals of the hat matrices of the weighted least squares problems."""
+    weighted = design * np.sqrt(fit.working_weights)[..., None]
+    return np.einsum("bni,bij,bnj->bn", weighted, fit.cov_unscaled, weighted)
+
+
+def anscombe_residuals(
+    fit: BatchedGLMFit, design: np.ndarray, y: np.ndarray, phi: np.ndarray
+) -> np.ndarray:
+    """Standardized Anscombe residuals of Poisson GLMs."""
+    mu = fit.fitted
+    residuals = 3 / 2 * (y ** (2 / 3) * mu ** (-1 / 6) - mu ** (1 / 2))
+    return residuals / np.sqrt(phi[:, None] * (1 - hat_values(fit, design)))
+
+
+def reweighting_weights(
+    residuals: np.ndarray,
+    prior: np.ndarray,
+    weights_threshold: float = WEIGHTS_THRESHOLD,
+) -> np.ndarray:
+    """Weights proportional to :math:`s^{-2}` for residuals :math:`s` above the threshold and
+    constant otherwise, scaled to sum up to the number of observations with positive prior
+    weight."""
+    large = (residuals > weights_threshold) & (prior > 0)
+    weights = np.where(large, np.where(large, residuals, 1) ** -2.0, 1) * (prior > 0)
+    return (
+        weights
+        * np.sum(prior > 0, axis=1, keepdims=True)
+        / np.sum(weights, axis=1, keepdims=True)
+    )
+
+
+class QuasiPoissonFit(NamedTuple):
+    fit: BatchedGLMFit
+    phi: np.ndarray
+    """Dispersions, at least one."""
+    weights: np.ndarray
+    """Prior weights of the fits, including the reweighting."""
+    converged: np.ndarray
+    """Whether the fits before reweighting converged."""
+
+
+def fit_quasi_poisson_glms(
+    design: np.ndarray,
+    y: np.ndarray,
+    weights: Optional[np.ndarray] = None,
+    reweight: bool = False,
+    weights_threshold: float = WEIGHTS_THRESHOLD,
+) -> QuasiPoissonFit:
+    """
+    Fit a stack of quasi-Poisson GLMs and, if ``reweight``, refit them with the observations whose
+    Anscombe residuals exceed ``weights_threshold`` down-weighted.
+    """
+    prior = np.ones(y.shape) if weights is None else weights
+    fit = fit_glms(design, y, prior)
+    converged = fit.converged
+    phi = np.maximum(quasi_poisson_dispersions(fit, y, prior), 1)
+    if reweight:
+        residuals = anscombe_residuals(fit, design, y, phi)
+        prior = prior * reweighting_weights(residuals, prior, weights_threshold)
+        fit = fit_glms(design, y, prior)
+        phi = np.maximum(quasi_poisson_dispersions(fit, y, prior), 1)
+    return QuasiPoissonFit(fit, phi, prior, converged)
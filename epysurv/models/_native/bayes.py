@@ -0,0 +1,39 @@
+"""The Bayes system as implemented in ``surveillance::algo.bayes``."""
+from typing import Tuple
+
+import numpy as np
+from scipy.stats import nbinom
+
+from .reference import past_year_offsets, recent_offsets, reference_index
+
+
+def bayes(
+    counts: np.ndarray,
+    n_history: int,
+    years_back: int,
+    window_half_width: int,
+    include_recent_year: bool,
+    alpha: float,
+    freq: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Alarms and upperbounds for all time points after ``n_history``.
+
+    The reference values are chosen like for the RKI algorithm. With a Poisson model and the
+    non-informative prior, the posterior predictive distribution of the count is negative binomial
+    with size :math:`\\sum y + 1/2` and probability :math:`n / (n + 1)` for :math:`n` reference
+    values :math:`y`. Missing reference values are ignored. The upperbound is its
+    :math:`(1 - \\alpha)` quantile.
+    """
+    counts = np.asarray(counts, dtype=float)
+    offsets = past_year_offsets(
+        years_back, freq, before=window_half_width, after=window_half_width
+    )
+    if include_recent_year:
+        offsets = np.concatenate((recent_offsets(window_half_width), offsets))
+    reference = counts[reference_index(n_history, len(counts), offsets)]
+    n_reference = np.sum(~np.isnan(reference), axis=1)
+    upperbound = nbinom.ppf(
+        1 - alpha, np.nansum(reference, axis=1) + 1 / 2, n_reference / (n_reference + 1)
+    )
+    return counts[n_history:] > upperbound, upperbound
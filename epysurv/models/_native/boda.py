@@ -0,0 +1,412 @@
+"""
+Bayesian outbreak detection like ``surveillance::boda`` without the R package INLA.
+
+The negative binomial GLMM of boda is approximated like INLA does: the latent Gaussian field is
+replaced by the Gaussian approximation at its mode (Laplace approximation) and the hyperparameters
+are set to the mode of their approximated posterior.
+"""
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+from scipy import optimize
+from scipy.linalg import cho_factor, cho_solve, cho_solve_banded, cholesky_banded
+from scipy.special import gammaln
+from scipy.stats import nbinom
+
+PRIORS = ("iid", "rw1", "rw2")
+QUANTILE_METHODS = ("MC", "MM")
+# INLA's default priors: Gamma(shape, rate) distributions for the precisions of the random
+# effects and for the size of the negative binomial distribution, and a Gaussian prior with this
+# precision for the fixed effects.
+PRECISION_PRIOR = (1, 5e-5)
+SIZE_PRIOR = (1, 0.1)
+FIXED_EFFECT_PRECISION = 1e-3
+# Intrinsic priors are improper. Adding this multiple of the identity to their structure matrices
+# makes the precision of the latent field positive definite.
+INTRINSIC_JITTER = 1e-5
+START_LOG_PRECISION = 2.0
+START_LOG_SIZE = 1.0
+LOG_HYPERPARAMETER_BOUNDS = (-10.0, 15.0)
+EPSILON = 1e-8
+MAX_ITERATIONS = 50
+
+
+def structure_band(n: int, prior: str) -> Tuple[np.ndarray, int]:
+    """
+    Structure matrix of an iid, rw1 or rw2 prior of ``n`` random effects and its rank.
+
+    The matrix is banded and returned in the lower form of ``scipy.linalg.cholesky_banded``,
+    i.e. row ``i`` holds the ``i``-th subdiagonal. It is the sum of the outer products of the
+    differences, which are the rows of coefficients ``(-1, 1)`` or ``(1, -2, 1)`` shifted along
+    the random effects, so it is built without the dense difference matrix.
+    """
+    if prior == "iid":
+        return np.ones((1, n)), n
+    order = int(prior[-1])
+    coefficients = np.diff(np.eye(order + 1), n=order, axis=0)[0]
+    band = np.zeros((order + 1, n))
+    for i in range(order + 1):
+        for j in range(order + 1 - i):
+            # Every difference adds this product at its j-th random effect.
+            band[i, j : n - order + j] += coefficients[j] * coefficients[j + i]
+    return band, n - order
+
+
+def cyclic_rw2_structure(n: int) -> Tuple[np.ndarray, int]:
+    """Structure matrix of a cyclic second order random walk of ``n`` effects and its rank."""
+    identity = np.eye(n)
+    differences = (
+        np.roll(identity, -1, axis=1) - 2 * identity + np.roll(identity, 1, axis=1)
+    )
+    return differences.T @ differences, n - 1
+
+
+def _band_matvec(band: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """Product of the symmetric banded matrix in lower form and ``x``."""
+    result = band[0] * x
+    for i in range(1, len(band)):
+        result[i:] += band[i, :-i] * x[:-i]
+        result[:-i] += band[i, :-i] * x[i:]
+    return result
+
+
+class LatentModel:
+    """
+    Latent Gaussian field of the linear predictor of ``n_points`` time points.
+
+    The linear predictor is the sum of one random effect per time point with an iid, rw1 or rw2
+    prior and of the other latent variables: the intercept, the coefficient of the trend if
+    ``trend`` and, if ``season``, a cyclic second order random walk over the positions within the
+    period. Every random effect has its own precision. The precision of the random effects per time
+    point is banded, which keeps the cost of the approximation linear in the number of time points.
+    """
+
+    def __init__(
+        self, n_points: int, trend: bool, season: bool, prior: str, period: int
+    ):
+        self.n_points = n_points
+        self.band, self.rank = structure_band(n_points, prior)
+        t = np.arange(n_points, dtype=float)
+        columns = [np.ones(n_points)] + ([t] if trend else [])
+        self.n_fixed = len(columns)
+        self.season_structure = None
+        if season:
+            columns.extend(np.eye(period)[np.arange(n_points) % period].T)
+            self.season_structure = cyclic_rw2_structure(period)
+        self.design = np.column_stack(columns)
+        """Design of the other latent variables."""
+
+    @property
+    def n_precisions(self) -> int:
+        return 1 if self.season_structure is None else 2
+
+    @property
+    def dim(self) -> int:
+        return self.n_points + self.design.shape[1]
+
+    def precision_band(self, log_precisions: np.ndarray) -> np.ndarray:
+        """Prior precision of the random effects per time point in banded form."""
+        band = self.band.copy()
+        band[0] += INTRINSIC_JITTER
+        return np.exp(log_precisions[0]) * band
+
+    def other_precision(self, log_precisions: np.ndarray) -> np.ndarray:
+        """Prior precision of the other latent variables."""
+        precision = np.diag(np.full(self.design.shape[1], FIXED_EFFECT_PRECISION))
+        if self.season_structure is not None:
+            structure, _ = self.season_structure
+            season = slice(self.n_fixed, None)
+            precision[season, season] = np.exp(log_precisions[1]) * (
+                structure + INTRINSIC_JITTER * np.eye(len(structure))
+            )
+        return precision
+
+    def log_det_precision(self, log_precisions: np.ndarray) -> float:
+        """Log determinant of the prior precision, up to a constant, using the rank of the
+        intrinsic priors."""
+        log_det = self.rank * log_precisions[0]
+        if self.season_structure is not None:
+            log_det += self.season_structure[1] * log_precisions[1]
+        return float(log_det)
+
+
+class BorderedCholesky:
+    """
+    Cholesky factorization of a symmetric positive definite matrix with a banded upper left block
+    ``band`` and a dense border ``border`` and lower right block ``corner``.
+
+    The Schur complement of the banded block is factorized densely, so the cost is linear in the
+    size of the banded block.
+    """
+
+    def __init__(self, band: np.ndarray, border: np.ndarray, corner: np.ndarray):
+        self.n_band = band.shape[1]
+        self._band_factor = cholesky_banded(band, lower=True)
+        self._band_solved_border = cho_solve_banded((self._band_factor, True), border)
+        self._border = border
+        self._schur_factor = cho_factor(corner - border.T @ self._band_solved_border)
+
+    @property
+    def log_det(self) -> float:
+        return 2 * float(
+            np.sum(np.log(self._band_factor[0]))
+            + np.sum(np.log(np.diag(self._schur_factor[0])))
+        )
+
+    def solve(self, rhs: np.ndarray) -> np.ndarray:
+        top, bottom = rhs[: self.n_band], rhs[self.n_band :]
+        band_solved_top = cho_solve_banded((self._band_factor, True), top)
+        bottom = cho_solve(
+            self._schur_factor, bottom - self._border.T @ band_solved_top
+        )
+        top = band_solved_top - self._band_solved_border @ bottom
+        return np.concatenate((top, bottom))
+
+
+def _negative_binomial_terms(
+    y: np.ndarray, eta: np.ndarray, size: float
+) -> Tuple[float, np.ndarray, np.ndarray]:
+    """Log likelihood, its gradient and the negative of its second derivative with respect to the
+    log means ``eta``. Missing counts do not contribute."""
+    observed = ~np.isnan(y)
+    y = np.where(observed, y, 0)
+    mu = np.exp(eta)
+    log_size_mu = np.logaddexp(np.log(size), eta)
+    log_likelihood = np.sum(
+        (
+            gammaln(y + size)
+            - gammaln(size)
+            - gammaln(y + 1)
+            + size * np.log(size)
+            + y * eta
+            - (y + size) * log_size_mu
+        )[observed]
+    )
+    ratio = mu / (size + mu)
+    gradient = observed * (y - (y + size) * ratio)
+    curvature = observed * (y + size) * ratio * size / (size + mu)
+    return float(log_likelihood), gradient, curvature
+
+
+class LaplaceApproximation(NamedTuple):
+    mode: np.ndarray
+    """Mode of the latent field, the random effects per time point first."""
+    cholesky: BorderedCholesky
+    """Cholesky factorization of the posterior precision of the latent field."""
+    log_marginal: float
+    """Log marginal likelihood of the hyperparameters, up to a constant."""
+
+
+def laplace_approximation(
+    model: LatentModel,
+    y: np.ndarray,
+    log_precisions: np.ndarray,
+    size: float,
+    start: Optional[np.ndarray] = None,
+    epsilon: float = EPSILON,
+    max_iterations: int = MAX_ITERATIONS,
+) -> LaplaceApproximation:
+    """
+    Gaussian approximation of the posterior of the latent field at its mode.
+
+    The mode is found by Newton's method with step halving, starting from ``start``. Time points
+    with missing counts do not contribute to the likelihood.
+    """
+    n = model.n_points
+    band = model.precision_band(log_precisions)
+    other = model.other_precision(log_precisions)
+    x = np.zeros(model.dim) if start is None else start
+
+    def prior_gradient(x):
+        return np.concatenate((_band_matvec(band, x[:n]), other @ x[n:]))
+
+    def objective(x):
+        terms = _negative_binomial_terms(y, x[:n] + model.design @ x[n:], size)
+        return terms[0] - x @ prior_gradient(x) / 2, terms
+
+    def factorize(curvature):
+        posterior_band = band.copy()
+        posterior_band[0] += curvature
+        border = curvature[:, None] * model.design
+        corner = other + model.design.T @ border
+        return BorderedCholesky(posterior_band, border, corner)
+
+    value, terms = objective(x)
+    for _ in range(max_iterations):
+        _, gradient, curvature = terms
+        likelihood_gradient = np.concatenate((gradient, model.design.T @ gradient))
+        step = factorize(curvature).solve(likelihood_gradient - prior_gradient(x))
+        for _ in range(30):
+            new_value, new_terms = objective(x + step)
+            if new_value >= value - epsilon * abs(value):
+                break
+            step = step / 2
+        x = x + step
+        value_old, value, terms = value, new_value, new_terms
+        if abs(value - value_old) < epsilon * (abs(value) + epsilon):
+            break
+    cholesky = factorize(terms[2])
+    log_marginal = (
+        value + (model.log_det_precision(log_precisions) - cholesky.log_det) / 2
+    )
+    return LaplaceApproximation(x, cholesky, float(log_marginal))
+
+
+def _log_gamma_prior(log_value: float, shape: float, rate: float) -> float:
+    """Log density of the logarithm of a Gamma distributed parameter, up to a constant."""
+    return shape * log_value - rate * np.exp(log_value)
+
+
+def fit_hyperparameters(
+    model: LatentModel,
+    y: np.ndarray,
+    start: np.ndarray,
+    latent_start: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, LaplaceApproximation, float]:
+    """
+    Posterior mode of the log precisions and the log size given the counts ``y``.
+
+    Returns the mode, with the log size last, the Laplace approximation of the latent field at the
+    mode and the variance of the log size from the curvature of the log posterior.
+    """
+    latent = [latent_start]
+
+    def negative_log_posterior(theta):
+        approximation = laplace_approximation(
+            model, y, theta[:-1], np.exp(theta[-1]), latent[0]
+        )
+        latent[0] = approximation.mode
+        log_prior = sum(_log_gamma_prior(lp, *PRECISION_PRIOR) for lp in theta[:-1])
+        log_prior += _log_gamma_prior(theta[-1], *SIZE_PRIOR)
+        return -(approximation.log_marginal + log_prior)
+
+    result = optimize.minimize(
+        negative_log_posterior,
+        start,
+        method="L-BFGS-B",
+        bounds=[LOG_HYPERPARAMETER_BOUNDS] * len(start),
+        options={"eps": 1e-4, "ftol": 1e-7, "gtol": 1e-3},
+    )
+    theta = result.x
+    # Central second difference in the direction of the log size.
+    h = 1e-2
+    shifted = [theta + h * np.eye(len(theta))[-1] * sign for sign in (-1, 1)]
+    center = negative_log_posterior(theta)
+    curvature = (
+        negative_log_posterior(shifted[0])
+        - 2 * center
+        + negative_log_posterior(shifted[1])
+    ) / h ** 2
+    approximation = laplace_approximation(
+        model, y, theta[:-1], np.exp(theta[-1]), latent[0]
+    )
+    log_size_variance = 1 / curvature if curvature > 0 else 0.0
+    return theta, approximation, log_size_variance
+
+
+def mixture_quantile(q: float, size: np.ndarray, mu: np.ndarray) -> float:
+    """Quantile of the equally weighted mixture of negative binomial distributions by bisection
+    over the integers between the smallest and the largest quantile of the components."""
+    p = size / (size + mu)
+    quantiles = nbinom.ppf(q, size, p)
+    low, high = quantiles.min() - 1, quantiles.max()
+    # Invariant: the mixture CDF is below q at low and at least q at high.
+    while high - low > 1:
+        middle = np.floor((low + high) / 2)
+        if np.mean(nbinom.cdf(middle, size, p)) >= q:
+            high = middle
+        else:
+            low = middle
+    return float(high)
+
+
+def predictive_quantile(
+    eta_mean: float,
+    eta_variance: float,
+    log_size: float,
+    log_size_variance: float,
+    alpha: float,
+    mc_munu: int,
+    mc_y: int,
+    quantile_method: str,
+    rng: np.random.Generator,
+) -> float:
+    """
+    The (1 - alpha) quantile of the posterior predictive distribution of a count.
+
+    ``mc_munu`` pairs of the mean and the size are sampled from their approximate posteriors. With
+    "MM" the quantile of the mixture of their negative binomial distributions is returned, with
+    "MC" the empirical quantile of ``mc_y`` counts sampled for each pair.
+    """
+    mu = np.exp(eta_mean + np.sqrt(eta_variance) * rng.standard_normal(mc_munu))
+    size = np.exp(log_size + np.sqrt(log_size_variance) * rng.standard_normal(mc_munu))
+    if quantile_method == "MM":
+        return mixture_quantile(1 - alpha, size, mu)
+    p = size / (size + mu)
+    samples = rng.negative_binomial(size[:, None], p[:, None], size=(mc_munu, mc_y))
+    return float(np.quantile(samples, 1 - alpha))
+
+
+def boda(
+    counts: np.ndarray,
+    n_history: int,
+    trend: bool,
+    season: bool,
+    prior: str,
+    alpha: float,
+    mc_munu: int,
+    mc_y: int,
+    quantile_method: str,
+    period: int,
+    seed: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Alarms and upperbounds for all time points after ``n_history``.
+
+    For every time point the model is fitted to all counts up to it, with its own count treated as
+    missing. The upperbound is the (1 - alpha) quantile of the posterior predictive distribution of
+    the count and an alarm is raised if the count exceeds it. The hyperparameters and the latent
+    field of every fit start from those of the previous time point.
+    """
+    if prior not in PRIORS:
+        raise ValueError(f'Unknown prior "{prior}".')
+    if quantile_method not in QUANTILE_METHODS:
+        raise ValueError(f'Unknown quantile method "{quantile_method}".')
+    counts = np.asarray(counts, dtype=float)
+    rng = np.random.default_rng(seed)
+    alarm = np.zeros(len(counts) - n_history, dtype=bool)
+    upperbound = np.zeros(len(counts) - n_history)
+    theta = None
+    latent = None
+    for i, k in enumerate(range(n_history, len(counts))):
+        model = LatentModel(k + 1, trend, season, prior, period)
+        if theta is None:
+            theta = np.append(
+                np.full(model.n_precisions, START_LOG_PRECISION), START_LOG_SIZE
+            )
+        else:
+            # The random effect of the new time point starts at that of the previous one.
+            latent = np.insert(latent, k, latent[k - 1])
+        y = counts[: k + 1].copy()
+        y[k] = np.nan
+        theta, approximation, log_size_variance = fit_hyperparameters(
+            model, y, theta, latent
+        )
+        latent = approximation.mode
+        row = np.concatenate((np.zeros(k + 1), model.design[k]))
+        row[k] = 1
+        eta_variance = row @ approximation.cholesky.solve(row)
+        upper = predictive_quantile(
+            row @ latent,
+            eta_variance,
+            theta[-1],
+            log_size_variance,
+            alpha,
+            mc_munu,
+            mc_y,
+            quantile_method,
+            rng,
+        )
+        alarm[i] = counts[k] > upper
+        upperbound[i] = upper
+    return alarm, upperbound
@@ -0,0 +1,43 @@
+"""The CDC algorithm as implemented in ``surveillance::algo.cdc``."""
+from typing import Tuple
+
+import numpy as np
+from scipy.stats import norm
+
+from .reference import past_year_offsets, reference_index
+
+# The algorithm compares sums over blocks of four weeks.
+BLOCK = 4
+
+
+def cdc(
+    counts: np.ndarray,
+    n_history: int,
+    years_back: int,
+    window_half_width: int,
+    alpha: float,
+    freq: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Alarms and upperbounds for all time points after ``n_history``.
+
+    The reference values are the sums of ``2 * window_half_width + 1`` consecutive blocks of four
+    weeks around the same week in each of the ``years_back`` previous years. The sum of the current
+    and the three previous weeks is compared to the upper limit of a two-sided normal
+    :math:`(1 - \\alpha)` prediction interval of the reference values.
+    """
+    counts = np.asarray(counts, dtype=float)
+    offsets = past_year_offsets(
+        years_back,
+        freq,
+        before=BLOCK * window_half_width + BLOCK - 1,
+        after=BLOCK * window_half_width,
+    )
+    reference = counts[reference_index(n_history, len(counts), offsets)]
+    blocks = reference.reshape(len(reference), -1, BLOCK).sum(axis=2)
+    upperbound = blocks.mean(axis=1) + norm.ppf(1 - alpha / 2) * blocks.std(
+        axis=1, ddof=1
+    )
+    recent = counts[reference_index(n_history, len(counts), np.arange(-BLOCK + 1, 0))]
+    last_block = recent.sum(axis=1) + counts[n_history:]
+    return last_block > upperbound, upperbound
@@ -0,0 +1,160 @@
+"""CUSUM as implemented in ``surveillance::algo.cusum``."""
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from .glm import fit_poisson_glm, harmonic_design
+
+Transform = Callable[[np.ndarray, np.ndarray, float], np.ndarray]
+
+
+def _standard(x, m, alpha):
+    return (x - m) / np.sqrt(m)
+
+
+def _rossi(x, m, alpha):
+    return (x - 3 * m + 2 * np.sqrt(x * m)) / (2 * np.sqrt(m))
+
+
+def _anscombe(x, m, alpha):
+    return 3 / 2 * (x ** (2 / 3) - m ** (2 / 3)) / m ** (1 / 6)
+
+
+def _anscombe_2nd(x, m, alpha):
+    return (x ** (2 / 3) - (m ** (2 / 3) - m ** (-1 / 3) / 9)) / (2 / 3 * m ** (1 / 6))
+
+
+def _pearson_negbin(x, m, alpha):
+    return (x - m) / np.sqrt(m + alpha * m ** 2)
+
+
+def _anscombe_negbin(x, m, alpha):
+    return (
+        3 / alpha * ((1 + alpha * x) ** (2 / 3) - (1 + alpha * m) ** (2 / 3))
+        + 3 * (x ** (2 / 3) - m ** (2 / 3))
+    ) / (2 * (m + alpha * m ** 2) ** (1 / 6))
+
+
+def _none(x, m, alpha):
+    return x
+
+
+TRANSFORMS: Dict[str, Transform] = {
+    "standard": _standard,
+    "rossi": _rossi,
+    "anscombe": _anscombe,
+    "anscombe2nd": _anscombe_2nd,
+    "pearsonNegBin": _pearson_negbin,
+    "anscombeNegBin": _anscombe_negbin,
+    "none": _none,
+}
+
+
+def _power_3_2(x):
+    return np.maximum(x, 0) ** (3 / 2)
+
+
+def _invert_standard(z, m, alpha):
+    return m + z * np.sqrt(m)
+
+
+def _invert_rossi(z, m, alpha):
+    # Quadratic equation in the square root of x.
+    root = np.sqrt(np.maximum(4 * m + 2 * z * np.sqrt(m), 0)) - np.sqrt(m)
+    return np.maximum(root, 0) ** 2
+
+
+def _invert_anscombe(z, m, alpha):
+    return _power_3_2(m ** (2 / 3) + 2 / 3 * z * m ** (1 / 6))
+
+
+def _invert_anscombe_2nd(z, m, alpha):
+    return _power_3_2(2 / 3 * z * m ** (1 / 6) + m ** (2 / 3) - m ** (-1 / 3) / 9)
+
+
+def _invert_pearson_negbin(z, m, alpha):
+    return m + z * np.sqrt(m + alpha * m ** 2)
+
+
+def _invert_anscombe_negbin(z, m, alpha):
+    # The transformation is increasing in x and has no closed form inverse, so we use bisection.
+    low = np.zeros_like(z)
+    high = np.maximum(m, 1)
+    while np.any(_anscombe_negbin(high, m, alpha) < z):
+        high = np.where(_anscombe_negbin(high, m, alpha) < z, 2 * high, high)
+    for _ in range(100):
+        middle = (low + high) / 2
+        below = _anscombe_negbin(middle, m, alpha) < z
+        low = np.where(below, middle, low)
+        high = np.where(below, high, middle)
+    return high
+
+
+INVERSE_TRANSFORMS: Dict[str, Transform] = {
+    "standard": _invert_standard,
+    "rossi": _invert_rossi,
+    "anscombe": _invert_anscombe,
+    "anscombe2nd": _invert_anscombe_2nd,
+    "pearsonNegBin": _invert_pearson_negbin,
+    "anscombeNegBin": _invert_anscombe_negbin,
+    "none": _none,
+}
+
+
+def expected_counts(
+    counts: np.ndarray, n_history: int, method: Optional[str], period: int
+) -> np.ndarray:
+    """
+    Expected counts for the time points after ``n_history``.
+
+    ``None`` uses the mean of the history. "glm" fits a Poisson GLM with one harmonic of the
+    given period to the history and predicts the detection range with it.
+    """
+    history = counts[:n_history]
+    n_range = len(counts) - n_history
+    if method is None:
+        return np.full(n_range, history.mean())
+    if method == "glm":
+        design = harmonic_design(np.arange(1, len(counts) + 1), period)
+        fit = fit_poisson_glm(design[:n_history], history)
+        return np.exp(design[n_history:] @ fit.coefficients)
+    raise ValueError(f'Unknown method "{method}" for the expected counts.')
+
+
+def cusum(
+    counts: np.ndarray,
+    n_history: int,
+    k: float,
+    h: float,
+    m: Optional[str],
+    transform: str,
+    alpha: float,
+    period: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Alarms and upperbounds for all time points after ``n_history``.
+
+    The counts are standardized with the expected counts ``m`` and accumulated with
+    :math:`S_t = \\max(0, S_{t-1} + z_t - k)`, starting with :math:`S_0 = 0` at the first time
+    point after the history. An alarm is raised if :math:`S_t \\geq h`. The statistic is not reset
+    after an alarm. The upperbound is the number of cases for which :math:`S_t = h`.
+    """
+    if transform not in TRANSFORMS:
+        raise ValueError(f'Unknown transformation "{transform}".')
+    counts = np.asarray(counts, dtype=float)
+    expected = expected_counts(counts, n_history, m, period)
+    z = TRANSFORMS[transform](counts[n_history:], expected, alpha)
+    statistic = cumulative_sum(z - k)
+    previous = np.concatenate(([0], statistic[:-1]))
+    upperbound = INVERSE_TRANSFORMS[transform](h + k - previous, expected, alpha)
+    return statistic >= h, upperbound
+
+
+def cumulative_sum(increments: np.ndarray) -> np.ndarray:
+    """:math:`S_t = \\max(0, S_{t-1} + x_t)` with :math:`S_0 = 0`.
+
+    This is the Lindley recursion, which has the closed form
+    :math:`S_t = C_t - \\min(0, \\min_{s \\leq t} C_s)` with the cumulative sum :math:`C`.
+    """
+    total = np.cumsum(increments)
+    return total - np.minimum(np.minimum.accumulate(total), 0)
@@ -0,0 +1,66 @@
+"""EARS C1, C2 and C3 as implemented in ``surveillance::earsC``."""
+from typing import Tuple
+
+import numpy as np
+from scipy.stats import norm
+
+# Number of time points between the baseline and the time point to predict.
+LAG = {"C1": 0, "C2": 2, "C3": 2}
+
+
+def baseline_statistics(
+    counts: np.ndarray, start: int, lag: int, baseline: int, min_sigma: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean and standard deviation of the baseline for every time point from ``start`` on."""
+    first_window = start - lag - baseline
+    if first_window < 0:
+        raise ValueError(
+            f"At least {baseline + lag} time points before the first time point to predict are "
+            f"needed for the baseline, but there are only {start}."
+        )
+    windows = np.lib.stride_tricks.sliding_window_view(
+        counts[first_window : len(counts) - lag - 1], baseline
+    )
+    mu = windows.mean(axis=1)
+    sigma = np.maximum(windows.std(axis=1, ddof=1), min_sigma)
+    return mu, sigma
+
+
+def ears(
+    counts: np.ndarray,
+    n_history: int,
+    method: str,
+    alpha: float,
+    baseline: int,
+    min_sigma: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Alarms and upperbounds for all time points after ``n_history``.
+
+    C1 and C2 compare the counts to ``mu + z * sigma`` of a baseline that directly precedes the time
+    point (C1) or ends two time points before it (C2). C3 sums the C2 statistics of the two
+    preceding time points, each reduced by 1 and truncated at 0, and raises an alarm if the sum
+    exceeds ``z``. This reproduces the alarms of surveillance, which do not depend on the count of
+    the time point itself. The upperbound of C3 is the count above which the C3 statistic of the
+    next time point exceeds ``z``, or 0 if it does for every count.
+    """
+    counts = np.asarray(counts, dtype=float)
+    z = norm.ppf(1 - alpha)
+    lag = LAG[method]
+    if method != "C3":
+        mu, sigma = baseline_statistics(counts, n_history, lag, baseline, min_sigma)
+        upperbound = mu + z * sigma
+        return counts[n_history:] > upperbound, upperbound
+
+    # C3 needs the C2 statistic of the two time points before the detection range as well.
+    mu, sigma = baseline_statistics(counts, n_history - 2, lag, baseline, min_sigma)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        c2 = (counts[n_history - 2 :] - mu) / sigma
+    # A baseline without variation and a count equal to its mean is no deviation.
+    c2[np.isnan(c2)] = 0
+    excess = np.maximum(c2 - 1, 0)
+    c3 = excess[1:-1] + excess[:-2]
+    # The count enters the C3 statistic of the next time point together with the preceding one.
+    previous = excess[1:-1]
+    upperbound = np.where(previous > z, 0, mu[2:] + sigma[2:] * (1 + z - previous))
+    return c3 > z, upperbound
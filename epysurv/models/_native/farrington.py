@@ -0,0 +1,224 @@
+"""The Farrington algorithm as implemented in ``surveillance::algo.farrington``."""
+import warnings
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+from scipy.stats import norm
+from scipy.stats import t as student_t
+
+from .batched_glm import (
+    WEIGHTS_THRESHOLD,
+    BatchedGLMFit,
+    fit_quasi_poisson_glms,
+    quasi_poisson_dispersions,
+)
+from .reference import past_year_offsets, reference_index
+
+TREND_SIGNIFICANCE = 0.05
+POWER_TRANSFORMS = {"none": 1, "1/2": 1 / 2, "2/3": 2 / 3}
+
+
+class _Models(NamedTuple):
+    fit: BatchedGLMFit
+    """Fits padded to the coefficients of the design. A trend that was dropped has the coefficient
+    and the variance zero."""
+    phi: np.ndarray
+    weights: np.ndarray
+    converged: np.ndarray
+    has_trend: np.ndarray
+
+
+def trend_design(wtime: np.ndarray, trend: bool) -> np.ndarray:
+    """Designs with an intercept and, if ``trend``, a linear time trend for the rows of
+    ``wtime``."""
+    design = np.ones(wtime.shape + (1,))
+    if trend:
+        design = np.concatenate((design, wtime[..., None]), axis=-1)
+    return design
+
+
+def _replace(models: _Models, index: np.ndarray, replacement: _Models) -> _Models:
+    """Models with the problems at the boolean ``index`` replaced, padding the coefficients."""
+    n_coefficients = replacement.fit.coefficients.shape[1]
+    fit = models.fit._replace(
+        coefficients=models.fit.coefficients.copy(),
+        cov_unscaled=models.fit.cov_unscaled.copy(),
+    )
+    fit.coefficients[index] = 0
+    fit.cov_unscaled[index] = 0
+    fit.coefficients[index, :n_coefficients] = replacement.fit.coefficients
+    fit.cov_unscaled[
+        index, :n_coefficients, :n_coefficients
+    ] = replacement.fit.cov_unscaled
+    for name in ("fitted", "deviance", "converged", "working_weights", "df_residual"):
+        values = getattr(fit, name).copy()
+        values[index] = getattr(replacement.fit, name)
+        fit = fit._replace(**{name: values})
+    replaced = [fit]
+    for name in ("phi", "weights", "converged", "has_trend"):
+        values = getattr(models, name).copy()
+        values[index] = getattr(replacement, name)
+        replaced.append(values)
+    return _Models(*replaced)
+
+
+def fit_models(
+    response: np.ndarray,
+    design: np.ndarray,
+    reweight: bool,
+    weights_threshold: float = WEIGHTS_THRESHOLD,
+    prior: Optional[np.ndarray] = None,
+) -> _Models:
+    """Fit the quasi-Poisson GLMs and, if ``reweight``, refit them with down-weighted outliers.
+
+    The GLMs with trend, i.e. the second column of ``design``, that do not converge are fitted
+    without trend. ``converged`` is False for the GLMs that do not converge, even without trend.
+    Observations with ``prior`` weight zero are padding.
+    """
+    prior = np.ones(response.shape) if prior is None else prior
+    quasi = fit_quasi_poisson_glms(design, response, prior, reweight, weights_threshold)
+    has_trend = np.full(len(response), design.shape[2] > 1)
+    models = _Models(quasi.fit, quasi.phi, quasi.weights, quasi.converged, has_trend)
+    failed = ~models.converged
+    if design.shape[2] > 1 and failed.any():
+        without_trend = fit_models(
+            response[failed],
+            design[failed][:, :, :1],
+            reweight,
+            weights_threshold,
+            prior[failed],
+        )
+        models = _replace(models, failed, without_trend)
+    return models
+
+
+def drop_insignificant_trends(
+    models: _Models,
+    response: np.ndarray,
+    design: np.ndarray,
+    x0: np.ndarray,
+    years_back: int,
+    reweight: bool,
+    weights_threshold: float = WEIGHTS_THRESHOLD,
+    significance: float = TREND_SIGNIFICANCE,
+    prior: Optional[np.ndarray] = None,
+) -> _Models:
+    """Refit the models without trend unless the trend is significant, at least three years are
+    used and the prediction at ``x0`` does not exceed the reference values."""
+    candidates = models.has_trend & models.converged
+    if not candidates.any():
+        return models
+    fit = models.fit
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dispersion = quasi_poisson_dispersions(fit, response, models.weights)
+        t = fit.coefficients[:, 1] / np.sqrt(dispersion * fit.cov_unscaled[:, 1, 1])
+        p = 2 * student_t.sf(np.abs(t), fit.df_residual)
+        prediction = np.exp(np.sum(x0 * fit.coefficients, axis=1))
+    # The padding of the responses is zero, so it does not change the maximum.
+    keep = (
+        (years_back >= 3)
+        & (p < significance)
+        & (prediction <= np.max(response, axis=1))
+    )
+    drop = candidates & ~keep
+    if drop.any():
+        prior = np.ones(response.shape) if prior is None else prior
+        without_trend = fit_models(
+            response[drop],
+            design[drop][:, :, :1],
+            reweight,
+            weights_threshold,
+            prior[drop],
+        )
+        models = _replace(models, drop, without_trend)
+    return models
+
+
+def prediction(models: _Models, x0: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Predictions at the rows of ``x0`` on the scale of the linear predictor and their standard
+    errors."""
+    eta = np.sum(x0 * models.fit.coefficients, axis=1)
+    variance = np.einsum("bi,bij,bj->b", x0, models.fit.cov_unscaled, x0)
+    return eta, np.sqrt(models.phi * variance)
+
+
+def warn_not_converged(models: _Models, positions: np.ndarray):
+    for k in positions[~models.converged]:
+        warnings.warn(f"The GLM did not converge for time point {k}.")
+
+
+def threshold(
+    mu0: float, se_fit: float, phi: float, z: float, power_transform: str
+) -> float:
+    """Upper limit of the prediction interval with the normal quantile ``z`` on the power
+    transformed scale."""
+    tau = phi + se_fit ** 2 / mu0
+    exponent = POWER_TRANSFORMS[power_transform]
+    if power_transform == "none":
+        se = np.sqrt(mu0 * tau)
+    elif power_transform == "1/2":
+        se = np.sqrt(1 / 4 * tau)
+    else:
+        se = np.sqrt(4 / 9 * mu0 ** (1 / 3) * tau)
+    return (mu0 ** exponent + z * se) ** (1 / exponent)
+
+
+def farrington(
+    counts: np.ndarray,
+    n_history: int,
+    years_back: int,
+    window_half_width: int,
+    reweight: bool,
+    alpha: float,
+    trend: bool,
+    limit54: Tuple[int, int],
+    power_transform: str,
+    freq: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Alarms and upperbounds for all time points after ``n_history``.
+
+    For every time point a quasi-Poisson GLM is fitted to the windows of ``2 * window_half_width + 1``
+    time points around the same time point in the ``years_back`` previous years. A trend is only
+    kept if it is significant, at least three years are used and the prediction does not exceed
+    the reference values. An alarm is raised if the count exceeds the upper limit of the prediction
+    interval and there are at least ``limit54[0]`` cases in the last ``limit54[1]`` time points.
+    Like in surveillance, the upperbound is the upper limit truncated at 0 if there are enough
+    cases and 0 otherwise. The GLMs of all time points are fitted at once.
+    """
+    if power_transform not in POWER_TRANSFORMS:
+        raise ValueError(f'Unknown power transformation "{power_transform}".')
+    counts = np.asarray(counts, dtype=float)
+    offsets = past_year_offsets(
+        years_back, freq, before=window_half_width, after=window_half_width
+    )
+    wtimes = reference_index(n_history, len(counts), offsets)
+    positions = np.arange(n_history, len(counts))
+    response = counts[wtimes]
+    design = trend_design(wtimes.astype(float), trend)
+    x0 = np.column_stack((np.ones(len(positions)), positions))[:, : design.shape[2]]
+    models = fit_models(response, design, reweight)
+    models = drop_insignificant_trends(
+        models, response, design, x0, years_back, reweight
+    )
+    warn_not_converged(models, positions)
+    eta, se_eta = prediction(models, x0)
+    mu0 = np.exp(eta)
+    z = norm.ppf(1 - alpha / 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        upper = threshold(mu0, mu0 * se_eta, models.phi, z, power_transform)
+        exceedance = np.where(upper == 0, 0, (counts[positions] - mu0) / (upper - mu0))
+    min_cases, n_periods = limit54
+    enough = enough_cases(counts, positions, min_cases, n_periods)
+    alarm = models.converged & (exceedance > 1) & enough
+    upperbound = np.where(enough, np.maximum(upper, 0), 0)
+    return alarm, np.where(models.converged, upperbound, np.nan)
+
+
+def enough_cases(
+    counts: np.ndarray, positions: np.ndarray, min_cases: int, n_periods: int
+) -> np.ndarray:
+    """Whether there are at least ``min_cases`` cases in the ``n_periods`` time points up to each
+    of the ``positions``."""
+    windows = np.lib.stride_tricks.sliding_window_view(counts, n_periods)
+    return windows[positions - n_periods + 1].sum(axis=1) >= min_cases
@@ -0,0 +1,216 @@
+"""The improved Farrington algorithm as implemented in ``surveillance::farringtonFlexible``."""
+import datetime
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.stats import nbinom, norm, poisson
+
+from .farrington import (
+    POWER_TRANSFORMS,
+    drop_insignificant_trends,
+    enough_cases,
+    fit_models,
+    prediction,
+    threshold,
+    trend_design,
+    warn_not_converged,
+)
+
+THRESHOLD_METHODS = ("delta", "Noufaily", "muan")
+
+
+def _same_date_years_back(date: datetime.date, years: int) -> datetime.date:
+    try:
+        return date.replace(year=date.year - years)
+    except ValueError:
+        # Like seq.Date in R, the 29th of February becomes the 1st of March.
+        return date.replace(year=date.year - years, month=3, day=1)
+
+
+def reference_positions(dates: pd.DatetimeIndex, k: int, years_back: int) -> List[int]:
+    """
+    Positions of the reference time points of time point ``k``, most recent first.
+
+    These are the same date in the ``years_back`` previous years. For weekly data they are moved
+    to the same weekday, between four days before and two days after that date.
+
+    Raises
+    ------
+    ValueError
+        If a reference time point is not part of ``dates``.
+    """
+    day = dates[k].date()
+    weekly = isinstance(dates.freq, pd.offsets.Week)
+    positions = []
+    for years in range(1, years_back + 1):
+        reference = _same_date_years_back(day, years)
+        if weekly:
+            shift = (day.weekday() - reference.weekday() + 4) % 7 - 4
+            reference += datetime.timedelta(days=shift)
+        position = dates.searchsorted(pd.Timestamp(reference))
+        if position == len(dates) or dates[position].date() != reference:
+            raise ValueError(
+                f"There is no reference data from {reference} for the prediction at {day}."
+            )
+        positions.append(position)
+    return positions
+
+
+def window_offsets(
+    reference_offsets: Tuple[int, ...],
+    window_half_width: int,
+    past_weeks_not_included: int,
+) -> np.ndarray:
+    """
+    Sorted offsets of the observations of a time point relative to it.
+
+    These are the windows around the reference time points at ``reference_offsets`` and the
+    ``window_half_width`` time points before the time point itself, without the
+    ``past_weeks_not_included`` time points before it and the time point itself.
+    """
+    window = set(range(-window_half_width, 1))
+    for reference in reference_offsets:
+        window.update(
+            range(reference - window_half_width, reference + window_half_width + 1)
+        )
+    return np.array(sorted(o for o in window if not -past_weeks_not_included <= o <= 0))
+
+
+def upper_limit(
+    eta: np.ndarray,
+    se_eta: np.ndarray,
+    phi: np.ndarray,
+    alpha: float,
+    power_transform: str,
+    method: str,
+) -> np.ndarray:
+    """
+    Upper limits of the one-sided prediction intervals.
+
+    Parameters
+    ----------
+    eta
+        Predictions on the scale of the linear predictor.
+    se_eta
+        Standard errors of ``eta``.
+    method
+        "delta" uses the normal approximation on the power transformed scale. "Noufaily" uses
+        the quantile of the negative binomial distribution with mean :math:`\\exp(\\eta)` and
+        variance :math:`\\phi \\exp(\\eta)`, or of the Poisson distribution if :math:`\\phi = 1`.
+        "muan" does the same with the upper limit of the confidence interval of the mean.
+    """
+    if method == "delta":
+        mu0 = np.exp(eta)
+        return threshold(mu0, mu0 * se_eta, phi, norm.ppf(1 - alpha), power_transform)
+    if method == "muan":
+        eta = eta + norm.ppf(1 - alpha) * se_eta
+    mu0 = np.exp(eta)
+    overdispersed = phi > 1
+    # The negative binomial quantiles of the other time points are discarded.
+    phi_nb = np.where(overdispersed, phi, 2)
+    return np.where(
+        overdispersed,
+        nbinom.ppf(1 - alpha, mu0 / (phi_nb - 1), 1 / phi_nb),
+        poisson.ppf(1 - alpha, mu0),
+    )
+
+
+def farrington_flexible(
+    counts: np.ndarray,
+    dates: pd.DatetimeIndex,
+    n_history: int,
+    years_back: int,
+    window_half_width: int,
+    reweight: bool,
+    weights_threshold: float,
+    alpha: float,
+    trend: bool,
+    trend_threshold: float,
+    limit54: Tuple[int, int],
+    power_transform: str,
+    past_weeks_not_included: int,
+    threshold_method: str,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Alarms and upperbounds for all time points after ``n_history``.
+
+    For every time point ``k`` a quasi-Poisson GLM is fitted to the windows of
+    ``2 * window_half_width + 1`` time points around the reference time points in the
+    ``years_back`` previous years and to the ``window_half_width`` time points before ``k``.
+    The ``past_weeks_not_included`` time points before ``k`` are then left out again.
+    A trend is only kept if it is significant at ``trend_threshold``, at least three years are used
+    and the prediction does not exceed the reference values. An alarm is raised if the count
+    exceeds the upper limit of the prediction interval and there are at least ``limit54[0]`` cases
+    in the last ``limit54[1]`` time points. The upperbound is the upper limit regardless of the
+    number of cases, unlike ``farrington``, which follows surveillance and reports 0 without enough
+    cases. The GLMs of all time points are fitted at once.
+    """
+    if power_transform not in POWER_TRANSFORMS:
+        raise ValueError(f'Unknown power transformation "{power_transform}".')
+    if threshold_method not in THRESHOLD_METHODS:
+        raise ValueError(f'Unknown threshold method "{threshold_method}".')
+    counts = np.asarray(counts, dtype=float)
+    targets = np.arange(n_history, len(counts))
+    # Most time points share the offsets of their reference time points and thereby their window
+    # and design, so these are only built once per distinct set of offsets.
+    windows: Dict[Tuple[int, ...], np.ndarray] = {}
+    patterns: Dict[Tuple[int, ...], int] = {}
+    pattern_of = np.empty(len(targets), dtype=int)
+    for i, k in enumerate(targets):
+        references = reference_positions(dates, k, years_back)
+        if min(references) < window_half_width:
+            reference = dates[min(references)].date()
+            raise ValueError(
+                f"The window around the reference time point {reference} "
+                f"of the prediction at {dates[k].date()} starts before the data."
+            )
+        key = tuple(reference - k for reference in references)
+        if key not in windows:
+            windows[key] = window_offsets(
+                key, window_half_width, past_weeks_not_included
+            )
+        offsets = windows[key]
+        offsets = offsets[~np.isnan(counts[k + offsets])]
+        pattern_of[i] = patterns.setdefault(tuple(offsets), len(patterns))
+    # The windows differ in size, so they are padded with observations of prior weight zero.
+    n_observations = max(len(offsets) for offsets in patterns)
+    pattern_offsets = np.zeros((len(patterns), n_observations), dtype=int)
+    pattern_prior = np.zeros((len(patterns), n_observations))
+    for j, offsets in enumerate(patterns):
+        pattern_offsets[j, : len(offsets)] = offsets
+        pattern_prior[j, : len(offsets)] = 1
+    # The time trend counts the time points since the first one of the window.
+    pattern_wtime = (pattern_offsets - pattern_offsets[:, :1]) * pattern_prior
+    design = trend_design(pattern_wtime, trend)[pattern_of]
+    prior = pattern_prior[pattern_of]
+    offsets = pattern_offsets[pattern_of]
+    response = np.where(prior > 0, counts[targets[:, None] + offsets], 0)
+    x0 = np.column_stack((np.ones(len(targets)), -offsets[:, 0]))
+    x0 = x0[:, : design.shape[2]]
+    models = fit_models(response, design, reweight, weights_threshold, prior)
+    models = drop_insignificant_trends(
+        models,
+        response,
+        design,
+        x0,
+        years_back,
+        reweight,
+        weights_threshold,
+        trend_threshold,
+        prior,
+    )
+    warn_not_converged(models, targets)
+    eta, se_eta = prediction(models, x0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        upper = upper_limit(
+            eta, se_eta, models.phi, alpha, power_transform, threshold_method
+        )
+    min_cases, n_periods = limit54
+    alarm = (
+        models.converged
+        & (counts[targets] > upper)
+        & enough_cases(counts, targets, min_cases, n_periods)
+    )
+    upperbound = np.where(models.converged, upper, np.nan)
+    return alarm, upperbound
@@ -0,0 +1,181 @@
+"""Fitting of single generalized linear models with iteratively reweighted least squares."""
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+from scipy.special import digamma, gammaln, polygamma
+
+from .batched_glm import EPSILON, MAX_ITERATIONS, fit_glms
+
+
+class GLMFit(NamedTuple):
+    coefficients: np.ndarray
+    fitted: np.ndarray
+    deviance: float
+    converged: bool
+    working_weights: np.ndarray
+    """Prior weights times the IRLS weights of the last iteration."""
+    cov_unscaled: np.ndarray
+    """Inverse of the weighted cross product of the design, i.e. the covariance of the coefficients
+    without the dispersion."""
+    df_residual: int
+
+
+def harmonic_design(t: np.ndarray, period: int) -> np.ndarray:
+    """Design matrix with an intercept and one harmonic of the given period."""
+    return np.column_stack(
+        (
+            np.ones(len(t)),
+            np.cos(2 * np.pi * t / period),
+            np.sin(2 * np.pi * t / period),
+        )
+    )
+
+
+def fit_poisson_glm(
+    design: np.ndarray,
+    y: np.ndarray,
+    weights: Optional[np.ndarray] = None,
+    epsilon: float = EPSILON,
+    max_iterations: int = MAX_ITERATIONS,
+) -> GLMFit:
+    """
+    Fit a (quasi-)Poisson GLM with log link like ``glm.fit(family=poisson())`` in R.
+
+    Parameters
+    ----------
+    design
+        Design matrix with one row per observation.
+    y
+        Observed counts.
+    weights
+        Prior weights of the observations. All ones by default.
+    """
+    return _fit_log_link_glm(design, y, weights, None, None, epsilon, max_iterations)
+
+
+def fit_negative_binomial_glm(
+    design: np.ndarray,
+    y: np.ndarray,
+    size: float,
+    weights: Optional[np.ndarray] = None,
+    eta_start: Optional[np.ndarray] = None,
+    epsilon: float = EPSILON,
+    max_iterations: int = MAX_ITERATIONS,
+) -> GLMFit:
+    """
+    Fit a negative binomial GLM with log link and known ``size`` like
+    ``glm.fit(family=MASS::negative.binomial(size))`` in R.
+
+    The variance of the negative binomial distribution is :math:`\\mu + \\mu^2 / size`.
+    The iterations start from the linear predictor ``eta_start`` if given.
+    """
+    return _fit_log_link_glm(
+        design, y, weights, size, eta_start, epsilon, max_iterations
+    )
+
+
+def _fit_log_link_glm(
+    design: np.ndarray,
+    y: np.ndarray,
+    weights: Optional[np.ndarray],
+    size: Optional[float],
+    eta_start: Optional[np.ndarray],
+    epsilon: float,
+    max_iterations: int,
+) -> GLMFit:
+    """IRLS for the Poisson family or, if ``size`` is given, the negative binomial family."""
+    fit = fit_glms(
+        design[None],
+        np.asarray(y, dtype=float)[None],
+        None if weights is None else np.asarray(weights, dtype=float)[None],
+        None if size is None else np.array([size]),
+        None if eta_start is None else np.asarray(eta_start, dtype=float)[None],
+        epsilon,
+        max_iterations,
+    )
+    return GLMFit(
+        fit.coefficients[0],
+        fit.fitted[0],
+        float(fit.deviance[0]),
+        bool(fit.converged[0]),
+        fit.working_weights[0],
+        fit.cov_unscaled[0],
+        int(fit.df_residual[0]),
+    )
+
+
+def theta_ml(
+    y: np.ndarray, mu: np.ndarray, max_iterations: int = MAX_ITERATIONS
+) -> float:
+    """Maximum likelihood estimate of the size of a negative binomial distribution with known
+    means ``mu`` with Newton's method like ``MASS::theta.ml``."""
+    y = np.asarray(y, dtype=float)
+    tolerance = np.finfo(float).eps ** 0.25
+    theta = len(y) / np.sum((y / mu - 1) ** 2)
+    for _ in range(max_iterations):
+        score = np.sum(
+            digamma(theta + y)
+            - digamma(theta)
+            + np.log(theta)
+            + 1
+            - np.log(theta + mu)
+            - (y + theta) / (mu + theta)
+        )
+        information = np.sum(
+            -polygamma(1, theta + y)
+            + polygamma(1, theta)
+            - 1 / theta
+            + 2 / (mu + theta)
+            - (y + theta) / (mu + theta) ** 2
+        )
+        step = score / information
+        theta = abs(theta + step)
+        if abs(step) <= tolerance:
+            break
+    return float(theta)
+
+
+def fit_glm_nb(
+    design: np.ndarray,
+    y: np.ndarray,
+    epsilon: float = EPSILON,
+    max_iterations: int = MAX_ITERATIONS,
+) -> Tuple[GLMFit, float]:
+    """
+    Fit a negative binomial GLM with log link and unknown size like ``MASS::glm.nb``.
+
+    The coefficients and the size are estimated alternately, starting from a Poisson GLM.
+    Returns the fit and the size.
+    """
+    y = np.asarray(y, dtype=float)
+    fit = fit_poisson_glm(design, y, epsilon=epsilon, max_iterations=max_iterations)
+    size = theta_ml(y, fit.fitted, max_iterations)
+    d1 = np.sqrt(2 * max(1, fit.df_residual))
+    d2 = delta = 1.0
+    loglik = _negative_binomial_loglik(y, fit.fitted, size)
+    loglik_old = loglik + 2 * d1
+    for _ in range(max_iterations):
+        if abs(loglik_old - loglik) / d1 + abs(delta) / d2 <= epsilon:
+            break
+        # Like MASS the size is re-estimated with the means of the previous fit.
+        mu = fit.fitted
+        fit = fit_negative_binomial_glm(
+            design, y, size, eta_start=np.log(mu), epsilon=epsilon
+        )
+        size_old, size = size, theta_ml(y, mu, max_iterations)
+        delta = size_old - size
+        loglik_old, loglik = loglik, _negative_binomial_loglik(y, fit.fitted, size)
+    return fit, size
+
+
+def _negative_binomial_loglik(y: np.ndarray, mu: np.ndarray, size: float) -> float:
+    return float(
+        np.sum(
+            gammaln(size + y)
+            - gammaln(size)
+            - gammaln(y + 1)
+            + size * np.log(size)
+            + y * np.log(mu + (y == 0))
+            - (size + y) * np.log(size + mu)
+        )
+    )
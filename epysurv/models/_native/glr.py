@@ -0,0 +1,464 @@
+"""GLR charts as implemented in ``surveillance::algo.glrpois`` and ``surveillance::algo.glrnb``."""
+from typing import Callable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .cusum import expected_counts
+from .glm import (
+    fit_glm_nb,
+    fit_negative_binomial_glm,
+    fit_poisson_glm,
+    harmonic_design,
+    theta_ml,
+)
+
+CHANGES = ("intercept", "epi")
+UPPERBOUND_STATISTICS = ("cases", "value")
+NEWTON_ITERATIONS = 50
+# Largest count tried for the "cases" upperbound, like xMax in R.
+X_MAX = 1e4
+
+
+def _sign(direction: Sequence[str]) -> int:
+    # Like match.arg in R only the first direction is used.
+    if direction[0] not in ("inc", "dec"):
+        raise ValueError(f'Unknown direction "{direction[0]}".')
+    return 1 if direction[0] == "inc" else -1
+
+
+def intercept_statistic(sum_x: np.ndarray, sum_mu: np.ndarray, sign: int) -> np.ndarray:
+    """
+    Log likelihood ratio for a multiplicative change :math:`\\exp(\\kappa)` of the mean.
+
+    ``sum_x`` and ``sum_mu`` are the sums of the counts and of the in-control means since each
+    candidate change point. :math:`\\kappa` is restricted to the direction given by ``sign``.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        kappa = sign * np.maximum(0, sign * np.log(sum_x / sum_mu))
+        # Without counts the mean decreases to zero, which contributes nothing for the counts.
+        return np.where(sum_x > 0, kappa * sum_x, 0) + (1 - np.exp(kappa)) * sum_mu
+
+
+def log_likelihood_ratio(
+    x: np.ndarray, mu1: np.ndarray, mu0: np.ndarray, alpha: float
+) -> np.ndarray:
+    """
+    Log likelihood ratio of the counts ``x`` for the means ``mu1`` against the means ``mu0``.
+
+    The counts are negative binomial with variance :math:`\\mu + \\alpha \\mu^2`, which is the
+    Poisson distribution for :math:`\\alpha = 0`.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_ratio = np.where(x > 0, x * np.log(mu1 / mu0), 0)
+        if alpha == 0:
+            return log_ratio - (mu1 - mu0)
+        return log_ratio - (x + 1 / alpha) * np.log(
+            (1 + alpha * mu1) / (1 + alpha * mu0)
+        )
+
+
+def _derivatives(
+    x: np.ndarray, mu1: np.ndarray, alpha: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    # First and second derivative of the log likelihood with respect to the mean.
+    first = x / mu1 - (1 + alpha * x) / (1 + alpha * mu1)
+    second = -x / mu1 ** 2 + alpha * (1 + alpha * x) / (1 + alpha * mu1) ** 2
+    return first, second
+
+
+def window_statistic(
+    x: np.ndarray,
+    mu0: np.ndarray,
+    previous: np.ndarray,
+    change: str,
+    alpha: float,
+    sign: int,
+    start: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Maximal log likelihood ratio and its parameter for every candidate change point in ``x``.
+
+    Candidate ``j`` uses the time points ``j, ..., len(x) - 1``. The alternative is
+    :math:`\\mu_t = \\mu_{0,t} \\exp(\\kappa)` for "intercept" and
+    :math:`\\mu_t = \\mu_{0,t} + \\lambda x_{t-1}` for "epi", where ``previous`` holds
+    :math:`x_{t-1}`. The parameter is restricted to the direction given by ``sign`` and estimated
+    with a damped Newton's method, which starts from ``start`` or zero and stops separately for
+    every candidate. As the likelihood of every candidate depends on its own parameter, an
+    iteration takes quadratic time in the length of the window. Starting from the estimates of a
+    similar window, e.g. with another count at the end, usually saves most of the iterations.
+    """
+    since = np.triu(np.ones((len(x), len(x)), dtype=bool))
+    if change == "intercept":
+        lower = -np.inf
+
+        def means(parameter):
+            return mu0 * np.exp(parameter[:, None])
+
+    else:
+        # The mean has to stay positive.
+        positive = previous > 0
+        lower = (
+            -np.min(mu0[positive] / previous[positive]) if positive.any() else -np.inf
+        )
+
+        def means(parameter):
+            return mu0 + parameter[:, None] * previous
+
+    def objective(parameter, rows):
+        mu1 = means(parameter)
+        return np.sum(
+            np.where(since[rows], log_likelihood_ratio(x, mu1, mu0, alpha), 0), axis=1
+        )
+
+    def newton_step(parameter, rows):
+        mu1 = means(parameter)
+        first, second = _derivatives(x, mu1, alpha)
+        d_mu = mu1 if change == "intercept" else np.broadcast_to(previous, mu1.shape)
+        d2_mu = mu1 if change == "intercept" else 0
+        gradient = np.sum(np.where(since[rows], first * d_mu, 0), axis=1)
+        curvature = np.sum(
+            np.where(since[rows], second * d_mu ** 2 + first * d2_mu, 0), axis=1
+        )
+        # Gradient ascent where the log likelihood is not concave.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(curvature < 0, -gradient / curvature, gradient)
+
+    parameter = (
+        np.zeros(len(x)) if start is None else sign * np.maximum(0, sign * start)
+    )
+    parameter = np.where(parameter > lower, parameter, 0)
+    value = objective(parameter, slice(None))
+    # Candidates whose parameter has not converged yet.
+    active = np.arange(len(x))
+    for _ in range(NEWTON_ITERATIONS):
+        old, old_value = parameter[active], value[active]
+        new = sign * np.maximum(0, sign * (old + newton_step(old, active)))
+        new = np.maximum(new, (old + lower) / 2)
+        new_value = objective(new, active)
+        # Halve the steps that do not increase the likelihood.
+        for _ in range(NEWTON_ITERATIONS):
+            worse = ~(new_value >= old_value - 1e-12 * (1 + np.abs(old_value)))
+            if not worse.any():
+                break
+            new = np.where(worse, (old + new) / 2, new)
+            new_value[worse] = objective(new[worse], active[worse])
+        improved = new_value > old_value
+        parameter[active] = np.where(improved, new, old)
+        value[active] = np.where(improved, new_value, old_value)
+        active = active[~np.isclose(new, old, rtol=1e-6, atol=1e-8)]
+        if not len(active):
+            break
+    return value, parameter
+
+
+def alarm_count(
+    statistic: Callable[[float], float],
+    threshold: float,
+    sign: int,
+    x_max: float = X_MAX,
+) -> float:
+    """
+    Smallest count with an alarm for increases and largest count with an alarm for decreases.
+
+    ``statistic`` has to be monotone in the count. The boundary is bracketed by doubling and
+    then found by bisection. Returns NaN if no count up to ``x_max`` raises an alarm.
+    """
+    if sign == 1:
+        return _smallest_alarm_count(statistic, threshold, x_max)
+    return _largest_alarm_count(statistic, threshold, x_max)
+
+
+def _smallest_alarm_count(
+    statistic: Callable[[float], float], threshold: float, x_max: float
+) -> float:
+    high = min(1.0, x_max)
+    while statistic(high) <= threshold:
+        if high == x_max:
+            return np.nan
+        high = min(2 * high, x_max)
+    low = -1.0
+    # Invariant: low does not raise an alarm, high does.
+    while high - low > 1:
+        middle = np.floor((low + high) / 2)
+        if statistic(middle) > threshold:
+            high = middle
+        else:
+            low = middle
+    return high
+
+
+def _largest_alarm_count(
+    statistic: Callable[[float], float], threshold: float, x_max: float
+) -> float:
+    if statistic(0) <= threshold:
+        return np.nan
+    low, high = 0.0, min(1.0, x_max)
+    while statistic(high) > threshold:
+        if high == x_max:
+            return x_max
+        low, high = high, min(2 * high, x_max)
+    # Invariant: low raises an alarm, high does not.
+    while high - low > 1:
+        middle = np.floor((low + high) / 2)
+        if statistic(middle) > threshold:
+            low = middle
+        else:
+            high = middle
+    return low
+
+
+def glr(
+    counts: np.ndarray,
+    mu0: np.ndarray,
+    threshold: float,
+    m: int,
+    change: str,
+    direction: Sequence[str],
+    upperbound_statistic: str,
+    alpha: float = 0,
+    x_max: float = X_MAX,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Alarms and upperbounds of the GLR chart for ``counts`` with in-control means ``mu0``.
+
+    The counts are negative binomial with dispersion ``alpha``, or Poisson if it is zero.
+    At every time point the likelihood ratio is maximized over the change points in the last
+    ``m + 1`` time points, or all time points if ``m`` is -1, since the last alarm. An alarm
+    is raised if the maximum exceeds ``threshold`` and the chart restarts after it.
+    The upperbound is either the GLR statistic ("value") or the count that would have raised an
+    alarm ("cases"), searched up to ``x_max``.
+
+    For an increase of the intercept of Poisson counts every time point takes time proportional
+    to the number of candidates. Otherwise the parameter of every candidate is estimated
+    iteratively, which takes time quadratic in the number of candidates, for every count that is
+    tried for "cases". Then a finite ``m`` bounds the cost of a time point, whereas with -1 it
+    grows until the next alarm.
+    """
+    if change not in CHANGES:
+        raise ValueError(f'Unknown change "{change}".')
+    if upperbound_statistic not in UPPERBOUND_STATISTICS:
+        raise ValueError(f'Unknown upperbound statistic "{upperbound_statistic}".')
+    sign = _sign(direction)
+    x = np.asarray(counts, dtype=float)
+    mu0 = np.asarray(mu0, dtype=float)
+    # The count before the first time point is taken to be zero like in R.
+    previous = np.concatenate(([0], x[:-1]))
+    cumulative_x = np.concatenate(([0], np.cumsum(x)))
+    cumulative_mu = np.concatenate(([0], np.cumsum(mu0)))
+    alarm = np.zeros(len(x), dtype=bool)
+    upperbound = np.zeros(len(x))
+    estimate = np.zeros(len(x))
+    start = 0
+    for n in range(len(x)):
+        first = start if m < 0 else max(start, n - m)
+        if change == "intercept" and alpha == 0:
+            # Sums since every candidate change point without the count at n.
+            sum_x = cumulative_x[n] - cumulative_x[first : n + 1]
+            sum_mu = cumulative_mu[n + 1] - cumulative_mu[first : n + 1]
+
+            def statistic(count):
+                return np.max(intercept_statistic(sum_x + count, sum_mu, sign))
+
+            value = statistic(x[n])
+        else:
+            window = slice(first, n + 1)
+            # The estimates for the count at n are the start for the other counts and for the
+            # same candidates at the next time point.
+            values, estimate[window] = window_statistic(
+                x[window],
+                mu0[window],
+                previous[window],
+                change,
+                alpha,
+                sign,
+                estimate[window],
+            )
+
+            def statistic(count):
+                x_window = np.append(x[first:n], count)
+                value, _ = window_statistic(
+                    x_window,
+                    mu0[window],
+                    previous[window],
+                    change,
+                    alpha,
+                    sign,
+                    estimate[window],
+                )
+                return np.max(value)
+
+            value = np.max(values)
+        alarm[n] = value > threshold
+        if upperbound_statistic == "value":
+            upperbound[n] = value
+        else:
+            upperbound[n] = alarm_count(statistic, threshold, sign, x_max)
+        if alarm[n]:
+            start = n + 1
+    return alarm, upperbound
+
+
+def glr_poisson(
+    counts: np.ndarray,
+    n_history: int,
+    threshold: float,
+    m: int,
+    change: str,
+    direction: Sequence[str],
+    upperbound_statistic: str,
+    period: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Alarms and upperbounds for all time points after ``n_history``.
+
+    The in-control means are predicted by a Poisson GLM with one harmonic of the given period,
+    which is fitted to the history.
+    """
+    counts = np.asarray(counts, dtype=float)
+    mu0 = expected_counts(counts, n_history, "glm", period)
+    return glr(
+        counts[n_history:],
+        mu0,
+        threshold,
+        m,
+        change,
+        direction,
+        upperbound_statistic,
+    )
+
+
+def recursive_lr(
+    counts: np.ndarray,
+    mu0: np.ndarray,
+    threshold: float,
+    theta: float,
+    change: str,
+    upperbound_statistic: str,
+    alpha: float = 0,
+    x_max: float = X_MAX,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Alarms and upperbounds of the recursive likelihood ratio chart with the known change ``theta``.
+
+    The statistic :math:`R_n = \\max(0, R_{n-1} + \\log LR_n)` uses the log likelihood ratio of
+    the change :math:`\\kappa = \\theta` for "intercept" or :math:`\\lambda = \\theta` for "epi".
+    An alarm is raised if it exceeds ``threshold`` and the chart restarts after it.
+    """
+    if change not in CHANGES:
+        raise ValueError(f'Unknown change "{change}".')
+    if upperbound_statistic not in UPPERBOUND_STATISTICS:
+        raise ValueError(f'Unknown upperbound statistic "{upperbound_statistic}".')
+    x = np.asarray(counts, dtype=float)
+    mu0 = np.asarray(mu0, dtype=float)
+    previous = np.concatenate(([0], x[:-1]))
+    if change == "intercept":
+        mu1 = mu0 * np.exp(theta)
+    else:
+        mu1 = mu0 + theta * previous
+    # The log likelihood ratio increases with the count if the mean increases.
+    sign = 1 if theta >= 0 else -1
+    alarm = np.zeros(len(x), dtype=bool)
+    upperbound = np.zeros(len(x))
+    statistic_before = 0.0
+    for n in range(len(x)):
+
+        def statistic(count):
+            return max(
+                0, statistic_before + log_likelihood_ratio(count, mu1[n], mu0[n], alpha)
+            )
+
+        value = statistic(x[n])
+        alarm[n] = value > threshold
+        if upperbound_statistic == "value":
+            upperbound[n] = value
+        else:
+            upperbound[n] = alarm_count(statistic, threshold, sign, x_max)
+        statistic_before = 0.0 if alarm[n] else value
+    return alarm, upperbound
+
+
+def fit_in_control_model(
+    history: np.ndarray, period: int, alpha: Optional[float]
+) -> Tuple[np.ndarray, float]:
+    """
+    Coefficients of the in-control model and the dispersion.
+
+    The model is a GLM with one harmonic of the given period fitted to ``history``. It is a
+    Poisson GLM if ``alpha`` is zero and a negative binomial GLM otherwise. If ``alpha`` is None,
+    it is estimated together with the coefficients.
+    """
+    design = harmonic_design(np.arange(1, len(history) + 1), period)
+    if alpha is None:
+        fit, size = fit_glm_nb(design, history)
+        alpha = 1 / size
+    elif alpha == 0:
+        fit = fit_poisson_glm(design, history)
+    else:
+        fit = fit_negative_binomial_glm(design, history, 1 / alpha)
+    return fit.coefficients, alpha
+
+
+def in_control_means(
+    counts: np.ndarray, n_history: int, period: int, alpha: Optional[float]
+) -> Tuple[np.ndarray, float]:
+    """
+    In-control means for the time points after ``n_history`` and the dispersion.
+
+    The means are predicted by the in-control model fitted to the history, see
+    ``fit_in_control_model``.
+    """
+    coefficients, alpha = fit_in_control_model(counts[:n_history], period, alpha)
+    design = harmonic_design(np.arange(n_history + 1, len(counts) + 1), period)
+    return np.exp(design @ coefficients), alpha
+
+
+def glr_negative_binomial(
+    counts: np.ndarray,
+    n_history: int,
+    threshold: float,
+    m: int,
+    change: str,
+    direction: Sequence[str],
+    upperbound_statistic: str,
+    period: int,
+    alpha: Optional[float],
+    m0: Optional[float] = None,
+    theta: Optional[float] = None,
+    x_max: float = X_MAX,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Alarms and upperbounds for all time points after ``n_history``.
+
+    Uses the GLR chart or, if ``theta`` is given, the recursive likelihood ratio chart.
+    The in-control mean is ``m0`` or, if it is None, predicted by a GLM fitted to the history.
+    The dispersion ``alpha`` is estimated once from the history if it is None.
+    """
+    counts = np.asarray(counts, dtype=float)
+    if m0 is None:
+        mu0, alpha = in_control_means(counts, n_history, period, alpha)
+    else:
+        mu0 = np.full(len(counts) - n_history, float(m0))
+        if alpha is None:
+            alpha = 1 / theta_ml(counts[:n_history], m0)
+    if theta is not None:
+        return recursive_lr(
+            counts[n_history:],
+            mu0,
+            threshold,
+            theta,
+            change,
+            upperbound_statistic,
+            alpha,
+            x_max,
+        )
+    return glr(
+        counts[n_history:],
+        mu0,
+        threshold,
+        m,
+        change,
+        direction,
+        upperbound_statistic,
+        alpha,
+        x_max,
+    )
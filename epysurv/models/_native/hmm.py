@@ -0,0 +1,223 @@
+"""Poisson hidden Markov models for outbreak detection like ``surveillance::algo.hmm``."""
+from typing import NamedTuple, Tuple
+
+import numpy as np
+from scipy.special import gammaln
+
+from .glm import fit_poisson_glm
+
+TOLERANCE = 1e-6
+MAX_ITERATIONS = 100
+# Probability of leaving a state in the initial transition matrix.
+INITIAL_SWITCH_PROBABILITY = 0.1
+# Lower bound of the transition probabilities, which keeps their logarithms finite.
+MIN_PROBABILITY = 1e-10
+
+
+class HMMParameters(NamedTuple):
+    intercepts: np.ndarray
+    """Log rate of each state without covariates."""
+    effects: np.ndarray
+    """Covariate effects with one row per state."""
+    transition: np.ndarray
+    """Transition probabilities from the state of the row to the state of the column."""
+
+
+def covariates(t: np.ndarray, trend: bool, n_harmonics: int, period: int) -> np.ndarray:
+    """Linear time trend and ``n_harmonics`` harmonic waves of the given period, one column each
+    for the trend, the cosine and the sine terms."""
+    columns = [t] if trend else []
+    for s in range(1, n_harmonics + 1):
+        columns.append(np.cos(2 * np.pi * s * t / period))
+        columns.append(np.sin(2 * np.pi * s * t / period))
+    return np.column_stack(columns) if columns else np.empty((len(t), 0))
+
+
+def initial_parameters(
+    counts: np.ndarray, n_states: int, n_covariates: int
+) -> HMMParameters:
+    """Constant rates at evenly spaced quantiles of the counts, such that the last state has the
+    highest rate, and a transition matrix that mostly stays in the same state."""
+    quantiles = (np.arange(n_states) + 0.5) / n_states
+    rates = np.quantile(counts, quantiles) + 0.5 + np.arange(n_states)
+    transition = np.full(
+        (n_states, n_states), INITIAL_SWITCH_PROBABILITY / max(n_states - 1, 1)
+    )
+    np.fill_diagonal(transition, 1 - INITIAL_SWITCH_PROBABILITY)
+    if n_states == 1:
+        transition[:] = 1
+    return HMMParameters(np.log(rates), np.zeros((n_states, n_covariates)), transition)
+
+
+def log_rates(params: HMMParameters, x: np.ndarray) -> np.ndarray:
+    """Log rates with one row per time point and one column per state."""
+    return params.intercepts + x @ params.effects.T
+
+
+def log_emissions(counts: np.ndarray, log_rate: np.ndarray) -> np.ndarray:
+    """Poisson log probabilities of the counts in each state."""
+    y = counts[:, None]
+    return y * log_rate - np.exp(log_rate) - gammaln(y + 1)
+
+
+def forward_backward(
+    log_emission: np.ndarray, transition: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, float]:
+    """
+    Scaled forward-backward algorithm, starting in the first state.
+
+    Returns the posterior state probabilities with one row per time point, the expected number of
+    transitions between the states and the log likelihood.
+    """
+    n_points, n_states = log_emission.shape
+    # Scaling the emissions of every time point keeps them representable.
+    emission_max = log_emission.max(axis=1)
+    emission = np.exp(log_emission - emission_max[:, None])
+    forward = np.empty((n_points, n_states))
+    scale = np.empty(n_points)
+    # The chain starts in the first state, whose emission is the first scale.
+    forward[0] = 0
+    forward[0, 0] = 1
+    emission_max[0] = log_emission[0, 0]
+    scale[0] = 1
+    alpha = forward[0]
+    for t in range(1, n_points):
+        alpha = (alpha @ transition) * emission[t]
+        scale[t] = alpha.sum()
+        alpha = alpha / scale[t]
+        forward[t] = alpha
+    backward = np.empty((n_points, n_states))
+    beta = np.ones(n_states)
+    backward[-1] = beta
+    for t in range(n_points - 1, 0, -1):
+        beta = transition @ (emission[t] * beta) / scale[t]
+        backward[t - 1] = beta
+    weighted = emission[1:] * backward[1:] / scale[1:, None]
+    transitions = transition * (forward[:-1].T @ weighted)
+    posterior = forward * backward
+    posterior /= posterior.sum(axis=1, keepdims=True)
+    log_likelihood = float(np.sum(np.log(scale)) + np.sum(emission_max))
+    return posterior, transitions, log_likelihood
+
+
+def viterbi(log_emission: np.ndarray, transition: np.ndarray) -> np.ndarray:
+    """Most probable sequence of states, starting in the first state."""
+    n_points, n_states = log_emission.shape
+    log_transition = np.log(np.maximum(transition, MIN_PROBABILITY))
+    score = np.full(n_states, -np.inf)
+    score[0] = log_emission[0, 0]
+    backpointers = np.empty((n_points, n_states), dtype=int)
+    for t in range(1, n_points):
+        candidates = score[:, None] + log_transition
+        backpointers[t] = np.argmax(candidates, axis=0)
+        score = candidates[backpointers[t], np.arange(n_states)] + log_emission[t]
+    states = np.empty(n_points, dtype=int)
+    states[-1] = np.argmax(score)
+    for t in range(n_points - 1, 0, -1):
+        states[t - 1] = backpointers[t, states[t]]
+    return states
+
+
+def _maximize_rates(
+    counts: np.ndarray,
+    x: np.ndarray,
+    posterior: np.ndarray,
+    equal_effects: bool,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Intercepts and covariate effects maximizing the expected log likelihood, i.e. Poisson GLMs
+    weighted with the posterior state probabilities."""
+    n_points, n_states = posterior.shape
+    n_covariates = x.shape[1]
+    if equal_effects:
+        # One GLM for all states with a state specific intercept and shared effects.
+        design = np.column_stack(
+            (
+                np.kron(np.eye(n_states), np.ones((n_points, 1))),
+                np.tile(x, (n_states, 1)),
+            )
+        )
+        fit = fit_poisson_glm(design, np.tile(counts, n_states), posterior.T.ravel())
+        intercepts = fit.coefficients[:n_states]
+        effects = np.tile(fit.coefficients[n_states:], (n_states, 1))
+        return intercepts, effects
+    design = np.column_stack((np.ones(n_points), x))
+    intercepts = np.empty(n_states)
+    effects = np.empty((n_states, n_covariates))
+    for state in range(n_states):
+        fit = fit_poisson_glm(design, counts, posterior[:, state])
+        intercepts[state] = fit.coefficients[0]
+        effects[state] = fit.coefficients[1:]
+    return intercepts, effects
+
+
+def fit_poisson_hmm(
+    counts: np.ndarray,
+    x: np.ndarray,
+    start: HMMParameters,
+    equal_effects: bool = False,
+    tolerance: float = TOLERANCE,
+    max_iterations: int = MAX_ITERATIONS,
+) -> HMMParameters:
+    """
+    Fit a Poisson HMM with covariates ``x`` by the expectation maximization (Baum-Welch) algorithm.
+
+    The log rate of each state is linear in the covariates. The iterations start from ``start`` and
+    stop when the relative change of the log likelihood falls below ``tolerance``.
+    """
+    params = start
+    log_likelihood = -np.inf
+    for _ in range(max_iterations):
+        posterior, transitions, new_log_likelihood = forward_backward(
+            log_emissions(counts, log_rates(params, x)), params.transition
+        )
+        converged = abs(new_log_likelihood - log_likelihood) <= tolerance * (
+            abs(new_log_likelihood) + tolerance
+        )
+        log_likelihood = new_log_likelihood
+        if converged:
+            break
+        transition = np.maximum(transitions, MIN_PROBABILITY)
+        transition /= transition.sum(axis=1, keepdims=True)
+        intercepts, effects = _maximize_rates(counts, x, posterior, equal_effects)
+        params = HMMParameters(intercepts, effects, transition)
+    return params
+
+
+def hmm(
+    counts: np.ndarray,
+    n_history: int,
+    n_observations: int,
+    n_states: int,
+    trend: bool,
+    n_harmonics: int,
+    equal_effects: bool,
+    period: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Alarms and upperbounds for all time points after ``n_history``.
+
+    For every time point a Poisson HMM is fitted to the last ``n_observations`` counts, or to all
+    counts up to it if ``n_observations`` is -1. The fit starts from the parameters of the previous
+    time point. The state with the highest mean rate is the outbreak state. An alarm is raised if
+    the time point is in the outbreak state in the most probable sequence of states. The upperbound
+    is the posterior probability of the outbreak state.
+    """
+    counts = np.asarray(counts, dtype=float)
+    t = np.arange(len(counts), dtype=float)
+    x = covariates(t, trend, n_harmonics, period)
+    alarm = np.zeros(len(counts) - n_history, dtype=bool)
+    upperbound = np.zeros(len(counts) - n_history)
+    params = None
+    for i, k in enumerate(range(n_history, len(counts))):
+        first = 0 if n_observations == -1 else max(0, k - n_observations + 1)
+        window = slice(first, k + 1)
+        if params is None:
+            params = initial_parameters(counts[window], n_states, x.shape[1])
+        params = fit_poisson_hmm(counts[window], x[window], params, equal_effects)
+        log_rate = log_rates(params, x[window])
+        log_emission = log_emissions(counts[window], log_rate)
+        outbreak_state = np.argmax(np.exp(log_rate).mean(axis=0))
+        posterior, _, _ = forward_backward(log_emission, params.transition)
+        alarm[i] = viterbi(log_emission, params.transition)[-1] == outbreak_state
+        upperbound[i] = posterior[-1, outbreak_state]
+    return alarm, upperbound
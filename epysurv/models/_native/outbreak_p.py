@@ -0,0 +1,163 @@
+"""OutbreakP as implemented in ``surveillance::outbreakP``."""
+import math
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+UPPERBOUND_STATISTICS = ("cases", "value")
+
+
+def _xlogy(x: float, y: float) -> float:
+    return x * math.log(y) if x > 0 else 0.0
+
+
+class IsotonicBlocks:
+    """
+    Blocks of the nondecreasing isotonic regression of a growing series of counts.
+
+    The blocks are updated with the pool adjacent violators algorithm when a count is appended,
+    which takes amortized constant time. Along with the blocks the Poisson log likelihood
+    :math:`\\sum_t x_t \\log \\hat{\\mu}_t` of the isotonic fit, up to terms that only depend on
+    the counts, is kept up to date.
+    """
+
+    def __init__(self):
+        self.sums: List[float] = []
+        self.lengths: List[int] = []
+        self.log_likelihood = 0.0
+
+    @property
+    def last_mean(self) -> float:
+        return self.sums[-1] / self.lengths[-1] if self.sums else 0.0
+
+    def _pool(self, count: float) -> Tuple[int, float, int, float]:
+        """The first block pooled with ``count``, the sum and length of the pooled block and the
+        log likelihood of the pooled blocks before pooling."""
+        first = len(self.sums)
+        total, length, removed = count, 1, 0.0
+        while (
+            first > 0
+            and self.sums[first - 1] * length > total * self.lengths[first - 1]
+        ):
+            first -= 1
+            total += self.sums[first]
+            length += self.lengths[first]
+            removed += _xlogy(self.sums[first], self.sums[first] / self.lengths[first])
+        return first, total, length, removed
+
+    def log_likelihood_with(self, count: float) -> float:
+        """The log likelihood if ``count`` was appended, without appending it."""
+        _, total, length, removed = self._pool(count)
+        return self.log_likelihood - removed + _xlogy(total, total / length)
+
+    def append(self, count: float):
+        first, total, length, removed = self._pool(count)
+        del self.sums[first:]
+        del self.lengths[first:]
+        self.sums.append(total)
+        self.lengths.append(length)
+        self.log_likelihood += _xlogy(total, total / length) - removed
+
+
+def needed_cases(
+    alarms: Callable[[float], bool], count: float, last_mean: float, max_cases: float
+) -> float:
+    """
+    Number of cases needed before alarm (NNBA).
+
+    If ``count`` raises an alarm, this is the smallest count such that all counts between it and
+    ``count`` raise an alarm. Otherwise it is the smallest larger count raising an alarm, or NaN if
+    there is none up to ``max_cases``. Above ``last_mean``, the mean of the last block of the
+    isotonic regression, the statistic increases with the count, so the boundary is found by
+    bisection there. Below, where the count is pooled with earlier blocks, the counts are scanned.
+    """
+    monotone_from = math.ceil(last_mean)
+    if alarms(count):
+        if count > monotone_from and not alarms(monotone_from):
+            return _first_alarm(alarms, monotone_from, count)
+        lowest = min(count, monotone_from)
+        while lowest > 0 and alarms(lowest - 1):
+            lowest -= 1
+        return lowest
+    low = count
+    while low < monotone_from:
+        low += 1
+        if low > max_cases:
+            return np.nan
+        if alarms(low):
+            return low
+    if not alarms(max_cases):
+        return np.nan
+    return _first_alarm(alarms, *_bracket_alarm(alarms, low, max_cases))
+
+
+def _bracket_alarm(
+    alarms: Callable[[float], bool], low: float, max_cases: float
+) -> Tuple[float, float]:
+    """Doubles ``high`` from ``low`` until it raises an alarm, at most up to ``max_cases``, which
+    has to raise one. Returns the last count without an alarm and ``high``."""
+    high = max(2 * low, 1)
+    while not alarms(min(high, max_cases)):
+        low, high = high, 2 * high
+    return low, min(high, max_cases)
+
+
+def _first_alarm(alarms: Callable[[float], bool], low: float, high: float) -> float:
+    """Smallest count raising an alarm by bisection, where ``low`` does not raise an alarm and
+    ``high`` does."""
+    while high - low > 1:
+        middle = (low + high) // 2
+        if alarms(middle):
+            high = middle
+        else:
+            low = middle
+    return high
+
+
+def outbreak_p(
+    counts: np.ndarray,
+    n_history: int,
+    threshold: float,
+    upperbound_statistic: str,
+    max_upperbound_cases: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Alarms and upperbounds for all time points after ``n_history``.
+
+    The OutbreakP statistic at time ``s`` is the likelihood ratio of all counts up to ``s`` for a
+    monotone increase of the Poisson mean, estimated by isotonic regression, against a constant
+    mean. An alarm is raised if it exceeds ``threshold``. The upperbound is either the statistic
+    ("value") or the number of cases needed before alarm ("cases").
+    """
+    if upperbound_statistic not in UPPERBOUND_STATISTICS:
+        raise ValueError(f'Unknown upperbound statistic "{upperbound_statistic}".')
+    counts = np.asarray(counts, dtype=float)
+    log_threshold = math.log(threshold)
+    blocks = IsotonicBlocks()
+    for count in counts[:n_history]:
+        blocks.append(count)
+    total = float(np.sum(counts[:n_history]))
+    alarm = np.zeros(len(counts) - n_history, dtype=bool)
+    upperbound = np.zeros(len(counts) - n_history)
+    for i, count in enumerate(counts[n_history:]):
+        n_points = n_history + i + 1
+
+        def log_statistic(x):
+            return blocks.log_likelihood_with(x) - _xlogy(
+                total + x, (total + x) / n_points
+            )
+
+        def alarms(x):
+            return log_statistic(x) > log_threshold
+
+        value = log_statistic(count)
+        alarm[i] = value > log_threshold
+        if upperbound_statistic == "value":
+            upperbound[i] = np.exp(value)
+        else:
+            upperbound[i] = needed_cases(
+                alarms, count, blocks.last_mean, max_upperbound_cases
+            )
+        blocks.append(count)
+        total += count
+    return alarm, upperbound
@@ -0,0 +1,45 @@
+"""Reference windows of past values for every time point of a detection range.
+
+The offsets of the reference values relative to a time point are the same for all time points.
+A single index array of shape (number of time points, number of reference values) therefore
+gathers all reference values of a detection range at once.
+"""
+from typing import Sequence
+
+import numpy as np
+
+
+def recent_offsets(width: int) -> np.ndarray:
+    """Offsets of the ``width`` time points directly before a time point."""
+    return np.arange(-width, 0)
+
+
+def past_year_offsets(
+    years_back: int, freq: int, before: int, after: int
+) -> np.ndarray:
+    """Offsets of the windows from ``before`` time points before to ``after`` time points after
+    the same time point in each of the ``years_back`` previous years, oldest first."""
+    years = np.arange(-years_back, 0) * freq
+    return (years[:, None] + np.arange(-before, after + 1)[None, :]).ravel()
+
+
+def reference_index(n_history: int, n_total: int, offsets: Sequence[int]) -> np.ndarray:
+    """
+    Positions of the reference values of every time point after ``n_history``.
+
+    Returns
+    -------
+        Array with one row per time point in the detection range and one column per offset.
+    """
+    offsets = np.asarray(offsets)
+    if len(offsets) == 0:
+        raise ValueError("The reference window does not contain any values.")
+    targets = np.arange(n_history, n_total)
+    if n_history + offsets.min() < 0:
+        raise ValueError(
+            f"The reference values reach {-offsets.min()} time points back, but there are only "
+            f"{n_history} time points before the first time point to predict."
+        )
+    if offsets.max() >= 0:
+        raise ValueError("Reference values have to be in the past.")
+    return targets[:, None] + offsets[None, :]
@@ -0,0 +1,50 @@
+"""The old algorithm of the Robert Koch Institute as implemented in ``surveillance::algo.rki``."""
+from typing import Tuple
+
+import numpy as np
+from scipy.stats import chi2
+
+from .reference import past_year_offsets, recent_offsets, reference_index
+
+# Above this mean of the reference values the normal approximation is used.
+NORMAL_APPROXIMATION_MEAN = 20
+
+
+def poisson_upper_limit(mu: np.ndarray) -> np.ndarray:
+    """Upper limit of the exact 95% confidence interval of a Poisson mean, given a count ``mu``.
+
+    surveillance looks these limits up in a table.
+    """
+    return chi2.ppf(0.975, 2 * (mu + 1)) / 2
+
+
+def rki(
+    counts: np.ndarray,
+    n_history: int,
+    years_back: int,
+    window_half_width: int,
+    include_recent_year: bool,
+    freq: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Alarms and upperbounds for all time points after ``n_history``.
+
+    The reference values are the ``window_half_width`` time points before the time point,
+    if ``include_recent_year``, and the windows of ``2 * window_half_width + 1`` time points around
+    the same time point in each of the ``years_back`` previous years. If their mean is larger than
+    20, the upperbound is the mean plus two standard deviations. Otherwise it is the upper limit of
+    the Poisson confidence interval for the mean rounded down.
+    """
+    counts = np.asarray(counts, dtype=float)
+    offsets = past_year_offsets(
+        years_back, freq, before=window_half_width, after=window_half_width
+    )
+    if include_recent_year:
+        offsets = np.concatenate((recent_offsets(window_half_width), offsets))
+    reference = counts[reference_index(n_history, len(counts), offsets)]
+    mu = reference.mean(axis=1)
+    normal = mu > NORMAL_APPROXIMATION_MEAN
+    upperbound = poisson_upper_limit(np.floor(mu))
+    if normal.any():
+        upperbound[normal] = mu[normal] + 2 * reference[normal].std(axis=1, ddof=1)
+    return counts[n_history:] > upperbound, upperbound
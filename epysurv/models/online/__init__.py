@@ -0,0 +1,12 @@
+from .cusum import OnlineCusum
+from .ears import OnlineEarsC1, OnlineEarsC2, OnlineEarsC3
+from .glr import OnlineGLRNegativeBinomial, OnlineGLRPoisson
+
+__all__ = [
+    "OnlineCusum",  # lgtm [py/undefined-export]
+    "OnlineEarsC1",  # lgtm [py/undefined-export]
+    "OnlineEarsC2",  # lgtm [py/undefined-export]
+    "OnlineEarsC3",  # lgtm [py/undefined-export]
+    "OnlineGLRNegativeBinomial",  # lgtm [py/undefined-export]
+    "OnlineGLRPoisson",  # lgtm [py/undefined-export]
+]
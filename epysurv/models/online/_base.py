@@ -0,0 +1,125 @@
+"""Detectors that process a time series one time point at a time."""
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+from epysurv.metrics.outbreak_detection import ghozzi_score
+
+from ..timepoint._base import DataValidationMixin, _get_freq
+
+
+@dataclass
+class OnlineSurveillanceAlgorithm(DataValidationMixin):
+    """
+    Algorithms that are fitted once and then updated with one count at a time.
+
+    The cost of an update does not depend on the length of the time series. The state consists of
+    plain Python values, so that the output of ``to_dict`` can be serialized, e.g. as JSON, and
+    the detector restored with ``from_dict`` in another process. Unlike the timepoint algorithms
+    the detectors do not keep the training data.
+    """
+
+    _freq: Optional[str] = field(init=False, repr=False, default=None)
+    _period: Optional[int] = field(init=False, repr=False, default=None)
+    _next_date: Optional[pd.Timestamp] = field(init=False, repr=False, default=None)
+
+    def fit(self, data: pd.DataFrame) -> "OnlineSurveillanceAlgorithm":
+        """Expects data with time series index, case counts and outbreak labels.
+
+        Updates continue at the time point after the last one of ``data``.
+        """
+        data = self._prepare_training_data(data)
+        if data.index.freq is None:
+            raise ValueError("`data` needs an index with a frequency.")
+        self._freq = data.index.freqstr
+        self._period = _get_freq(data)
+        self._next_date = data.index[-1] + data.index.freq
+        self._fit(data["n_cases"].values.astype(float))
+        return self
+
+    def update(self, date, count: float) -> Tuple[bool, float, float]:
+        """
+        Process the count of the next time point.
+
+        Returns
+        -------
+            Whether there is an alarm, the upperbound and the statistic of the algorithm.
+        """
+        if self._next_date is None:
+            raise ValueError(f"{type(self).__name__} has not been fitted.")
+        date = pd.Timestamp(date)
+        if date != self._next_date:
+            raise ValueError(
+                f"Expected the count of {self._next_date.date()}, but got the count of "
+                f"{date.date()}."
+            )
+        alarm, upperbound, statistic = self._update(float(count))
+        self._next_date = date + to_offset(self._freq)
+        return bool(alarm), float(upperbound), float(statistic)
+
+    def predict(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Update the detector with every row of ``data``.
+
+        Returns
+        -------
+            Original dataframe with "alarm", "upperbound" and "statistic" columns added.
+        """
+        self._validate_data(data)
+        results = [
+            self.update(date, count) for date, count in zip(data.index, data["n_cases"])
+        ]
+        alarm, upperbound, statistic = (
+            (np.array(values) for values in zip(*results))
+            if results
+            else (np.array([], dtype=bool), np.array([]), np.array([]))
+        )
+        return data.assign(alarm=alarm, upperbound=upperbound, statistic=statistic)
+
+    def score(self, data_with_labels: pd.DataFrame):
+        prediction_result = self.predict(data_with_labels)
+        return ghozzi_score(prediction_result)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The parameters and the state of the detector as plain Python values."""
+        return {
+            "params": {f.name: getattr(self, f.name) for f in fields(self) if f.init},
+            "freq": self._freq,
+            "period": self._period,
+            "next_date": None
+            if self._next_date is None
+            else self._next_date.isoformat(),
+            "state": self._get_state(),
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "OnlineSurveillanceAlgorithm":
+        """Restore a detector from the output of ``to_dict``."""
+        # Serialization formats like JSON turn tuples into lists.
+        params = {
+            name: tuple(value) if isinstance(value, list) else value
+            for name, value in state["params"].items()
+        }
+        detector = cls(**params)
+        detector._freq = state["freq"]
+        detector._period = state["period"]
+        if state["next_date"] is not None:
+            detector._next_date = pd.Timestamp(state["next_date"])
+            detector._set_state(state["state"])
+        return detector
+
+    def _fit(self, counts: np.ndarray):
+        """Initialize the state from the training counts."""
+        raise NotImplementedError
+
+    def _update(self, count: float) -> Tuple[bool, float, float]:
+        raise NotImplementedError
+
+    def _get_state(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def _set_state(self, state: Dict[str, Any]):
+        raise NotImplementedError
@@ -0,0 +1,103 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from .._native.cusum import INVERSE_TRANSFORMS, TRANSFORMS
+from .._native.glm import fit_poisson_glm, harmonic_design
+from ._base import OnlineSurveillanceAlgorithm
+
+EXPECTED_NUMBERS_METHODS = ("mean", "glm")
+
+
+@dataclass
+class OnlineCusum(OnlineSurveillanceAlgorithm):
+    r"""Cusum that is updated with one count at a time.
+
+    The expected number of cases is estimated from the data passed to ``fit``. Every update
+    standardizes the new count with it and adds it to the cumulative sum
+    :math:`S_t = \max(0, S_{t-1} + z_t - k)`, which starts at zero after the training data.
+    Without ``reset_on_alarm`` the alarms are the same as those of ``Cusum`` predicting all
+    updated time points at once.
+
+    Attributes
+    ----------
+    reference_value
+    decision_boundary
+    expected_numbers_method
+        How to determine the expected number of cases – the following arguments are possible:
+        {"glm", "mean"}.
+
+        ``mean``
+            Use the mean of all data points passed to ``fit``.
+        ``glm``
+            Fit a glm with one harmonic to the data points passed to ``fit``.
+    transform
+        One of the transformations of ``Cusum``.
+    negbin_alpha
+        Parameter of the negative binomial distribution, such that the variance is
+        :math:`m + α \cdot m^2`.
+    reset_on_alarm
+        Whether the cumulative sum restarts at zero after an alarm.
+    """
+
+    reference_value: float = 1.04
+    decision_boundary: float = 2.26
+    expected_numbers_method: str = "mean"
+    transform: str = "standard"
+    negbin_alpha: float = 0.1
+    reset_on_alarm: bool = False
+
+    _statistic: float = field(init=False, repr=False, default=0.0)
+    # One-based position of the next time point in the series, the time of the harmonic.
+    _position: int = field(init=False, repr=False, default=0)
+    _mean: float = field(init=False, repr=False, default=0.0)
+    _coefficients: List[float] = field(init=False, repr=False, default_factory=list)
+
+    def _fit(self, counts: np.ndarray):
+        if self.transform not in TRANSFORMS:
+            raise ValueError(f'Unknown transformation "{self.transform}".')
+        if self.expected_numbers_method not in EXPECTED_NUMBERS_METHODS:
+            raise ValueError(
+                f'Unknown method "{self.expected_numbers_method}" for the expected counts.'
+            )
+        self._statistic = 0.0
+        self._position = len(counts) + 1
+        self._mean = float(counts.mean())
+        if self.expected_numbers_method == "glm":
+            design = harmonic_design(np.arange(1, len(counts) + 1), self._period)
+            self._coefficients = fit_poisson_glm(design, counts).coefficients.tolist()
+
+    def expected(self) -> float:
+        """Expected number of cases of the next time point."""
+        if self.expected_numbers_method == "mean":
+            return self._mean
+        design = harmonic_design(np.array([self._position]), self._period)
+        return float(np.exp(design @ self._coefficients)[0])
+
+    def _update(self, count: float) -> Tuple[bool, float, float]:
+        expected = self.expected()
+        k, h = self.reference_value, self.decision_boundary
+        z = TRANSFORMS[self.transform](count, expected, self.negbin_alpha)
+        statistic = max(0.0, self._statistic + z - k)
+        upperbound = INVERSE_TRANSFORMS[self.transform](
+            h + k - self._statistic, expected, self.negbin_alpha
+        )
+        alarm = statistic >= h
+        self._statistic = 0.0 if alarm and self.reset_on_alarm else statistic
+        self._position += 1
+        return alarm, upperbound, statistic
+
+    def _get_state(self) -> Dict[str, Any]:
+        return {
+            "statistic": self._statistic,
+            "position": self._position,
+            "mean": self._mean,
+            "coefficients": self._coefficients,
+        }
+
+    def _set_state(self, state: Dict[str, Any]):
+        self._statistic = state["statistic"]
+        self._position = state["position"]
+        self._mean = state["mean"]
+        self._coefficients = state["coefficients"]
@@ -0,0 +1,195 @@
+from dataclasses import dataclass, field
+from typing import Any, ClassVar, Dict, List, Tuple
+
+import numpy as np
+from scipy.stats import norm
+
+from .._native.ears import LAG
+from ._base import OnlineSurveillanceAlgorithm
+
+
+@dataclass
+class _OnlineEarsBase(OnlineSurveillanceAlgorithm):
+    """
+    Base class for the online Ears models.
+
+    The counts of the baseline and of the lag after it are kept in a circular buffer together with
+    the sum and the sum of squares of the baseline, so an update takes constant time.
+    """
+
+    alpha: float = 0.001
+    baseline: int = 7
+    min_sigma: float = 0
+
+    method: ClassVar[str] = ""
+
+    # Counts of the last baseline + lag time points. _head points to the oldest one.
+    _buffer: List[float] = field(init=False, repr=False, default_factory=list)
+    _head: int = field(init=False, repr=False, default=0)
+    _sum: float = field(init=False, repr=False, default=0.0)
+    _sum_squares: float = field(init=False, repr=False, default=0.0)
+
+    @property
+    def _lag(self) -> int:
+        return LAG[self.method]
+
+    def _fit(self, counts: np.ndarray):
+        n_needed = self.baseline + self._lag
+        if len(counts) < n_needed:
+            raise ValueError(
+                f"At least {n_needed} time points are needed for the baseline, but there are "
+                f"only {len(counts)}."
+            )
+        self._buffer = counts[len(counts) - n_needed :].tolist()
+        self._head = 0
+        baseline = counts[len(counts) - n_needed : len(counts) - self._lag]
+        self._sum = float(baseline.sum())
+        self._sum_squares = float(np.sum(baseline ** 2))
+
+    def _baseline_statistics(self) -> Tuple[float, float]:
+        n = self.baseline
+        mu = self._sum / n
+        variance = max((self._sum_squares - self._sum * mu) / (n - 1), 0)
+        return mu, max(np.sqrt(variance), self.min_sigma)
+
+    def _c2(self, count: float, mu: float, sigma: float) -> float:
+        """Deviation of ``count`` from the baseline in standard deviations."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            deviation = np.float64(count - mu) / sigma
+        # A baseline without variation and a count equal to its mean is no deviation.
+        return 0.0 if np.isnan(deviation) else float(deviation)
+
+    def _push(self, count: float):
+        """Move the baseline on by one time point and add ``count`` to the buffer."""
+        size = len(self._buffer)
+        leaving = self._buffer[self._head]
+        entering = (
+            count
+            if self._lag == 0
+            else self._buffer[(self._head + self.baseline) % size]
+        )
+        self._sum += entering - leaving
+        self._sum_squares += entering ** 2 - leaving ** 2
+        self._buffer[self._head] = count
+        self._head = (self._head + 1) % size
+
+    def _update(self, count: float) -> Tuple[bool, float, float]:
+        z = norm.ppf(1 - self.alpha)
+        mu, sigma = self._baseline_statistics()
+        upperbound = mu + z * sigma
+        statistic = self._c2(count, mu, sigma)
+        self._push(count)
+        return count > upperbound, upperbound, statistic
+
+    def _get_state(self) -> Dict[str, Any]:
+        return {
+            "buffer": list(self._buffer),
+            "head": self._head,
+            "sum": self._sum,
+            "sum_squares": self._sum_squares,
+        }
+
+    def _set_state(self, state: Dict[str, Any]):
+        self._buffer = list(state["buffer"])
+        self._head = state["head"]
+        self._sum = state["sum"]
+        self._sum_squares = state["sum_squares"]
+
+
+class OnlineEarsC1(_OnlineEarsBase):
+    """EarsC1 that is updated with one count at a time.
+
+    The alarms and upperbounds are the same as those of ``EarsC1``. The statistic is the deviation
+    of the count from the mean of the baseline in standard deviations.
+
+    Attributes
+    ----------
+    alpha
+        An approximate (two-sided)(1 − α) prediction interval is calculated.
+    baseline
+        How many time points to use for calculating the baseline.
+    min_sigma
+        If min_sigma is higher than 0, the quantity zAlpha * min_sigma is then the alerting
+        threshold if the baseline is zero.
+    """
+
+    method = "C1"
+
+
+class OnlineEarsC2(_OnlineEarsBase):
+    """EarsC2 that is updated with one count at a time.
+
+    The alarms and upperbounds are the same as those of ``EarsC2``. The statistic is the deviation
+    of the count from the mean of the baseline, which ends two time points before it, in standard
+    deviations.
+
+    Attributes
+    ----------
+    alpha
+        An approximate (two-sided)(1 − α) prediction interval is calculated.
+    baseline
+        How many time points to use for calculating the baseline.
+    min_sigma
+        If min_sigma is higher than 0, zAlpha * min_sigma is then the alerting threshold if the
+        baseline is zero.
+    """
+
+    method = "C2"
+
+
+@dataclass
+class OnlineEarsC3(_OnlineEarsBase):
+    """EarsC3 that is updated with one count at a time.
+
+    The alarms and upperbounds are the same as those of ``EarsC3``. The statistic is the sum of the
+    C2 statistics of the two preceding time points, each reduced by 1 and truncated at 0. As the
+    alarm does not depend on the current count, the upperbound is the count above which the C3
+    statistic of the next time point exceeds the threshold, or 0 if it does for every count.
+
+    Attributes
+    ----------
+    alpha
+        An approximate (two-sided)(1 − α) prediction interval is calculated.
+    baseline
+        How many time points to use for calculating the baseline.
+    min_sigma
+        If min_sigma is higher than 0, zAlpha * min_sigma is then the alerting threshold if the
+        baseline is zero.
+    """
+
+    method = "C3"
+
+    # The truncated C2 statistics of the two preceding time points, the older one first.
+    _excess: List[float] = field(init=False, repr=False, default_factory=list)
+
+    def _fit(self, counts: np.ndarray):
+        n_needed = self.baseline + self._lag + 2
+        if len(counts) < n_needed:
+            raise ValueError(
+                f"At least {n_needed} time points are needed for the baseline, but there are "
+                f"only {len(counts)}."
+            )
+        # Run the two time points before the updates to obtain their C2 statistics.
+        super()._fit(counts[:-2])
+        self._excess = []
+        for count in counts[-2:]:
+            mu, sigma = self._baseline_statistics()
+            self._excess.append(max(self._c2(count, mu, sigma) - 1, 0))
+            self._push(float(count))
+
+    def _update(self, count: float) -> Tuple[bool, float, float]:
+        z = norm.ppf(1 - self.alpha)
+        mu, sigma = self._baseline_statistics()
+        c3 = sum(self._excess)
+        previous = self._excess[1]
+        upperbound = 0.0 if previous > z else mu + sigma * (1 + z - previous)
+        self._excess = [self._excess[1], max(self._c2(count, mu, sigma) - 1, 0)]
+        self._push(count)
+        return c3 > z, upperbound, c3
+
+    def _get_state(self) -> Dict[str, Any]:
+        return {**super()._get_state(), "excess": list(self._excess)}
+
+    def _set_state(self, state: Dict[str, Any]):
+        super()._set_state(state)
+        self._excess = list(state["excess"])
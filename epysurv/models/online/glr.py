@@ -0,0 +1,320 @@
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .._native.glm import harmonic_design, theta_ml
+from .._native.glr import (
+    CHANGES,
+    UPPERBOUND_STATISTICS,
+    X_MAX,
+    _sign,
+    alarm_count,
+    fit_in_control_model,
+    intercept_statistic,
+    log_likelihood_ratio,
+    window_statistic,
+)
+from ._base import OnlineSurveillanceAlgorithm
+
+
+@dataclass
+class _OnlineGLRBase(OnlineSurveillanceAlgorithm):
+    """
+    Base class for the online GLR charts.
+
+    The in-control model is fitted once to the data passed to ``fit`` and, with
+    ``refit_on_alarm``, again after every alarm. For an increase of the intercept of Poisson
+    counts the sums of the counts and of the in-control means since each candidate change point
+    in the window are kept and an update takes time proportional to the length of the window.
+    Otherwise the counts, the in-control means and the estimated parameters of the window are
+    kept and an update takes time quadratic in the length of the window. With ``m = -1`` the
+    window and thus the cost of an update grow until the next alarm.
+    """
+
+    m0: Optional[float] = None
+    alpha: Optional[float] = 0
+    glr_test_threshold: int = 5
+    m: int = -1
+    change: str = "intercept"
+    theta: Optional[float] = None
+    direction: Union[Tuple[str, str], Tuple[str]] = ("inc", "dec")
+    upperbound_statistic: str = "cases"
+    x_max: float = X_MAX
+    refit_on_alarm: bool = False
+
+    _coefficients: List[float] = field(init=False, repr=False, default_factory=list)
+    # The dispersion of the in-control model, which is only estimated by the first fit.
+    _alpha: float = field(init=False, repr=False, default=0.0)
+    # One-based position of the next time point in the series, the time of the harmonic.
+    _position: int = field(init=False, repr=False, default=0)
+    _previous: float = field(init=False, repr=False, default=0.0)
+    # Sums since the candidate change points in the window, the oldest candidate first.
+    _sum_x: List[float] = field(init=False, repr=False, default_factory=list)
+    _sum_mu: List[float] = field(init=False, repr=False, default_factory=list)
+    # Counts, in-control means and preceding counts of the window.
+    _window_x: List[float] = field(init=False, repr=False, default_factory=list)
+    _window_mu: List[float] = field(init=False, repr=False, default_factory=list)
+    _window_previous: List[float] = field(init=False, repr=False, default_factory=list)
+    # Estimated parameters of the candidate change points in the window for the last count.
+    _window_estimates: List[float] = field(init=False, repr=False, default_factory=list)
+    # Statistic of the recursive likelihood ratio chart.
+    _recursive: float = field(init=False, repr=False, default=0.0)
+    # All counts so far, which are only kept to refit the in-control model.
+    _refit_counts: List[float] = field(init=False, repr=False, default_factory=list)
+
+    @property
+    def _uses_sums(self) -> bool:
+        return self.theta is None and self.change == "intercept" and self._alpha == 0
+
+    def _fit(self, counts: np.ndarray):
+        if self.change not in CHANGES:
+            raise ValueError(f'Unknown change "{self.change}".')
+        if self.upperbound_statistic not in UPPERBOUND_STATISTICS:
+            raise ValueError(
+                f'Unknown upperbound statistic "{self.upperbound_statistic}".'
+            )
+        _sign(self.direction)
+        if self.m0 is None:
+            coefficients, self._alpha = fit_in_control_model(
+                counts, self._period, self.alpha
+            )
+            self._coefficients = coefficients.tolist()
+        else:
+            self._alpha = (
+                1 / theta_ml(counts, self.m0) if self.alpha is None else self.alpha
+            )
+        self._position = len(counts) + 1
+        # The count before the first update is taken to be zero like in R.
+        self._previous = 0.0
+        self._refit_counts = counts.tolist() if self.refit_on_alarm else []
+        self._restart()
+
+    def _restart(self):
+        self._sum_x, self._sum_mu = [], []
+        self._window_x, self._window_mu, self._window_previous = [], [], []
+        self._window_estimates = []
+        self._recursive = 0.0
+
+    def expected(self) -> float:
+        """In-control mean of the next time point."""
+        if self.m0 is not None:
+            return float(self.m0)
+        design = harmonic_design(np.array([self._position]), self._period)
+        return float(np.exp(design @ self._coefficients)[0])
+
+    def _in_window(self, values: List[float]) -> List[float]:
+        """The values that remain in the window when the next time point is added."""
+        return values if self.m < 0 else values[max(0, len(values) - self.m) :]
+
+    def _statistic(
+        self, count: float, mu0: float
+    ) -> Tuple[float, Callable[[float], float]]:
+        """The statistic of the count of the next time point and as a function of that count."""
+        if self.theta is not None:
+            if self.change == "intercept":
+                mu1 = mu0 * np.exp(self.theta)
+            else:
+                mu1 = mu0 + self.theta * self._previous
+
+            def statistic(other):
+                return max(
+                    0,
+                    self._recursive
+                    + log_likelihood_ratio(other, mu1, mu0, self._alpha),
+                )
+
+            return statistic(count), statistic
+        if self._uses_sums:
+            sum_x = np.append(self._sum_x, 0.0)
+            sum_mu = np.append(self._sum_mu, 0.0) + mu0
+            sign = _sign(self.direction)
+
+            def statistic(other):
+                return np.max(intercept_statistic(sum_x + other, sum_mu, sign))
+
+            return statistic(count), statistic
+        mu_window = np.append(self._window_mu, mu0)
+        previous_window = np.append(self._window_previous, self._previous)
+        values, estimates = window_statistic(
+            np.append(self._window_x, count),
+            mu_window,
+            previous_window,
+            self.change,
+            self._alpha,
+            _sign(self.direction),
+            np.append(self._window_estimates, 0.0),
+        )
+        # The estimates for the count are the start for the other counts and the next update.
+        self._window_estimates = estimates.tolist()
+
+        def statistic(other):
+            value, _ = window_statistic(
+                np.append(self._window_x, other),
+                mu_window,
+                previous_window,
+                self.change,
+                self._alpha,
+                _sign(self.direction),
+                estimates,
+            )
+            return np.max(value)
+
+        return np.max(values), statistic
+
+    def _update(self, count: float) -> Tuple[bool, float, float]:
+        mu0 = self.expected()
+        value, statistic = self._statistic(count, mu0)
+        value = float(value)
+        alarm = value > self.glr_test_threshold
+        if self.upperbound_statistic == "value":
+            upperbound = value
+        else:
+            # The log likelihood ratio increases with the count if the mean increases.
+            sign = (
+                _sign(self.direction)
+                if self.theta is None
+                else (1 if self.theta >= 0 else -1)
+            )
+            upperbound = alarm_count(
+                statistic, self.glr_test_threshold, sign, self.x_max
+            )
+        self._advance(count, mu0, value, alarm)
+        return alarm, upperbound, value
+
+    def _advance(self, count: float, mu0: float, value: float, alarm: bool):
+        """Add the count to the state and restart the chart after an alarm."""
+        self._position += 1
+        if self.refit_on_alarm:
+            self._refit_counts.append(count)
+        if alarm:
+            self._restart()
+            if self.refit_on_alarm and self.m0 is None:
+                coefficients, _ = fit_in_control_model(
+                    np.array(self._refit_counts), self._period, self._alpha
+                )
+                self._coefficients = coefficients.tolist()
+        elif self.theta is not None:
+            self._recursive = value
+        elif self._uses_sums:
+            self._sum_x = self._in_window([s + count for s in self._sum_x + [0.0]])
+            self._sum_mu = self._in_window([s + mu0 for s in self._sum_mu + [0.0]])
+        else:
+            self._window_x = self._in_window(self._window_x + [count])
+            self._window_mu = self._in_window(self._window_mu + [mu0])
+            self._window_previous = self._in_window(
+                self._window_previous + [self._previous]
+            )
+            self._window_estimates = self._in_window(self._window_estimates)
+        self._previous = count
+
+    def _get_state(self) -> Dict[str, Any]:
+        return {
+            "coefficients": list(self._coefficients),
+            "alpha": self._alpha,
+            "position": self._position,
+            "previous": self._previous,
+            "sum_x": list(self._sum_x),
+            "sum_mu": list(self._sum_mu),
+            "window_x": list(self._window_x),
+            "window_mu": list(self._window_mu),
+            "window_previous": list(self._window_previous),
+            "window_estimates": list(self._window_estimates),
+            "recursive": self._recursive,
+            "refit_counts": list(self._refit_counts),
+        }
+
+    def _set_state(self, state: Dict[str, Any]):
+        self._coefficients = list(state["coefficients"])
+        self._alpha = state["alpha"]
+        self._position = state["position"]
+        self._previous = state["previous"]
+        self._sum_x = list(state["sum_x"])
+        self._sum_mu = list(state["sum_mu"])
+        self._window_x = list(state["window_x"])
+        self._window_mu = list(state["window_mu"])
+        self._window_previous = list(state["window_previous"])
+        self._window_estimates = list(state["window_estimates"])
+        self._recursive = state["recursive"]
+        self._refit_counts = list(state["refit_counts"])
+
+
+@dataclass
+class OnlineGLRNegativeBinomial(_OnlineGLRBase):
+    """GLRNegativeBinomial that is updated with one count at a time.
+
+    The in-control model is fitted to the data passed to ``fit``. Every update computes the GLR
+    statistic of the new count over the change points in the window since the last alarm, so
+    without ``refit_on_alarm`` the alarms and upperbounds are the same as those of
+    ``GLRNegativeBinomial`` predicting all updated time points at once. The statistic is the GLR
+    statistic.
+
+    Attributes
+    ----------
+    m0
+        The in-control mean. If None, it is predicted by a GLM with one harmonic fitted to the
+        data passed to ``fit``.
+    alpha
+        The (known) dispersion parameter of the negative binomial distribution, such that the
+        variance is mean + alpha ∗ mean^2. If None, it is estimated once from the data passed to
+        ``fit``.
+    glr_test_threshold
+        Threshold in the GLR test, i.e. cγ.
+    m
+        Number of time instances back in time in the window-limited approach.
+        To always look back until the last alarm use -1, with which the cost of an update grows
+        until the next alarm.
+    change
+        A string specifying the type of the alternative. The two choices are "intercept" and "epi".
+    theta
+        If None then the GLR scheme is used. If not None the prespecified value for κ or λ is
+        used in a recursive LR scheme.
+    direction
+        Specifying the direction of testing in GLR scheme, see ``GLRNegativeBinomial``.
+    upperbound_statistic
+        "cases" for the number of cases that would have been necessary to produce an alarm or
+        "value" for the GLR-statistic.
+    x_max
+        Maximum value to try for x to see if this is the upperbound number of cases before
+        sounding an alarm.
+    refit_on_alarm
+        Whether to refit the in-control model to all counts so far after every alarm, with the
+        dispersion of the first fit. This requires keeping all counts in the state.
+    """
+
+
+@dataclass
+class OnlineGLRPoisson(_OnlineGLRBase):
+    """GLRPoisson that is updated with one count at a time.
+
+    The in-control means are predicted by a Poisson GLM with one harmonic fitted to the data
+    passed to ``fit``. Every update computes the GLR statistic of the new count over the change
+    points in the window since the last alarm, so without ``refit_on_alarm`` the alarms and
+    upperbounds are the same as those of ``GLRPoisson`` predicting all updated time points at
+    once. The statistic is the GLR statistic.
+
+    Attributes
+    ----------
+    glr_test_threshold
+        Threshold in the GLR test, i.e. cγ.
+    m
+        Number of time instances back in time in the window-limited approach.
+        To always look back until the last alarm use -1, with which the cost of an update grows
+        until the next alarm.
+    change
+        A string specifying the type of the alternative. The two choices are "intercept" and "epi".
+    direction
+        Specifying the direction of testing in GLR scheme, see ``GLRPoisson``.
+    upperbound_statistic
+        "cases" for the number of cases that would have been necessary to produce an alarm or
+        "value" for the GLR-statistic.
+    refit_on_alarm
+        Whether to refit the in-control model to all counts so far after every alarm.
+        This requires keeping all counts in the state.
+    """
+
+    # The Poisson chart has no parameters of the negative binomial chart.
+    m0: Optional[float] = field(init=False, repr=False, default=None)
+    alpha: Optional[float] = field(init=False, repr=False, default=0)
+    theta: Optional[float] = field(init=False, repr=False, default=None)
+    x_max: float = field(init=False, repr=False, default=X_MAX)
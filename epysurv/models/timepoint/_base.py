@@ -1,42 +1,25 @@
-import platform
+import contextlib
 import warnings
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
+from typing import ClassVar, Dict, Hashable, Mapping, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
-import rpy2.robjects as robjects
 from pandas.tseries import offsets
-from rpy2.robjects import numpy2ri, pandas2ri, r
-from rpy2.robjects.packages import importr
 
+from epysurv._rsession import r_session, silence_r_output  # noqa: F401
 from epysurv.metrics.outbreak_detection import ghozzi_score
 
+from . import _sts_cache
+from ._history import History
+from ._result import SurveillanceResult
+from .timing import PhaseStats
 
-def silence_r_output():
-    """Silence output from R code.
 
-    This is useful, because some algorithm otherwise print every time they are invoked.
-    """
-    if platform.system() == "Linux":
-        r.sink("/dev/null")
-    elif platform.system() == "Windows":
-        r.sink("NUL")
-
-
-silence_r_output()
-numpy2ri.activate()
-pandas2ri.activate()
-surveillance = importr("surveillance")
-
-
-@dataclass
-class TimepointSurveillanceAlgorithm:
-    """Algorithms that predict outbreaks for every timepoint."""
+class DataValidationMixin:
+    """Checks and preparation of the input data shared by all detectors."""
 
-    _training_data: pd.DataFrame = field(init=False, repr=False)
-
-    def fit(self, data: pd.DataFrame) -> "TimepointSurveillanceAlgorithm":
-        """Expects data with time series index, case counts and outbreak labels."""
+    def _prepare_training_data(self, data: pd.DataFrame) -> pd.DataFrame:
         self._validate_data(data)
         data = data.copy()
         if "n_outbreak_cases" in data.columns:
@@ -47,17 +30,7 @@ class TimepointSurveillanceAlgorithm:
                 'The column "n_outbreak_cases" is not present in input parameter `data`. '
                 '"n_cases" is treated as if it contains no outbreaks.'
             )
-
-        self._training_data = data
-        return self
-
-    def predict(self, data: pd.DataFrame) -> pd.DataFrame:
-        """Expects data with time series index and case counts."""
-        self._data_in_the_future(data)
-
-    def score(self, data_with_labels: pd.DataFrame):
-        prediction_result = self.predict(data_with_labels)
-        return ghozzi_score(prediction_result)
+        return data
 
     def _validate_data(self, data: pd.DataFrame):
         self._contains_dates(data)
@@ -72,8 +45,43 @@ class TimepointSurveillanceAlgorithm:
         if "n_cases" not in data.columns:
             raise ValueError('No column named "n_cases" in `data`')
 
+
+@dataclass
+class TimepointSurveillanceAlgorithm(DataValidationMixin):
+    """Algorithms that predict outbreaks for every timepoint."""
+
+    _history: History = field(init=False, repr=False)
+
+    # Whether the prediction for a time point depends on which other time points are predicted
+    # in the same call, e.g. because a statistic is accumulated over the detection range.
+    _detection_depends_on_range: ClassVar[bool] = False
+
+    def fit(self, data: pd.DataFrame) -> "TimepointSurveillanceAlgorithm":
+        """Expects data with time series index, case counts and outbreak labels."""
+        self._history = History.from_frame(self._prepare_training_data(data))
+        return self
+
+    @property
+    def _training_data(self) -> pd.DataFrame:
+        """The case counts the model was fitted on, with outbreak cases removed."""
+        return pd.DataFrame(
+            {"n_cases": self._history.counts.copy()},
+            index=self._history.index(self._history.dates.copy()),
+        )
+
+    def predict(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Expects data with time series index and case counts."""
+        self._data_in_the_future(data)
+
+    def score(self, data_with_labels: pd.DataFrame):
+        prediction_result = self.predict(data_with_labels)
+        return ghozzi_score(prediction_result)
+
     def _data_in_the_future(self, data: pd.DataFrame):
-        if data.index.min() <= self._training_data.index.max():
+        if (
+            len(self._history)
+            and data.index.min() <= self._history.index(self._history.dates[-1:])[0]
+        ):
             raise ValueError("The prediction data overlaps with the training data.")
 
 
@@ -93,16 +101,47 @@ offset_to_attr = {
 
 
 def _get_freq(data) -> int:
-    return offset_to_freq[type(data.index.freq)]
+    try:
+        return offset_to_freq[type(data.index.freq)]
+    except KeyError:
+        raise ValueError(
+            f"The time series index has no valid frequency. Index={data.index}"
+        ) from None
 
 
 def _get_start_epoch(data: pd.DataFrame) -> int:
     return getattr(data.index[0], offset_to_attr[type(data.index.freq)])
 
 
+def _get_epoch(data: pd.DataFrame) -> np.ndarray:
+    """Days since 1970-01-01 for every date in the index.
+
+    This is the representation of the ``epoch`` slot of an sts object with ``epochAsDate=TRUE``.
+    Converting the whole index at once lets us hand it to R as a single numeric vector.
+    """
+    return data.index.values.astype("datetime64[D]").astype(np.float64)
+
+
+_NOT_TIMED = contextlib.nullcontext()
+
+
+def _shared_index(frames: Sequence[pd.DataFrame]) -> pd.DatetimeIndex:
+    index = frames[0].index
+    if not all(frame.index.equals(index) for frame in frames[1:]):
+        raise ValueError("All series of a panel need to have the same index.")
+    return index
+
+
 class SurveillanceRPackageAlgorithm(TimepointSurveillanceAlgorithm):
     """Base class for the algorithm from the R package surveillance."""
 
+    # Whether the R algorithm can process sts objects with multiple columns.
+    _supports_multivariate: ClassVar[bool] = True
+    # Algorithms with a native implementation override this with a dataclass field.
+    engine: str = "r"
+    # Set by enable_timing.
+    _phase_stats: Optional[PhaseStats] = None
+
     def predict(self, data: pd.DataFrame) -> pd.DataFrame:
         """
         Predict outbreaks.
@@ -116,50 +155,208 @@ class SurveillanceRPackageAlgorithm(TimepointSurveillanceAlgorithm):
         -------
             Original dataframe with "alarm" column and other relevant columns as available (e.g. "upperbound") added.
         """
-        super().predict(data)
-        # Concat training and prediction data. Make index array for range param.
-        full_data = (
-            pd.concat((self._training_data, data), keys=["train", "test"], sort=True)
-            .reset_index(level=0)
-            .rename(columns={"level_0": "provenance"})
-        )
-        r_instance = self._prepare_r_instance(full_data)
-        # R indexes are 1-based. Therefore we add 1.
-        detection_range = robjects.IntVector(
-            np.where(full_data.provenance == "test")[0] + 1
-        )
-        surveillance_result = self._call_surveillance_algo(r_instance, detection_range)
-        data = data.assign(
-            alarm=self._extract_slot(surveillance_result, "alarm").astype(bool)
-        )
+        if self.engine == "native":
+            alarm, upperbound = self._predict_native(data)
+        elif self.engine == "r":
+            result = self.predict_result(data)
+            with self._timed("extract_slot"):
+                alarm = result.slot("alarm").astype(bool)
+                upperbound = None
+                if result.has_slot("upperbound"):
+                    upperbound = result.slot("upperbound").astype(float)
+        else:
+            raise ValueError(
+                f'Unknown engine "{self.engine}". Valid engines are "r" and "native".'
+            )
+        with self._timed("assign"):
+            data = data.assign(alarm=alarm)
+            if upperbound is not None:
+                data = data.assign(upperbound=upperbound)
+        return data
+
+    def predict_result(self, data: pd.DataFrame) -> SurveillanceResult:
+        """
+        Run the R algorithm on ``data`` and return its unconverted output.
+
+        Use this instead of ``predict`` to access additional output of the algorithm, e.g.
+        the expected number of cases.
+
+        Parameters
+        ----------
+        data
+            Dataframe with DateTimeIndex containing the columns "n_cases".
+        """
+        full_data, n_train = self._full_data(data)
+        with self._timed("prepare_r_instance"):
+            r_instance = self._prepare_r_instance(full_data)
+            # R indexes are 1-based. Therefore we add 1.
+            detection_range = r_session().robjects.IntVector(
+                np.arange(n_train, len(full_data)) + 1
+            )
+        with self._timed("call_surveillance_algo"):
+            return SurveillanceResult(
+                self._call_surveillance_algo(r_instance, detection_range)
+            )
+
+    def _full_data(self, data: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
+        """
+        The training data followed by ``data`` and the number of training time points.
 
-        # Let's check what other slots were returned
-        slot_keys = set()
-        if hasattr(surveillance_result, "slotnames"):
-            slot_keys = set(surveillance_result.slotnames())
-        elif hasattr(surveillance_result, "names"):
-            slot_keys = set(surveillance_result.names)
-
-        if "upperbound" in slot_keys:
-            data = data.assign(
-                upperbound=self._extract_slot(surveillance_result, "upperbound").astype(
-                    float
+        The frame is a read-only view of the scratch space of the history, which the next call
+        overwrites, so it must not be kept beyond the prediction.
+        """
+        with self._timed("validate"):
+            super().predict(data)
+        with self._timed("concat"):
+            # Write the prediction data after the training data. The detection range are the new slots.
+            n_train = len(self._history)
+            dates, counts = self._history.with_new(
+                data.index.values, data["n_cases"].values
+            )
+            dates.flags.writeable = False
+            counts.flags.writeable = False
+            index = self._history.index(dates)
+            if not self._history.follows(data.index):
+                # Without a known frequency that the new dates follow, infer it like R would.
+                index = pd.DatetimeIndex(
+                    pd.DatetimeIndex(index, freq=None), freq="infer"
                 )
+            full_data = pd.DataFrame({"n_cases": counts}, index=index, copy=False)
+        return full_data, n_train
+
+    def _predict_native(
+        self, data: pd.DataFrame
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        full_data, n_train = self._full_data(data)
+        with self._timed("call_surveillance_algo"):
+            return self._detect_native(full_data, n_train)
+
+    def _detect_native(
+        self, full_data: pd.DataFrame, n_train: int
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Alarms and upperbounds for the time points after ``n_train`` without R."""
+        raise NotImplementedError(f"{type(self).__name__} has no native engine.")
+
+    def enable_timing(self, stats: Optional[PhaseStats] = None) -> PhaseStats:
+        """
+        Record the wall time of the phases of every following ``predict`` call.
+
+        Parameters
+        ----------
+        stats
+            Record into these stats, e.g. to aggregate the timings of many models.
+            By default new stats are created.
+
+        Returns
+        -------
+            The stats the timings are recorded into.
+        """
+        self._phase_stats = PhaseStats() if stats is None else stats
+        return self._phase_stats
+
+    def disable_timing(self):
+        self._phase_stats = None
+
+    @property
+    def phase_stats(self) -> Optional[PhaseStats]:
+        """The stats that timings are recorded into or ``None``, if timing is disabled."""
+        return self._phase_stats
+
+    def _timed(self, phase: str):
+        if self._phase_stats is None:
+            return _NOT_TIMED
+        return self._phase_stats.measure(type(self).__name__, phase)
+
+    def fit_predict_panel(
+        self,
+        train: Mapping[Hashable, pd.DataFrame],
+        test: Mapping[Hashable, pd.DataFrame],
+    ) -> Dict[Hashable, pd.DataFrame]:
+        """
+        Fit and predict outbreaks on a panel of time series with a single call to the R algorithm.
+
+        All series are combined into one multivariate sts object. Compared to calling ``fit`` and
+        ``predict`` for each series, the conversion between Python and R and the construction of the
+        control list is only done once for the whole panel. The model's own training data is not changed.
+
+        Parameters
+        ----------
+        train
+            Training data for each series. All frames must share the same DateTimeIndex.
+        test
+            Data to predict on for each series, with the same keys as ``train``.
+            All frames must share the same DateTimeIndex.
+
+        Returns
+        -------
+            For each series the dataframe from ``test`` with "alarm" column and other relevant columns
+            as available (e.g. "upperbound") added.
+        """
+        if set(train) != set(test):
+            raise ValueError("`train` and `test` need to contain the same series.")
+        if self.engine == "native":
+            # The native engines are fast enough to process the series one by one.
+            return {
+                key: self._series_copy().fit(train[key]).predict(test[key])
+                for key in train
+            }
+        if not self._supports_multivariate:
+            raise NotImplementedError(
+                f"{type(self).__name__} does not support multivariate time series."
             )
+        keys = list(train)
+        train_data = [self._prepare_training_data(train[key]) for key in keys]
+        test_data = [test[key] for key in keys]
+        for data in test_data:
+            self._validate_data(data)
+        train_index = _shared_index(train_data)
+        test_index = _shared_index(test_data)
+        if test_index.min() <= train_index.max():
+            raise ValueError("The prediction data overlaps with the training data.")
 
-        return data
+        full_data = pd.DataFrame(index=train_index.append(test_index))
+        observed = np.column_stack(
+            [
+                np.concatenate(
+                    (train_frame["n_cases"].values, test_frame["n_cases"].values)
+                )
+                for train_frame, test_frame in zip(train_data, test_data)
+            ]
+        )
+        r_instance = self._prepare_sts(full_data, observed)
+        # R indexes are 1-based. Therefore we add 1.
+        detection_range = r_session().robjects.IntVector(
+            np.arange(len(train_index), len(full_data)) + 1
+        )
+        result = SurveillanceResult(
+            self._call_surveillance_algo(r_instance, detection_range)
+        )
+        alarm = result.slot("alarm").astype(bool)
+        upperbound = None
+        if result.has_slot("upperbound"):
+            upperbound = result.slot("upperbound").astype(float)
+
+        predictions = {}
+        for i, (key, data) in enumerate(zip(keys, test_data)):
+            data = data.assign(alarm=alarm[:, i])
+            if upperbound is not None:
+                data = data.assign(upperbound=upperbound[:, i])
+            predictions[key] = data
+        return predictions
+
+    def _series_copy(self) -> "SurveillanceRPackageAlgorithm":
+        """A copy with the same parameters and timing to fit on one series of a panel."""
+        model = replace(self)
+        model._phase_stats = self._phase_stats
+        return model
 
     def _None_to_NULL(self, obj):  # NOQA
-        return robjects.NULL if obj is None else obj
+        return r_session().robjects.NULL if obj is None else obj
 
     def _prepare_r_instance(self, data: pd.DataFrame):
         """Transform dataframe into R data structure on which the R algorithm can work."""
         raise NotImplementedError
 
-    def _extract_slot(self, surveillance_result, slot_name) -> np.ndarray:
-        """Extract the array for the requested slot name from the surveillance result R data structure."""
-        raise NotImplementedError
-
     def _call_surveillance_algo(self, sts, detection_range) -> pd.DataFrame:
         raise NotImplementedError
 
@@ -168,6 +365,20 @@ class STSBasedAlgorithm(SurveillanceRPackageAlgorithm):
     """Base class for algorithms that operate on the STS (SurveillanceTimeSeries) class."""
 
     def _prepare_r_instance(self, data: pd.DataFrame):
+        return self._prepare_sts(
+            data, data["n_cases"].values, n_history=len(self._history)
+        )
+
+    def _prepare_sts(
+        self, data: pd.DataFrame, observed: np.ndarray, n_history: int = 0
+    ):
+        """
+        Create an sts object with the dates of ``data`` and one column in ``observed`` per series.
+
+        The R vectors of the first ``n_history`` time points of a univariate series are cached by
+        their content, so that predicting repeatedly after the same training data only converts the
+        new time points.
+        """
         if data.index.freq is None:
             freq = pd.infer_freq(data.index)
             if freq is None:
@@ -176,32 +387,36 @@ class STSBasedAlgorithm(SurveillanceRPackageAlgorithm):
                 )
             data.index.freq = freq
 
-        sts = surveillance.sts(
-            start=r.c(data.index[0].year, _get_start_epoch(data)),
-            epoch=robjects.DateVector(
-                [
-                    r["as.numeric"](r["as.Date"](d.isoformat()))[0]
-                    for d in data.index.date
-                ]
-            ),
+        start = (data.index[0].year, _get_start_epoch(data))
+        epoch = _get_epoch(data)
+        if n_history > 0 and observed.ndim == 1:
+            history = _sts_cache.history_vectors(
+                epoch[:n_history], data.index[:n_history], observed[:n_history]
+            )
+            return _sts_cache.sts_with_history(
+                r_session().r.c(*start),
+                _get_freq(data),
+                history,
+                epoch[n_history:],
+                observed[n_history:],
+            )
+
+        session = r_session()
+        sts = session.surveillance.sts(
+            start=session.r.c(*start),
+            epoch=epoch,
             freq=_get_freq(data),
-            observed=data["n_cases"].values,
+            observed=observed,
             epochAsDate=True,
         )
         return sts
 
-    def _extract_slot(self, surveillance_result, slot_name):
-        return np.asarray(surveillance_result.slots[slot_name])
-
 
 class DisProgBasedAlgorithm(STSBasedAlgorithm):
     """Base class for algorithms that operate on the disProg (disease progress) class."""
 
+    _supports_multivariate = False
+
     def _prepare_r_instance(self, data: pd.DataFrame):
         sts = super()._prepare_r_instance(data)
-        return surveillance.sts2disProg(sts)
-
-    def _extract_slot(self, surveillance_result, slot_name):
-        return np.asarray(
-            dict(zip(surveillance_result.names, list(surveillance_result)))[slot_name]
-        )
+        return r_session().surveillance.sts2disProg(sts)
@@ -0,0 +1,114 @@
+"""Array-backed storage of the time series a model was fitted on."""
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.arrays import DatetimeArray
+from pandas.tseries.frequencies import to_offset
+
+# Minimal number of free slots after the history, so that predictions on a few new time points
+# do not reallocate.
+MIN_HEADROOM = 64
+GROWTH_FACTOR = 1.5
+
+
+class History:
+    """Dates and case counts in preallocated arrays.
+
+    The slots after the stored time points are used as scratch space for the data to predict on.
+    That way the full time series can be assembled without concatenating data frames, and the
+    memory use stays constant when a fitted model predicts again and again.
+    The dates are stored in UTC for time zone aware indexes. The frequency and the time zone of
+    the index are kept to restore it.
+    """
+
+    def __init__(
+        self,
+        dates: np.ndarray,
+        counts: np.ndarray,
+        freq: Optional[pd.DateOffset] = None,
+        tz=None,
+    ):
+        self.freq = freq
+        self.tz = tz
+        self._n = len(dates)
+        capacity = self._n + max(MIN_HEADROOM, self._n // 8)
+        self._dates = np.empty(capacity, dtype="datetime64[ns]")
+        self._counts = np.empty(capacity, dtype=counts.dtype)
+        self._dates[: self._n] = dates
+        self._counts[: self._n] = counts
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame) -> "History":
+        index = data.index
+        freq = index.freq
+        if freq is None and len(index) >= 3:
+            inferred = pd.infer_freq(index)
+            freq = None if inferred is None else to_offset(inferred)
+        return cls(index.values, data["n_cases"].values, freq, index.tz)
+
+    def __len__(self) -> int:
+        return self._n
+
+    @property
+    def capacity(self) -> int:
+        return len(self._dates)
+
+    @property
+    def dates(self) -> np.ndarray:
+        return self._dates[: self._n]
+
+    @property
+    def counts(self) -> np.ndarray:
+        return self._counts[: self._n]
+
+    def index(self, dates: np.ndarray) -> pd.DatetimeIndex:
+        """
+        Index of ``dates`` from the arrays of the history with its frequency and time zone.
+
+        The index is a view of ``dates``. The frequency is not checked against the dates, which
+        would take as long as inferring it, so it is up to the caller that the dates follow it.
+        """
+        dtype = dates.dtype if self.tz is None else pd.DatetimeTZDtype(tz=self.tz)
+        return pd.DatetimeIndex(
+            DatetimeArray._simple_new(dates, freq=self.freq, dtype=dtype)
+        )
+
+    def follows(self, index: pd.DatetimeIndex) -> bool:
+        """Whether ``index`` continues the history at its frequency without gaps."""
+        if self.freq is None or not self._n:
+            return False
+        start = self.index(self.dates[-1:])[0] + self.freq
+        expected = pd.date_range(start, periods=len(index), freq=self.freq)
+        return np.array_equal(expected.values, index.values)
+
+    def with_new(
+        self, dates: np.ndarray, counts: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Write new time points after the history without adding them to it.
+
+        Returns
+        -------
+            Views of the dates and counts of the history followed by the new time points.
+            They are only valid until the next call.
+        """
+        n_total = self._n + len(dates)
+        if n_total > self.capacity:
+            self._grow(n_total)
+        if not np.can_cast(counts.dtype, self._counts.dtype, casting="same_kind"):
+            self._counts = self._counts.astype(
+                np.result_type(self._counts, counts), copy=False
+            )
+        self._dates[self._n : n_total] = dates
+        self._counts[self._n : n_total] = counts
+        return self._dates[:n_total], self._counts[:n_total]
+
+    def _grow(self, min_capacity: int):
+        capacity = max(min_capacity, int(self.capacity * GROWTH_FACTOR))
+        dates = np.empty(capacity, dtype=self._dates.dtype)
+        counts = np.empty(capacity, dtype=self._counts.dtype)
+        dates[: self._n] = self.dates
+        counts[: self._n] = self.counts
+        self._dates = dates
+        self._counts = counts
@@ -0,0 +1,74 @@
+"""Access to the results of the algorithms from the R package surveillance."""
+from typing import Dict, FrozenSet, Optional, Tuple
+
+import numpy as np
+
+# The slots of an S4 class are fixed, so they only need to be queried once per class.
+_slot_names_by_class: Dict[Tuple[str, ...], FrozenSet[str]] = {}
+
+
+class SurveillanceResult:
+    """Read access to the output of an algorithm from the R package surveillance.
+
+    The algorithms either return an sts object or, for the disProg based algorithms, a list.
+    Only the requested slots are fetched by name and converted to numpy arrays.
+    Large parts of the result, like the control list or the input data, are never converted
+    unless they are requested.
+
+    Attributes
+    ----------
+    r_result
+        The unconverted R object.
+    """
+
+    def __init__(self, r_result):
+        self.r_result = r_result
+        self._is_s4 = hasattr(r_result, "slotnames")
+        self._names: Optional[FrozenSet[str]] = None
+
+    @property
+    def names(self) -> FrozenSet[str]:
+        """The names of the available slots."""
+        if self._names is None:
+            if self._is_s4:
+                rclass = tuple(self.r_result.rclass)
+                if rclass not in _slot_names_by_class:
+                    _slot_names_by_class[rclass] = frozenset(self.r_result.slotnames())
+                self._names = _slot_names_by_class[rclass]
+            else:
+                self._names = frozenset(self.r_result.names)
+        return self._names
+
+    def has_slot(self, name: str) -> bool:
+        return name in self.names
+
+    def slot(self, name: str) -> np.ndarray:
+        """Fetch and convert a single slot of the result."""
+        if not self.has_slot(name):
+            raise KeyError(f"The surveillance result has no slot {name!r}.")
+        return np.asarray(self._fetch(name))
+
+    def control(self, name: str):
+        """Fetch a single element of the control list, which some algorithms extend with extra output.
+
+        Returns ``None`` if the element does not exist.
+        """
+        control = self._fetch("control")
+        if name not in set(control.names):
+            return None
+        return control.rx2(name)
+
+    @property
+    def expected(self) -> Optional[np.ndarray]:
+        """Expected number of cases for the detection range, if the algorithm provides them.
+
+        The GLR algorithms with ``upperbound_statistic="value"`` instead provide the GLR statistic
+        in the "upperbound" slot.
+        """
+        expected = self.control("expected")
+        return None if expected is None else np.asarray(expected)
+
+    def _fetch(self, name: str):
+        if self._is_s4:
+            return self.r_result.slots[name]
+        return self.r_result.rx2(name)
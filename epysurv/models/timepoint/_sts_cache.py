@@ -0,0 +1,101 @@
+"""Cache for the R representation of training data.
+
+A fitted model is typically asked to predict again and again on a few new time points. The R
+vectors for the training part of the sts object are therefore created only once and the new time
+points are appended on the R side, instead of marshalling the whole history on every call.
+"""
+import functools
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Hashable, Tuple, TypeVar
+
+import numpy as np
+import pandas as pd
+
+from epysurv._rsession import r_session
+
+T = TypeVar("T")
+
+MAX_CACHED_HISTORIES = 16
+
+
+class LRUCache:
+    """Mapping with a maximum size, that discards the least recently used entry when full."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, object]" = OrderedDict()
+
+    def get_or_create(self, key: Hashable, create: Callable[[], T]) -> T:
+        """Return the entry for ``key`` and create it with ``create`` if it is missing."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]  # type: ignore
+        value = create()
+        self._entries[key] = value
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        self._entries.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+history_cache = LRUCache(maxsize=MAX_CACHED_HISTORIES)
+
+
+def fingerprint(index: pd.DatetimeIndex, observed: np.ndarray) -> str:
+    """Hash of the dates and counts of a time series."""
+    observed = np.ascontiguousarray(observed)
+    digest = hashlib.sha1(np.ascontiguousarray(index.asi8).tobytes())
+    digest.update(str(observed.dtype).encode())
+    digest.update(observed.tobytes())
+    return digest.hexdigest()
+
+
+def _to_r_vector(values: np.ndarray):
+    robjects = r_session().robjects
+    if np.issubdtype(values.dtype, np.integer):
+        return robjects.IntVector(values.tolist())
+    return robjects.FloatVector(values.tolist())
+
+
+def history_vectors(epoch: np.ndarray, index: pd.DatetimeIndex, observed: np.ndarray):
+    """R vectors of the epoch and the observed counts of a history, created only once per content."""
+    return history_cache.get_or_create(
+        fingerprint(index, observed),
+        lambda: (_to_r_vector(epoch), _to_r_vector(observed)),
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _sts_from_parts():
+    return r_session().r(
+        """
+        function(start, freq, epoch_history, epoch_new, observed_history, observed_new) {
+            surveillance::sts(
+                start = start,
+                epoch = c(epoch_history, epoch_new),
+                freq = freq,
+                observed = c(observed_history, observed_new),
+                epochAsDate = TRUE
+            )
+        }
+        """
+    )
+
+
+def sts_with_history(
+    start, freq: int, history: Tuple, epoch_new: np.ndarray, observed_new: np.ndarray
+):
+    """Create an sts object from the cached R vectors of a history and the new time points."""
+    epoch_history, observed_history = history
+    return _sts_from_parts()(
+        start, freq, epoch_history, epoch_new, observed_history, observed_new
+    )
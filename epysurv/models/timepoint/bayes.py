@@ -1,11 +1,8 @@
 from dataclasses import dataclass
 
-from rpy2.robjects import r
-from rpy2.robjects.packages import importr
+from epysurv._rsession import r_session
 
-from ._base import STSBasedAlgorithm
-
-surveillance = importr("surveillance")
+from ._base import STSBasedAlgorithm, _get_freq
 
 
 @dataclass
@@ -23,6 +20,8 @@ class Bayes(STSBasedAlgorithm):
         is a boolean to decide if the year of timePoint also contributes w reference values.
     alpha
         The parameter alpha is the (1 − α)-quantile to use in order to calculate the upper threshold. As default b, w, actY are set for the Bayes 1 system with alpha=0.05.
+    engine
+        "r" to call the R package surveillance or "native" to compute the alarms with numpy.
 
     References
     ----------
@@ -35,9 +34,11 @@ class Bayes(STSBasedAlgorithm):
     window_half_width: int = 6
     include_recent_year: bool = True
     alpha: float = 0.05
+    engine: str = "r"
 
     def _call_surveillance_algo(self, sts, detection_range):
-        control = r.list(
+        session = r_session()
+        control = session.r.list(
             range=detection_range,
             b=self.years_back,
             w=self.window_half_width,
@@ -45,5 +46,18 @@ class Bayes(STSBasedAlgorithm):
             alpha=self.alpha,
         )
 
-        surv = surveillance.bayes(sts, control=control)
+        surv = session.surveillance.bayes(sts, control=control)
         return surv
+
+    def _detect_native(self, full_data, n_train):
+        from .._native.bayes import bayes
+
+        return bayes(
+            full_data["n_cases"].values,
+            n_train,
+            years_back=self.years_back,
+            window_half_width=self.window_half_width,
+            include_recent_year=self.include_recent_year,
+            alpha=self.alpha,
+            freq=_get_freq(full_data),
+        )
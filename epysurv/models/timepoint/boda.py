@@ -1,13 +1,9 @@
 from dataclasses import dataclass
+from typing import Optional
 
-from rpy2 import robjects
-from rpy2.rinterface import RRuntimeError
-from rpy2.robjects import r
-from rpy2.robjects.packages import importr
+from epysurv._rsession import r_session
 
-from ._base import STSBasedAlgorithm
-
-surveillance = importr("surveillance")
+from ._base import STSBasedAlgorithm, _get_freq
 
 
 @dataclass
@@ -39,8 +35,19 @@ class Boda(STSBasedAlgorithm):
         and Höhle 2013); or by sampling mc_munu from the posterior distribution
         of the parameters and then compute the quantile of the mixture distribution
         using bisectioning, which is faster.
+    engine
+        "r" to call the R package surveillance, which needs the R package INLA, or "native" to
+        fit the model with numpy. The native engine replaces the integrated nested Laplace
+        approximation by a Laplace approximation of the latent field at the posterior mode of
+        the hyperparameters. It samples the mean and the size independently, so
+        ``sampling_method`` has no effect.
+    seed
+        Seed for the random number generation of the native engine.
     """
 
+    # surveillance only implements this algorithm for univariate sts objects.
+    _supports_multivariate = False
+
     trend: bool = False
     season: bool = False
     prior: str = "iid"
@@ -49,20 +56,25 @@ class Boda(STSBasedAlgorithm):
     mc_y: int = 10
     sampling_method = "joint"
     quantile_method: str = "MM"
+    engine: str = "r"
+    seed: Optional[int] = None
 
     def _call_surveillance_algo(self, sts, detection_range):
+        from rpy2.rinterface import RRuntimeError
+
+        session = r_session()
         try:
-            importr("INLA")
+            session.importr("INLA")
         except RRuntimeError:
             raise ImportError(
                 "For the Boda algortihm to run you need the INLA package (http://www.r-inla.org/). "
                 'Install it by running install.packages("INLA", repos = c(getOption("repos"), INLA = "https://inla.r-inla-download.org/R/stable"), dep = TRUE) '
                 "in the R console."
             )
-        control = r.list(
+        control = session.r.list(
             **{
                 "range": detection_range,
-                "X": robjects.NULL,
+                "X": session.robjects.NULL,
                 "trend": self.trend,
                 "season": self.season,
                 "prior": self.prior,
@@ -73,5 +85,22 @@ class Boda(STSBasedAlgorithm):
                 "quantileMethod": self.quantile_method,
             }
         )
-        surv = surveillance.boda(sts, control=control)
+        surv = session.surveillance.boda(sts, control=control)
         return surv
+
+    def _detect_native(self, full_data, n_train):
+        from .._native.boda import boda
+
+        return boda(
+            full_data["n_cases"].values,
+            n_train,
+            trend=self.trend,
+            season=self.season,
+            prior=self.prior,
+            alpha=self.alpha,
+            mc_munu=self.mc_munu,
+            mc_y=self.mc_y,
+            quantile_method=self.quantile_method,
+            period=_get_freq(full_data),
+            seed=self.seed,
+        )
@@ -1,11 +1,8 @@
 from dataclasses import dataclass
 
-from rpy2.robjects import r
-from rpy2.robjects.packages import importr
+from epysurv._rsession import r_session
 
-from ._base import DisProgBasedAlgorithm
-
-surveillance = importr("surveillance")
+from ._base import DisProgBasedAlgorithm, _get_freq
 
 
 @dataclass
@@ -20,6 +17,8 @@ class CDC(DisProgBasedAlgorithm):
         Number of weeks to include before and after the current week in each year.
     alpha
         An approximate (two-sided)(1 − α) prediction interval is calculated.
+    engine
+        "r" to call the R package surveillance or "native" to compute the alarms with numpy.
 
     References
     ----------
@@ -32,13 +31,27 @@ class CDC(DisProgBasedAlgorithm):
     years_back: int = 5
     window_half_width: int = 1
     alpha: float = 0.001
+    engine: str = "r"
 
     def _call_surveillance_algo(self, sts, detection_range):
-        control = r.list(
+        session = r_session()
+        control = session.r.list(
             range=detection_range,
             b=self.years_back,
             m=self.window_half_width,
             alpha=self.alpha,
         )
-        surv = surveillance.algo_cdc(sts, control=control)
+        surv = session.surveillance.algo_cdc(sts, control=control)
         return surv
+
+    def _detect_native(self, full_data, n_train):
+        from .._native.cdc import cdc
+
+        return cdc(
+            full_data["n_cases"].values,
+            n_train,
+            years_back=self.years_back,
+            window_half_width=self.window_half_width,
+            alpha=self.alpha,
+            freq=_get_freq(full_data),
+        )
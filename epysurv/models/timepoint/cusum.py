@@ -1,13 +1,9 @@
 from dataclasses import dataclass
 from typing import *  # NOQA
 
-from rpy2 import robjects
-from rpy2.robjects import r
-from rpy2.robjects.packages import importr
+from epysurv._rsession import r_session
 
-from ._base import STSBasedAlgorithm
-
-surveillance = importr("surveillance")
+from ._base import STSBasedAlgorithm, _get_freq
 
 
 @dataclass
@@ -36,6 +32,8 @@ class Cusum(STSBasedAlgorithm):
         - ``"none"`` no transformation
     negbin_alpha
         Parameter of the negative binomial distribution, such that the variance is :math:`m + α \cdot m2`.
+    engine
+        "r" to call the R package surveillance or "native" to compute the alarms with numpy.
 
     References
     ----------
@@ -44,22 +42,44 @@ class Cusum(STSBasedAlgorithm):
         American Statistical Association, 81, 977–986
     """
 
+    # The expected counts are estimated from the data before the detection range
+    # and the cumulative sum starts at its beginning.
+    _detection_depends_on_range = True
+
     reference_value: float = 1.04
     decision_boundary: float = 2.26
     expected_numbers_method: str = "mean"
     transform: str = "standard"
     negbin_alpha: float = 0.1
+    engine: str = "r"
 
     def _call_surveillance_algo(self, sts, detection_range):
-        control = r.list(
+        session = r_session()
+        control = session.r.list(
             range=detection_range,
             k=self.reference_value,
             h=self.decision_boundary,
-            m=robjects.NULL
+            m=session.robjects.NULL
             if self.expected_numbers_method == "mean"
             else self.expected_numbers_method,
             trans=self.transform,
             alpha=self.negbin_alpha,
         )
-        surv = surveillance.cusum(sts, control=control)
+        surv = session.surveillance.cusum(sts, control=control)
         return surv
+
+    def _detect_native(self, full_data, n_train):
+        from .._native.cusum import cusum
+
+        return cusum(
+            full_data["n_cases"].values,
+            n_train,
+            k=self.reference_value,
+            h=self.decision_boundary,
+            m=None
+            if self.expected_numbers_method == "mean"
+            else self.expected_numbers_method,
+            transform=self.transform,
+            alpha=self.negbin_alpha,
+            period=_get_freq(full_data),
+        )
@@ -1,13 +1,10 @@
 from dataclasses import dataclass
 from typing import ClassVar
 
-from rpy2.robjects import r
-from rpy2.robjects.packages import importr
+from epysurv._rsession import r_session
 
 from ._base import STSBasedAlgorithm
 
-surveillance = importr("surveillance")
-
 
 @dataclass
 class _EarsBase(STSBasedAlgorithm):
@@ -16,20 +13,34 @@ class _EarsBase(STSBasedAlgorithm):
     alpha: float = 0.001
     baseline: int = 7
     min_sigma: float = 0
+    engine: str = "r"
 
     method: ClassVar[str] = ""
 
     def _call_surveillance_algo(self, sts, detection_range):
-        control = r.list(
+        session = r_session()
+        control = session.r.list(
             range=detection_range,
             method=self.method,
             baseline=self.baseline,
             minSigma=self.min_sigma,
             alpha=self.alpha,
         )
-        surv = surveillance.earsC(sts, control=control)
+        surv = session.surveillance.earsC(sts, control=control)
         return surv
 
+    def _detect_native(self, full_data, n_train):
+        from .._native.ears import ears
+
+        return ears(
+            full_data["n_cases"].values,
+            n_train,
+            method=self.method,
+            alpha=self.alpha,
+            baseline=self.baseline,
+            min_sigma=self.min_sigma,
+        )
+
 
 class EarsC1(_EarsBase):
     """Computes a threshold for the number of counts based on values from the recent past.
@@ -47,6 +58,8 @@ class EarsC1(_EarsBase):
         How many time points to use for calculating the baseline.
     min_sigma
         If minSigma is higher than 0, the quantity zAlpha * minSigma is then the alerting threshold if the baseline is zero.
+    engine
+        "r" to call the R package surveillance or "native" to compute the alarms with numpy.
 
     References
     ----------
@@ -75,6 +88,8 @@ class EarsC2(_EarsBase):
         How many time points to use for calculating the baseline.
     min_sigma
         If minSigma is higher than 0, zAlpha * minSigma is then the alerting threshold if the baseline is zero.
+    engine
+        "r" to call the R package surveillance or "native" to compute the alarms with numpy.
 
     References
     ----------
@@ -96,13 +111,21 @@ class EarsC3(_EarsBase):
     prediction interval, then an alarm is raised. This method is especially useful for data without many
     historic values, since it only needs counts from the recent past.
 
+    With ``engine="native"`` the upperbound is the count above which the C3 statistic of the next
+    time point exceeds the threshold, or 0 if it does for every count. The alarm of a time point only depends on the two preceding
+    counts, so no count of the time point itself would change it. The upperbound therefore differs
+    from the one of ``engine="r"``.
+
     Attributes
     ----------
     alpha
         An approximate (two-sided)(1 − α) prediction interval is calculated.
     baseline
         How many time points to use for calculating the baseline.
-
+    engine
+        "r" to call the R package surveillance or "native" to compute the alarms with numpy.
+        Like surveillance, the native engine raises an alarm if the truncated C2 statistics of
+        the two preceding time points exceed the threshold, regardless of the current count.
 
     References
     ----------
@@ -115,13 +138,16 @@ class EarsC3(_EarsBase):
     alpha: float = 0.001
     baseline: int = 7
 
+    method = "C3"
+
     def _call_surveillance_algo(self, sts, detection_range):
-        control = r.list(
+        session = r_session()
+        control = session.r.list(
             range=detection_range,
             method="C3",
             baseline=self.baseline,
             minSigma=self.min_sigma,
             alpha=self.alpha,
         )
-        surv = surveillance.earsC(sts, control=control)
+        surv = session.surveillance.earsC(sts, control=control)
         return surv
@@ -2,12 +2,10 @@ from dataclasses import dataclass
 
 import numpy as np
 import pandas as pd
-from rpy2.robjects import r
-from rpy2.robjects.packages import importr
 
-from ._base import DisProgBasedAlgorithm, STSBasedAlgorithm
+from epysurv._rsession import r_session
 
-surveillance = importr("surveillance")
+from ._base import DisProgBasedAlgorithm, STSBasedAlgorithm, _get_freq
 
 
 @dataclass
@@ -43,6 +41,8 @@ class Farrington(DisProgBasedAlgorithm):
         - "2/3" for skewness correction (Default)
         - "1/2" for variance stabilizing transformation
         - "none" for no transformation.
+    engine
+        "r" to call the R package surveillance or "native" to compute the alarms with numpy.
 
     References
     ----------
@@ -58,22 +58,42 @@ class Farrington(DisProgBasedAlgorithm):
     past_period_cutoff: int = 4
     min_cases_in_past_periods: int = 5
     power_transform: str = "2/3"
+    engine: str = "r"
 
     def _call_surveillance_algo(self, disprog_obj, detection_range):
-        control = r.list(
+        session = r_session()
+        control = session.r.list(
             range=detection_range,
             b=self.years_back,
             w=self.window_half_width,
             reweight=self.reweight,
             alpha=self.alpha,
             trend=self.trend,
-            limit54=r.c(self.min_cases_in_past_periods, self.past_period_cutoff),
+            limit54=session.r.c(
+                self.min_cases_in_past_periods, self.past_period_cutoff
+            ),
             powertrans=self.power_transform,
         )
 
-        surv = surveillance.algo_farrington(disprog_obj, control=control)
+        surv = session.surveillance.algo_farrington(disprog_obj, control=control)
         return surv
 
+    def _detect_native(self, full_data, n_train):
+        from .._native.farrington import farrington
+
+        return farrington(
+            full_data["n_cases"].values,
+            n_train,
+            years_back=self.years_back,
+            window_half_width=self.window_half_width,
+            reweight=self.reweight,
+            alpha=self.alpha,
+            trend=self.trend,
+            limit54=(self.min_cases_in_past_periods, self.past_period_cutoff),
+            power_transform=self.power_transform,
+            freq=_get_freq(full_data),
+        )
+
 
 @dataclass
 class FarringtonFlexible(STSBasedAlgorithm):
@@ -123,7 +143,11 @@ class FarringtonFlexible(STSBasedAlgorithm):
         - "delta" for the method described in Farrington et al. (1996)
         - "Noufaily" for the method described in Noufaily et al. (2012)
         - "muan" for the method extended from Noufaily et al. (2012)
-
+    engine
+        "r" to call the R package surveillance or "native" to compute the alarms with numpy.
+        The native upperbound is the upper limit of the prediction interval also at time points
+        with fewer than ``min_cases_in_past_periods`` cases, where no alarm is raised. It does not
+        follow how surveillance reports the upperbound at these time points.
 
     References
     ----------
@@ -148,11 +172,13 @@ class FarringtonFlexible(STSBasedAlgorithm):
     power_transform: str = "2/3"
     past_weeks_not_included: int = 26
     threshold_method: str = "delta"
+    engine: str = "r"
 
     def _call_surveillance_algo(self, sts, detection_range):
-
-        self._check_enough_reference_data_available(detection_range, sts)
-        control = r.list(
+        dates = pd.to_datetime(np.asarray(sts.slots["epoch"]), unit="D")
+        self._check_enough_reference_data_available(dates, detection_range[0] - 1)
+        session = r_session()
+        control = session.r.list(
             range=detection_range,
             b=self.years_back,
             w=self.window_half_width,
@@ -160,24 +186,47 @@ class FarringtonFlexible(STSBasedAlgorithm):
             weightsThreshold=self.weights_threshold,
             alpha=self.alpha,
             trend=self.trend,
-            trend_threshold=self.trend_threshold,
-            limit54=r.c(self.min_cases_in_past_periods, self.past_period_cutoff),
+            pThresholdTrend=self.trend_threshold,
+            limit54=session.r.c(
+                self.min_cases_in_past_periods, self.past_period_cutoff
+            ),
             powertrans=self.power_transform,
             pastWeeksNotIncluded=self.past_weeks_not_included,
             thresholdMethod=self.threshold_method,
         )
 
-        surv = surveillance.farringtonFlexible(sts, control=control)
+        surv = session.surveillance.farringtonFlexible(sts, control=control)
         return surv
 
-    def _check_enough_reference_data_available(self, detection_range, sts):
-        dates = pd.to_datetime(np.asarray(sts.slots["epoch"]), unit="D")
-        py_detection_range = np.asarray(detection_range) - 1
-        prediction_dates = dates[py_detection_range]
+    def _detect_native(self, full_data, n_train):
+        from .._native.farrington_flexible import farrington_flexible
+
+        self._check_enough_reference_data_available(full_data.index, n_train)
+        return farrington_flexible(
+            full_data["n_cases"].values,
+            full_data.index,
+            n_train,
+            years_back=self.years_back,
+            window_half_width=self.window_half_width,
+            reweight=self.reweight,
+            weights_threshold=self.weights_threshold,
+            alpha=self.alpha,
+            trend=self.trend,
+            trend_threshold=self.trend_threshold,
+            limit54=(self.min_cases_in_past_periods, self.past_period_cutoff),
+            power_transform=self.power_transform,
+            past_weeks_not_included=self.past_weeks_not_included,
+            threshold_method=self.threshold_method,
+        )
+
+    def _check_enough_reference_data_available(
+        self, dates: pd.DatetimeIndex, n_train: int
+    ):
+        prediction_dates = dates[n_train:]
         required_reference_data = (
             prediction_dates - (np.timedelta64(1, "Y") * self.years_back)
         ).floor("D")
-        available_reference_data = dates[: (py_detection_range)[0]]
+        available_reference_data = dates[:n_train]
         if not available_reference_data.min() < required_reference_data.min():
             raise ValueError(
                 f"You are trying to use reference data from {self.years_back} years back for predictions "
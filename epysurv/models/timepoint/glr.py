@@ -4,15 +4,11 @@ Method as proposed by Höhle and Paul (2008).
 The implementation is described in Salmon et al. (2016).
 """
 from dataclasses import dataclass
-from typing import Tuple, Union
+from typing import Optional, Tuple, Union
 
-from rpy2 import robjects
-from rpy2.robjects import r
-from rpy2.robjects.packages import importr
+from epysurv._rsession import r_session
 
-from ._base import STSBasedAlgorithm
-
-surveillance = importr("surveillance")
+from ._base import STSBasedAlgorithm, _get_freq
 
 
 @dataclass
@@ -20,6 +16,13 @@ class GLRNegativeBinomial(STSBasedAlgorithm):
     """
     Generalized likelihood ratio algorithm using negative binomial distribution.
 
+    With ``engine="native"`` only the chart for an increase of the intercept of Poisson counts
+    (``alpha=0``) keeps running sums, so that a time point takes time proportional to the window.
+    For ``change="epi"`` or negative binomial counts the parameter of every candidate change point
+    in the window is estimated iteratively, so a time point takes time quadratic in the window and
+    a series of n time points O(n · m²). With ``m=-1`` the window grows until the next alarm, so
+    long daily series without alarms are slow. A finite ``m`` bounds the cost.
+
     Attributes
     ----------
     m0
@@ -52,7 +55,9 @@ class GLRNegativeBinomial(STSBasedAlgorithm):
         Threshold in the GLR test, i.e. cγ.
     m
         Number of time instances back in time in the window-limited approach, i.e. the last value considered is max(1, n − m).
-        To always look back until the first observation use -1.
+        To always look back until the first observation use -1. Except for an increase of
+        the intercept of Poisson counts, the native engine takes time quadratic in the window
+        per time point, so -1 is slow for long series without alarms.
     change
         A string specifying the type of the alternative. The two choices are "intercept" and "epi".
     theta
@@ -70,6 +75,8 @@ class GLRNegativeBinomial(STSBasedAlgorithm):
     x_max
         Maximum value to try for x to see if this is the upperbound number of cases before sounding an alarm (Default: 1e4).
         This only applies only when ``upperbound_statistic == "cases"``.
+    engine
+        "r" to call the R package surveillance or "native" to compute the alarms with numpy.
 
     References
     ----------
@@ -80,49 +87,85 @@ class GLRNegativeBinomial(STSBasedAlgorithm):
         doi: 10.18637/jss.v070.i10
     """
 
-    m0: float = robjects.NULL
-    alpha: float = 0
+    # The statistic is accumulated over the detection range.
+    _detection_depends_on_range = True
+
+    m0: Optional[float] = None
+    alpha: Optional[float] = 0
     glr_test_threshold: int = 5
     m: int = -1
     change: str = "intercept"
-    theta: float = robjects.NULL
+    theta: Optional[float] = None
     direction: Union[Tuple[str, str], Tuple[str]] = ("inc", "dec")
     upperbound_statistic: str = "cases"
     x_max: float = 1e4
+    engine: str = "r"
 
     def _call_surveillance_algo(self, sts, detection_range):
-        control = r.list(
+        session = r_session()
+        mu0 = None
+        if self.m0 is not None:
+            # R expects one in-control mean per time point of the range.
+            mu0 = session.r.rep(self.m0, len(detection_range))
+        control = session.r.list(
             **{
                 "range": detection_range,
                 "c.ARL": self.glr_test_threshold,
-                "m0": self.m0,
-                "alpha": self.alpha,
+                "mu0": self._None_to_NULL(mu0),
+                "alpha": self._None_to_NULL(self.alpha),
                 # Mtilde is set to 1, since that is the only valid value for "epi" and "intercept"
                 "Mtilde": 1,
                 "M": self.m,
                 "change": self.change,
-                "theta": self.theta,
-                "dir": r.c(*self.direction),
+                "theta": self._None_to_NULL(self.theta),
+                "dir": session.r.c(*self.direction),
                 "ret": self.upperbound_statistic,
                 "xMax": self.x_max,
             }
         )
 
-        surv = surveillance.glrnb(sts, control=control)
+        surv = session.surveillance.glrnb(sts, control=control)
         return surv
 
+    def _detect_native(self, full_data, n_train):
+        from .._native.glr import glr_negative_binomial
+
+        return glr_negative_binomial(
+            full_data["n_cases"].values,
+            n_train,
+            threshold=self.glr_test_threshold,
+            m=self.m,
+            change=self.change,
+            direction=self.direction,
+            upperbound_statistic=self.upperbound_statistic,
+            period=_get_freq(full_data),
+            alpha=self.alpha,
+            m0=self.m0,
+            theta=self.theta,
+            x_max=self.x_max,
+        )
+
 
 @dataclass
 class GLRPoisson(STSBasedAlgorithm):
     """Generalized likelihood ratio algorithm using Poisson distribution.
 
+    With ``engine="native"`` the chart for ``change="intercept"`` keeps running sums, so that a
+    time point takes time proportional to the window. For ``change="epi"`` the parameter of every
+    candidate change point in the window is estimated iteratively, so a time point takes time
+    quadratic in the window and a series of n time points O(n · m²). With ``m=-1`` the window
+    grows until the next alarm, so long daily series without alarms are slow. A finite ``m``
+    bounds the cost.
+
     Attributes
     ----------
     glr_test_threshold
         Threshold in the GLR test, i.e. cγ.
     m
         Number of time instances back in time in the window-limited approach, i.e. the last value considered is max(1, n − m).
-        To always look back until the first observation use -1.
+        To always look back until the first observation use -1. Except for an increase of
+        the intercept of Poisson counts, the native engine takes time quadratic in the window
+        per time point, so -1 is slow for long series without alarms.
     change
         A string specifying the type of the alternative. The two choices are "intercept" and "epi".
     direction
@@ -134,6 +177,8 @@ class GLRPoisson(STSBasedAlgorithm):
         a string specifying the type of upperbound-statistic that is returned.
         With "cases" the number of cases that would have been necessary
         to produce an alarm or with "value" the GLR-statistic is computed.
+    engine
+        "r" to call the R package surveillance or "native" to compute the alarms with numpy.
 
     References
     ----------
@@ -144,6 +189,9 @@ class GLRPoisson(STSBasedAlgorithm):
         doi: 10.18637/jss.v070.i10
     """
 
+    # The statistic is accumulated over the detection range.
+    _detection_depends_on_range = True
+
     glr_test_threshold: int = 5
     """threshold in the GLR test, i.e. cγ."""
     m: int = -1
@@ -154,23 +202,39 @@ class GLRPoisson(STSBasedAlgorithm):
     """Specifying the direction of testing in GLR scheme. With "inc" only increases in x are considered in the GLR-statistic, with "dec" decreases are regarded."""
     upperbound_statistic: str = "cases"
     """a string specifying the type of upperbound-statistic that is returned. With "cases" the number of cases that would have been necessary to produce an alarm or with "value" the GLR-statistic is computed (see below)"""
+    engine: str = "r"
 
     def _call_surveillance_algo(self, sts, detection_range):
-        control = r.list(
+        session = r_session()
+        control = session.r.list(
             **{
                 "range": detection_range,
                 "c.ARL": self.glr_test_threshold,
-                "m0": robjects.NULL,
+                "m0": session.robjects.NULL,
                 # Mtilde is set to 1, since that is the only valid value for "epi" and "intercept"
                 "Mtilde": 1,
                 "M": self.m,
                 "change": self.change,
                 # Role of theta: If NULL then the GLR scheme is used. If not NULL the prespecified value for κ or λ is used in a recursive LR scheme, which is faster."""
-                "theta": robjects.NULL,
-                "dir": r.c(*self.direction),
+                "theta": session.robjects.NULL,
+                "dir": session.r.c(*self.direction),
                 "ret": self.upperbound_statistic,
             }
         )
 
-        surv = surveillance.glrpois(sts, control=control)
+        surv = session.surveillance.glrpois(sts, control=control)
         return surv
+
+    def _detect_native(self, full_data, n_train):
+        from .._native.glr import glr_poisson
+
+        return glr_poisson(
+            full_data["n_cases"].values,
+            n_train,
+            threshold=self.glr_test_threshold,
+            m=self.m,
+            change=self.change,
+            direction=self.direction,
+            upperbound_statistic=self.upperbound_statistic,
+            period=_get_freq(full_data),
+        )
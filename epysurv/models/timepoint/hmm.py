@@ -1,11 +1,8 @@
 from dataclasses import dataclass
 
-from rpy2.robjects import r
-from rpy2.robjects.packages import importr
+from epysurv._rsession import r_session
 
-from ._base import DisProgBasedAlgorithm
-
-surveillance = importr("surveillance")
+from ._base import DisProgBasedAlgorithm, _get_freq
 
 
 @dataclass
@@ -30,6 +27,11 @@ class HMM(DisProgBasedAlgorithm):
         Number of harmonic waves to include in the linear predictor.
     equal_covariate_effects
         If set then all covariate effects parameters are equal for the states.
+    engine
+        "r" to call the R package surveillance or "native" to compute the alarms with numpy.
+        The native engine fits a discrete-time HMM by the EM algorithm instead of the
+        continuous-time model of the R package msm, so the alarms can differ. Each fit starts
+        from the parameters of the previous time point, which makes it much faster.
 
     References
     ----------
@@ -43,9 +45,11 @@ class HMM(DisProgBasedAlgorithm):
     trend: bool = True
     n_harmonics: int = 1
     equal_covariate_effects: bool = False
+    engine: str = "r"
 
     def _call_surveillance_algo(self, disprog_obj, detection_range):
-        control = r.list(
+        session = r_session()
+        control = session.r.list(
             range=detection_range,
             Mtilde=self.n_observations,
             noStates=self.n_hidden_states,
@@ -53,5 +57,19 @@ class HMM(DisProgBasedAlgorithm):
             noHarmonics=self.n_harmonics,
             covEffectEqual=self.equal_covariate_effects,
         )
-        surv = surveillance.algo_hmm(disprog_obj, control=control)
+        surv = session.surveillance.algo_hmm(disprog_obj, control=control)
         return surv
+
+    def _detect_native(self, full_data, n_train):
+        from .._native.hmm import hmm
+
+        return hmm(
+            full_data["n_cases"].values,
+            n_train,
+            n_observations=self.n_observations,
+            n_states=self.n_hidden_states,
+            trend=self.trend,
+            n_harmonics=self.n_harmonics,
+            equal_effects=self.equal_covariate_effects,
+            period=_get_freq(full_data),
+        )
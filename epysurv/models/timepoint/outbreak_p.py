@@ -1,12 +1,9 @@
 from dataclasses import dataclass
 
-from rpy2.robjects import r
-from rpy2.robjects.packages import importr
+from epysurv._rsession import r_session
 
 from ._base import STSBasedAlgorithm
 
-surveillance = importr("surveillance")
-
 
 @dataclass
 class OutbreakP(STSBasedAlgorithm):
@@ -22,6 +19,8 @@ class OutbreakP(STSBasedAlgorithm):
         an alarm (NNBA) or with "value" the outbreakP-statistic is computed.
     max_upperbound_cases
         Upperbound when numerically searching for NNBA. Default is 1e5.
+    engine
+        "r" to call the R package surveillance or "native" to compute the alarms with numpy.
 
     References
     ----------
@@ -29,16 +28,32 @@ class OutbreakP(STSBasedAlgorithm):
     .. [2] Frisén, M. and Andersson, E., (2009) Semiparametric Surveillance of Monotonic Changes, Sequential Analysis 28(4):434-454.
     """
 
+    # surveillance only implements this algorithm for univariate sts objects.
+    _supports_multivariate = False
+
     threshold: int = 100
     upperbound_statistic: str = "cases"
     max_upperbound_cases: int = 100_000
+    engine: str = "r"
 
     def _call_surveillance_algo(self, sts, detection_range):
-        control = r.list(
+        session = r_session()
+        control = session.r.list(
             range=detection_range,
             k=self.threshold,
             ret=self.upperbound_statistic,
             maxUpperboundCases=self.max_upperbound_cases,
         )
-        surv = surveillance.outbreakP(sts, control=control)
+        surv = session.surveillance.outbreakP(sts, control=control)
         return surv
+
+    def _detect_native(self, full_data, n_train):
+        from .._native.outbreak_p import outbreak_p
+
+        return outbreak_p(
+            full_data["n_cases"].values,
+            n_train,
+            threshold=self.threshold,
+            upperbound_statistic=self.upperbound_statistic,
+            max_upperbound_cases=self.max_upperbound_cases,
+        )
@@ -0,0 +1,288 @@
+"""Run timepoint algorithms for many time series in parallel.
+
+R only offers a single interpreter per process, so all algorithms from the surveillance package
+run on one core. :class:`SurveillancePool` works around this by distributing the work over a pool
+of worker processes, each with its own embedded R interpreter. :class:`IsolatedWorker` runs jobs
+in a separate process with a time budget, so that a slow algorithm cannot stall the caller.
+"""
+import multiprocessing
+import time
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional, Tuple
+
+import pandas as pd
+
+from epysurv._rsession import r_session
+
+from ._base import TimepointSurveillanceAlgorithm
+
+Job = Tuple[TimepointSurveillanceAlgorithm, pd.DataFrame, pd.DataFrame]
+
+PREDICTION_COLUMNS = ("alarm", "upperbound")
+# Seconds an IsolatedWorker waits for R to start in a new worker process.
+START_TIMEOUT = 120
+
+
+def _init_worker():
+    """Boot R and load surveillance once, when the worker process starts."""
+    r_session()
+
+
+def _predict_job(job: Job) -> pd.DataFrame:
+    model, train, test = job
+    prediction = model.fit(train).predict(test)
+    return prediction[[c for c in PREDICTION_COLUMNS if c in prediction.columns]]
+
+
+def _isolated_worker(connection):
+    _init_worker()
+    connection.send("ready")
+    while True:
+        job = connection.recv()
+        if job is None:
+            break
+        try:
+            connection.send(("ok", _predict_job(job)))
+        except Exception as e:
+            connection.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class SurveillancePool:
+    """Pool of warm worker processes to predict on many time series.
+
+    Each worker loads rpy2 and the surveillance package once and then processes jobs until it
+    is recycled.
+
+    Parameters
+    ----------
+    processes
+        Number of worker processes. Defaults to the number of CPUs.
+    max_tasks_per_worker
+        Number of jobs a worker processes before it is replaced by a fresh one.
+        This bounds memory growth of long running R sessions. ``None`` means workers live as long as the pool.
+    start_method
+        Multiprocessing start method. The default "spawn" is the only safe choice
+        if R has already been started in the parent process.
+
+    Examples
+    --------
+    >>> with SurveillancePool(processes=8) as pool:
+    ...     predictions = list(pool.predict((FarringtonFlexible(), train, test) for train, test in series))
+    """
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        max_tasks_per_worker: Optional[int] = None,
+        start_method: str = "spawn",
+    ):
+        context = multiprocessing.get_context(start_method)
+        self._pool = context.Pool(
+            processes=processes,
+            initializer=_init_worker,
+            maxtasksperchild=max_tasks_per_worker,
+        )
+
+    def predict(
+        self, jobs: Iterable[Job], chunksize: int = 1
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Fit and predict every job in the pool.
+
+        Parameters
+        ----------
+        jobs
+            Tuples of (model, training data, prediction data). The model is fitted on the
+            training data in the worker, so the parent's instance is not modified.
+        chunksize
+            Number of jobs sent to a worker at once. Values larger than 1 reduce the
+            communication overhead for many short series.
+
+        Returns
+        -------
+            For every job, in the order of ``jobs``, a dataframe with the "alarm" column and the
+            "upperbound" column if the algorithm provides one.
+        """
+        return self._pool.imap(_predict_job, jobs, chunksize=chunksize)
+
+    def close(self):
+        """Let the workers finish their pending jobs and exit."""
+        self._pool.close()
+        self._pool.join()
+
+    def terminate(self):
+        """Stop the workers immediately."""
+        self._pool.terminate()
+        self._pool.join()
+
+    def __enter__(self) -> "SurveillancePool":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
+
+
+class _WorkerFailure(Exception):
+    """The worker process of an :class:`IsolatedWorker` failed to start."""
+
+
+@dataclass
+class JobResult:
+    """Outcome of a job in an :class:`IsolatedWorker`.
+
+    Attributes
+    ----------
+    status
+        "ok" if the prediction finished, "timeout" if it was cancelled because it exceeded the time
+        budget and "error" if the algorithm raised an exception or the worker process failed to
+        start or exited unexpectedly.
+    prediction
+        The prediction with the "alarm" and, if available, the "upperbound" column. ``None`` unless
+        ``status == "ok"``.
+    seconds
+        Wall time of the job.
+    error
+        Description of the exception, if ``status == "error"``.
+    """
+
+    status: str
+    prediction: Optional[pd.DataFrame] = None
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+
+class IsolatedWorker:
+    """Worker process to predict with a wall-clock budget per job.
+
+    Some algorithms, e.g. HMM with ``n_observations=-1`` or Boda, can run for minutes on a single
+    series. Because R cannot be interrupted from Python, a job that exceeds its budget is cancelled
+    by terminating the worker process. A fresh worker is started for the next job.
+
+    Parameters
+    ----------
+    timeout
+        Wall-clock budget per job in seconds. The start of R in a new worker is not included.
+    start_method
+        Multiprocessing start method. The default "spawn" is the only safe choice
+        if R has already been started in the parent process.
+    start_timeout
+        Wall-clock budget in seconds for starting R in a new worker. If it is exceeded, the job
+        fails with status "error".
+
+    Examples
+    --------
+    >>> with IsolatedWorker(timeout=60) as worker:
+    ...     for result in worker.predict((HMM(), train, test) for train, test in series):
+    ...         if result.ok:
+    ...             ...
+    """
+
+    _target = staticmethod(_isolated_worker)
+
+    def __init__(
+        self,
+        timeout: float,
+        start_method: str = "spawn",
+        start_timeout: float = START_TIMEOUT,
+    ):
+        self.timeout = timeout
+        self.start_timeout = start_timeout
+        self._context = multiprocessing.get_context(start_method)
+        self._process = None
+        self._connection = None
+
+    def predict(self, jobs: Iterable[Job]) -> Iterator[JobResult]:
+        """
+        Fit and predict every job in the worker, one after the other.
+
+        Parameters
+        ----------
+        jobs
+            Tuples of (model, training data, prediction data).
+
+        Returns
+        -------
+            For every job, in the order of ``jobs``, the :class:`JobResult`.
+        """
+        for job in jobs:
+            yield self.run(job)
+
+    def run(self, job: Job) -> JobResult:
+        """Fit and predict a single job within the time budget."""
+        start = time.perf_counter()
+        try:
+            if self._process is None:
+                self._start()
+                start = time.perf_counter()
+            self._connection.send(job)
+            if not self._connection.poll(self.timeout):
+                self.terminate()
+                return JobResult(status="timeout", seconds=time.perf_counter() - start)
+            status, payload = self._connection.recv()
+        except _WorkerFailure as e:
+            return self._failed(start, str(e))
+        except (BrokenPipeError, ConnectionResetError, EOFError):
+            # The worker died, e.g. because R crashed.
+            return self._failed(start, "The worker process exited unexpectedly.")
+        seconds = time.perf_counter() - start
+        if status == "ok":
+            return JobResult(status=status, prediction=payload, seconds=seconds)
+        return JobResult(status=status, seconds=seconds, error=payload)
+
+    def _failed(self, start: float, error: str) -> JobResult:
+        self.terminate()
+        return JobResult(
+            status="error", seconds=time.perf_counter() - start, error=error
+        )
+
+    def _start(self):
+        self._connection, child_connection = self._context.Pipe()
+        self._process = self._context.Process(
+            target=self._target, args=(child_connection,), daemon=True
+        )
+        self._process.start()
+        child_connection.close()
+        # Wait until R is started, so that its start does not count against the budget.
+        if not self._connection.poll(self.start_timeout):
+            raise _WorkerFailure(
+                f"The worker process did not start within {self.start_timeout} seconds."
+            )
+        try:
+            self._connection.recv()
+        except EOFError:
+            raise _WorkerFailure("The worker process exited while starting.") from None
+
+    def close(self):
+        """Let the worker exit after its current job."""
+        if self._process is not None:
+            try:
+                self._connection.send(None)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            self._process.join()
+            self._connection.close()
+            self._process = None
+
+    def terminate(self):
+        """Stop the worker immediately."""
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._connection.close()
+            self._process = None
+
+    def __enter__(self) -> "IsolatedWorker":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
@@ -1,11 +1,8 @@
 from dataclasses import dataclass
 
-from rpy2.robjects import r
-from rpy2.robjects.packages import importr
+from epysurv._rsession import r_session
 
-from ._base import STSBasedAlgorithm
-
-surveillance = importr("surveillance")
+from ._base import STSBasedAlgorithm, _get_freq
 
 
 @dataclass
@@ -20,19 +17,35 @@ class RKI(STSBasedAlgorithm):
         Number of weeks to include before and after the current week in each year.
     include_recent_year
         Is a boolean to decide if the year of timePoint also contributes w reference values.
+    engine
+        "r" to call the R package surveillance or "native" to compute the alarms with numpy.
     """
 
     years_back: int = 0
     window_half_width: int = 6
     include_recent_year: bool = True
+    engine: str = "r"
 
     def _call_surveillance_algo(self, sts, detection_range):
-        control = r.list(
+        session = r_session()
+        control = session.r.list(
             range=detection_range,
             b=self.years_back,
             w=self.window_half_width,
             actY=self.include_recent_year,
         )
 
-        surv = surveillance.rki(sts, control=control)
+        surv = session.surveillance.rki(sts, control=control)
         return surv
+
+    def _detect_native(self, full_data, n_train):
+        from .._native.rki import rki
+
+        return rki(
+            full_data["n_cases"].values,
+            n_train,
+            years_back=self.years_back,
+            window_half_width=self.window_half_width,
+            include_recent_year=self.include_recent_year,
+            freq=_get_freq(full_data),
+        )
@@ -0,0 +1,95 @@
+"""Timing of the phases of a prediction with an algorithm from the R package surveillance.
+
+Timing is opt-in per model with
+:meth:`~epysurv.models.timepoint._base.SurveillanceRPackageAlgorithm.enable_timing`.
+A single :class:`PhaseStats` can be shared by many models to aggregate the costs over many series.
+"""
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+
+PHASES = (
+    "validate",
+    "concat",
+    "prepare_r_instance",
+    "call_surveillance_algo",
+    "extract_slot",
+    "assign",
+)
+
+
+@dataclass
+class PhaseTiming:
+    """Number of calls and accumulated wall time in seconds of a phase."""
+
+    calls: int = 0
+    seconds: float = 0.0
+
+
+class PhaseStats:
+    """Wall time and call counts per phase of ``predict``.
+
+    The phases are
+
+    - validate: checks of the input data
+    - concat: assembling training and prediction data to one time series
+    - prepare_r_instance: conversion of the time series to R
+    - call_surveillance_algo: the R algorithm itself
+    - extract_slot: conversion of the results from R
+    - assign: adding the results to the prediction data
+
+    Parameters
+    ----------
+    callback
+        Called with the name of the algorithm, the phase and its wall time in seconds after
+        every phase, e.g. to forward the timings to a metrics system.
+
+    Examples
+    --------
+    >>> stats = PhaseStats()
+    >>> for train, test in series:
+    ...     model = FarringtonFlexible()
+    ...     model.enable_timing(stats)
+    ...     model.fit(train).predict(test)
+    >>> stats.to_frame()
+    """
+
+    def __init__(self, callback: Optional[Callable[[str, str, float], None]] = None):
+        self.callback = callback
+        self.phases: Dict[str, PhaseTiming] = {phase: PhaseTiming() for phase in PHASES}
+
+    @contextmanager
+    def measure(self, algorithm: str, phase: str):
+        """Time the enclosed block as ``phase`` of ``algorithm``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(algorithm, phase, time.perf_counter() - start)
+
+    def record(self, algorithm: str, phase: str, seconds: float):
+        timing = self.phases.setdefault(phase, PhaseTiming())
+        timing.calls += 1
+        timing.seconds += seconds
+        if self.callback is not None:
+            self.callback(algorithm, phase, seconds)
+
+    def reset(self):
+        self.phases = {phase: PhaseTiming() for phase in PHASES}
+
+    def to_frame(self) -> pd.DataFrame:
+        """Calls, total and mean wall time in seconds per phase."""
+        frame = pd.DataFrame(
+            {
+                "calls": [timing.calls for timing in self.phases.values()],
+                "seconds": [timing.seconds for timing in self.phases.values()],
+            },
+            index=pd.Index(list(self.phases), name="phase"),
+        )
+        frame["mean_seconds"] = frame["seconds"] / frame["calls"].where(
+            frame["calls"] > 0
+        )
+        return frame
@@ -1,4 +1,5 @@
 # type: ignore
+import numpy as np
 import pandas as pd
 
 
@@ -8,29 +9,66 @@ class NonLearningTimeseriesClassificationMixin:
         pass
 
     def predict(self, data_generator) -> pd.DataFrame:
+        """Predict the last time point of every time series in ``data_generator``.
+
+        Consecutive time series that only differ by an appended time point are predicted with a
+        single call to the underlying algorithm, if its predictions do not depend on the detection range.
+        As soon as earlier values are revised, a new call is started.
+        """
+        predictions = []
+        segment = None
+        n_points = 0
+        for x, _ in data_generator:
+            if segment is not None and self._appends_single_point(segment, x):
+                n_points += 1
+            else:
+                if segment is not None:
+                    predictions.append(self._predict_segment(segment, n_points))
+                n_points = 1
+            # Generators may grow the same frame in place, so we need a copy.
+            segment = x.copy()
+        if segment is not None:
+            predictions.append(self._predict_segment(segment, n_points))
+
         alarms = []
         upperbounds = []
         times = []
-        for x, _ in data_generator:
-            # Fit on all data, except the last point, that is to be predicted.
-            super().fit(x.iloc[:-1])
-            prediction = super().predict(
-                x.iloc[[-1]]
-            )  # Use inner brackets to get dytpe preserving frame and not series.
-            # As only a single value should be returned, we can access this single item.
-            [alarm] = prediction.alarm
-            [time] = prediction.index
-
+        for prediction in predictions:
+            alarms.extend(prediction.alarm)
+            times.extend(prediction.index)
             # Check if "upperbound" is available and add if available
             if hasattr(prediction, "upperbound"):
-                [upperbound] = prediction.upperbound
-                upperbounds.append(upperbound)
-
-            alarms.append(alarm)
-            times.append(time)
+                upperbounds.extend(prediction.upperbound)
 
         frame_dict = {"alarm": alarms}
         if len(upperbounds) > 0:
             frame_dict["upperbound"] = upperbounds
 
         return pd.DataFrame(frame_dict, index=pd.DatetimeIndex(times, freq="infer"))
+
+    def _predict_segment(self, x: pd.DataFrame, n_points: int) -> pd.DataFrame:
+        # Fit on all data, except the last points, that are to be predicted.
+        super().fit(x.iloc[:-n_points])
+        return super().predict(x.iloc[-n_points:])
+
+    def _appends_single_point(self, previous: pd.DataFrame, x: pd.DataFrame) -> bool:
+        """Whether ``x`` can be predicted in the same call as ``previous``.
+
+        This is the case if ``x`` equals ``previous`` plus one additional time point. Additionally, the
+        last point of ``previous`` must not contain outbreak cases, because they would be removed
+        from it once it becomes training data.
+        """
+        if self._detection_depends_on_range:
+            return False
+        if len(x) != len(previous) + 1 or not x.index[:-1].equals(previous.index):
+            return False
+        columns = [c for c in ("n_cases", "n_outbreak_cases") if c in x.columns]
+        if columns != [
+            c for c in ("n_cases", "n_outbreak_cases") if c in previous.columns
+        ]:
+            return False
+        if "n_outbreak_cases" in columns and previous["n_outbreak_cases"].iloc[-1] != 0:
+            return False
+        return all(
+            np.array_equal(x[c].values[:-1], previous[c].values) for c in columns
+        )
@@ -2,15 +2,11 @@ from dataclasses import dataclass
 from typing import Optional, Sequence
 
 import pandas as pd
-import rpy2.robjects.packages as rpackages
-from rpy2 import robjects
 
+from epysurv._rsession import r_session
 from epysurv.simulation.base import BaseSimulation
 from epysurv.simulation.utils import add_date_time_index_to_frame, r_list_to_frame
 
-surveillance = rpackages.importr("surveillance")
-base = rpackages.importr("base")
-
 
 @dataclass
 class PointSource(BaseSimulation):
@@ -76,9 +72,10 @@ class PointSource(BaseSimulation):
         -------
             A ``DataFrame`` of simulated case counts per week, separated into baseline and outbreak cases.
         """
+        session = r_session()
         if self.seed:
-            base.set_seed(self.seed)
-        simulated = surveillance.sim_pointSource(
+            session.importr("base").set_seed(self.seed)
+        simulated = session.surveillance.sim_pointSource(
             p=self.p,
             r=self.r,
             length=length,
@@ -87,7 +84,9 @@ class PointSource(BaseSimulation):
             beta=self.trend,
             phi=self.seasonal_move,
             frequency=self.frequency,
-            state=robjects.NULL if state is None else robjects.IntVector(state),
+            state=session.robjects.NULL
+            if state is None
+            else session.robjects.IntVector(state),
             K=state_weight,
         )
 
@@ -3,15 +3,12 @@ from typing import Optional, Sequence
 
 import numpy as np
 import pandas as pd
-import rpy2.robjects.packages as rpackages
-from rpy2 import robjects
 from scipy.stats import nbinom, poisson
 
+from epysurv._rsession import r_session
 from epysurv.simulation.base import BaseSimulation
 from epysurv.simulation.utils import add_date_time_index_to_frame, r_list_to_frame
 
-surveillance = rpackages.importr("surveillance")
-
 
 @dataclass
 class SeasonalNoisePoisson(BaseSimulation):
@@ -77,18 +74,20 @@ class SeasonalNoisePoisson(BaseSimulation):
             A ``DataFrame`` of an endemic time series where each row contains the case counts of this week.
             It also contains the mean case count value based on the underlying sinus model.
         """
+        session = r_session()
         if self.seed:
-            base = robjects.packages.importr("base")
-            base.set_seed(self.seed)
-        simulated = surveillance.sim_seasonalNoise(
+            session.importr("base").set_seed(self.seed)
+        simulated = session.surveillance.sim_seasonalNoise(
             A=self.amplitude,
             alpha=self.alpha,
             beta=self.trend,
             phi=self.seasonal_move,
             length=length,
             frequency=self.frequency,
-            state=robjects.NULL if state is None else robjects.IntVector(state),
-            K=robjects.NULL if state_weight is None else state_weight,
+            state=session.robjects.NULL
+            if state is None
+            else session.robjects.IntVector(state),
+            K=session.robjects.NULL if state_weight is None else state_weight,
         )
 
         simulated = r_list_to_frame(simulated, ["mu", "seasonalBackground"])
@@ -1,10 +1,9 @@
 from typing import Sequence
 
 import pandas as pd
-import rpy2
 
 
-def r_list_to_frame(r_list, names: Sequence[str]) -> rpy2.robjects.vectors.ListVector:
+def r_list_to_frame(r_list, names: Sequence[str]) -> pd.DataFrame:
     """Transforms a (named) list in R to a Pandas DataFrame."""
     rlist_as_frame = pd.DataFrame({name: list(r_list.rx2(name)) for name in names})
     # Add timestep column to unify frames since some simulations return a timestep column but others don't
@@ -0,0 +1,24 @@
+"""
+Regenerate the saved predictions of the R engine in ``tests/data``, including the upperbounds.
+
+This needs R with the package surveillance. Run it from the root of the repository with
+``python -m tests.regenerate_predictions`` and commit the changed files.
+"""
+from pathlib import Path
+
+from tests.conftest import _load_data
+from tests.test_timepoint_models import algos_to_test
+
+DATA_DIR = Path(__file__).parent / "data"
+
+
+def main():
+    train_data = _load_data(DATA_DIR / "salmonella_train.csv")
+    test_data = _load_data(DATA_DIR / "salmonella_test.csv")
+    for Algo in algos_to_test:
+        pred = Algo().fit(train_data).predict(test_data)
+        pred.to_csv(DATA_DIR / f"{Algo.__name__}_pred.csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@ import numpy as np
 import pandas as pd
 import pytest
 
-from epysurv.models.timepoint import _base
+from epysurv.models.timepoint import _base, _history, _result, _sts_cache
 
 
 def random_cases_for_dates(dates):
@@ -45,11 +45,164 @@ def test_fit():
     assert (model._training_data.n_cases.values == [5, 5]).all()
 
 
+def test_full_data_is_read_only_view_of_history(train_data, test_data):
+    model = _base.SurveillanceRPackageAlgorithm().fit(train_data)
+    full_data, n_train = model._full_data(test_data)
+    assert n_train == len(train_data)
+    assert full_data.index.freq == train_data.index.freq
+    assert np.shares_memory(full_data.n_cases.values, model._history.counts)
+    with pytest.raises(ValueError):
+        full_data.n_cases.values[0] = 0
+    np.testing.assert_array_equal(
+        full_data.n_cases.values[n_train:], test_data.n_cases.values
+    )
+
+
+def test_full_data_infers_freq_after_gap(train_data, test_data):
+    model = _base.SurveillanceRPackageAlgorithm().fit(train_data)
+    full_data, _ = model._full_data(test_data.iloc[1:])
+    assert full_data.index.freq is None
+
+
+def test_training_data_keeps_freq_and_tz():
+    dates = pd.date_range("2020", freq="W-MON", periods=5, tz="Europe/Berlin")
+    model = _base.TimepointSurveillanceAlgorithm()
+    model.fit(
+        pd.DataFrame({"n_cases": np.arange(5), "n_outbreak_cases": 0}, index=dates)
+    )
+    pd.testing.assert_index_equal(model._training_data.index, dates)
+    assert model._training_data.index.freq == dates.freq
+
+
 def test__get_freq(train_data):
     freq = _base._get_freq(train_data)
     assert freq == 52
 
 
+def test__get_freq_unsupported():
+    data = pd.DataFrame(
+        {"n_cases": [1, 2]}, index=pd.date_range("2020-01-01", periods=2, freq="H")
+    )
+    with pytest.raises(ValueError, match="no valid frequency"):
+        _base._get_freq(data)
+
+
 def test__get_start_epoch(train_data):
     start_epoch = _base._get_start_epoch(train_data)
     assert start_epoch == 2
+
+
+def test__get_epoch(train_data):
+    epoch = _base._get_epoch(train_data)
+    assert len(epoch) == len(train_data)
+    # 2004-01-05 is 12422 days after 1970-01-01.
+    assert epoch[0] == 12422
+    assert (np.diff(epoch) == 7).all()
+
+
+def test_history_fingerprint(train_data):
+    fingerprint = _sts_cache.fingerprint(train_data.index, train_data.n_cases.values)
+    assert fingerprint == _sts_cache.fingerprint(
+        train_data.index.copy(), train_data.n_cases.values.copy()
+    )
+    changed_cases = train_data.n_cases.values.copy()
+    changed_cases[-1] += 1
+    assert fingerprint != _sts_cache.fingerprint(train_data.index, changed_cases)
+    assert fingerprint != _sts_cache.fingerprint(
+        train_data.index.shift(1), train_data.n_cases.values
+    )
+
+
+def test_lru_cache():
+    cache = _sts_cache.LRUCache(maxsize=2)
+    created = []
+
+    def create(key):
+        def _create():
+            created.append(key)
+            return key * 2
+
+        return _create
+
+    assert cache.get_or_create("a", create("a")) == "aa"
+    assert cache.get_or_create("b", create("b")) == "bb"
+    assert cache.get_or_create("a", create("a")) == "aa"
+    cache.get_or_create("c", create("c"))
+    assert created == ["a", "b", "c"]
+    assert len(cache) == 2
+    assert "b" not in cache
+    assert "a" in cache
+
+
+def test_history_with_new(train_data, test_data):
+    history = _history.History.from_frame(train_data)
+    capacities = set()
+    for _ in range(3):
+        dates, counts = history.with_new(
+            test_data.index.values, test_data.n_cases.values
+        )
+        assert len(history) == len(train_data)
+        capacities.add(history.capacity)
+    assert len(capacities) == 1
+    full_data = pd.concat((train_data, test_data))
+    np.testing.assert_array_equal(dates, full_data.index.values)
+    np.testing.assert_array_equal(counts, full_data.n_cases.values)
+
+
+def test_history_grows():
+    dates = pd.date_range("2020", freq="W-MON", periods=10)
+    history = _history.History(dates.values, np.arange(10))
+    new_dates = pd.date_range(dates[-1], freq="W-MON", periods=201)[1:]
+    all_dates, counts = history.with_new(new_dates.values, np.arange(10, 210) + 0.5)
+    assert history.capacity >= 210
+    np.testing.assert_array_equal(all_dates, dates.append(new_dates).values)
+    np.testing.assert_array_equal(counts[:10], np.arange(10))
+    np.testing.assert_array_equal(counts[10:], np.arange(10, 210) + 0.5)
+    np.testing.assert_array_equal(history.counts, np.arange(10))
+
+
+class _FakeRList:
+    def __init__(self, **elements):
+        self.names = list(elements)
+        self.elements = elements
+        self.fetched = []
+
+    def rx2(self, name):
+        self.fetched.append(name)
+        return self.elements[name]
+
+
+class _FakeSTS:
+    rclass = ("sts",)
+
+    def __init__(self, **slots):
+        self.slots = slots
+
+    def slotnames(self):
+        return list(self.slots)
+
+
+def test_surveillance_result_fetches_only_requested_slots():
+    control = _FakeRList(expected=[1.0, 2.0])
+    r_result = _FakeRList(
+        alarm=[0, 1], upperbound=[1.5, 2.5], disProgObj=object(), control=control
+    )
+    result = _result.SurveillanceResult(r_result)
+
+    np.testing.assert_array_equal(result.slot("alarm"), [0, 1])
+    assert result.has_slot("upperbound")
+    assert not result.has_slot("expected")
+    assert r_result.fetched == ["alarm"]
+    np.testing.assert_array_equal(result.expected, [1.0, 2.0])
+    assert result.control("mu0") is None
+    with pytest.raises(KeyError):
+        result.slot("state")
+
+
+def test_surveillance_result_sts():
+    result = _result.SurveillanceResult(
+        _FakeSTS(alarm=[[False], [True]], control=_FakeRList())
+    )
+    assert result.slot("alarm").shape == (2, 1)
+    assert not result.has_slot("upperbound")
+    assert result.expected is None
@@ -0,0 +1,18 @@
+import subprocess
+import sys
+import time
+
+# Starting R and loading surveillance alone takes longer than this.
+IMPORT_BUDGET_SECONDS = 3
+
+
+def test_import_does_not_start_r():
+    code = (
+        "import sys; "
+        "import epysurv.data, epysurv.metrics, epysurv.simulation; "
+        "import epysurv.models.timepoint, epysurv.models.timeseries; "
+        "assert 'rpy2' not in sys.modules, 'Importing epysurv started R.'"
+    )
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True)
+    assert time.perf_counter() - start < IMPORT_BUDGET_SECONDS
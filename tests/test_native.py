@@ -0,0 +1,287 @@
+import itertools
+
+import numpy as np
+import pytest
+from scipy.stats import nbinom
+
+from epysurv.models._native import (
+    batched_glm,
+    boda,
+    cusum,
+    glm,
+    glr,
+    hmm,
+    outbreak_p,
+    reference,
+    rki,
+)
+
+
+@pytest.mark.parametrize("transform", sorted(cusum.TRANSFORMS))
+def test_cusum_upperbound_inverts_transform(transform):
+    m = np.array([0.5, 2.0, 7.5, 30.0])
+    x = np.array([3.0, 5.0, 12.0, 41.0])
+    z = cusum.TRANSFORMS[transform](x, m, 0.1)
+    np.testing.assert_allclose(
+        cusum.INVERSE_TRANSFORMS[transform](z, m, 0.1), x, rtol=1e-6
+    )
+
+
+@pytest.mark.parametrize("transform", sorted(cusum.TRANSFORMS))
+def test_cusum_alarm_iff_above_upperbound(transform):
+    rng = np.random.default_rng(0)
+    counts = rng.poisson(5, size=150).astype(float)
+    counts[120:125] += 10
+    alarm, upperbound = cusum.cusum(
+        counts, 100, k=1.04, h=2.26, m=None, transform=transform, alpha=0.1, period=52
+    )
+    assert len(alarm) == len(upperbound) == 50
+    assert alarm.any()
+    np.testing.assert_array_equal(alarm, counts[100:] >= upperbound - 1e-9)
+
+
+def test_cumulative_sum():
+    increments = np.array([1.0, -3.0, 2.0, 0.5, -0.2, -4.0, 1.0])
+    expected = []
+    statistic = 0
+    for increment in increments:
+        statistic = max(0, statistic + increment)
+        expected.append(statistic)
+    np.testing.assert_allclose(cusum.cumulative_sum(increments), expected)
+
+
+def test_fit_poisson_glm():
+    t = np.arange(1, 105)
+    design = np.column_stack(
+        (np.ones(len(t)), np.cos(2 * np.pi * t / 52), np.sin(2 * np.pi * t / 52))
+    )
+    coefficients = np.array([1.5, 0.4, -0.3])
+    y = np.random.default_rng(1).poisson(np.exp(design @ coefficients))
+    fit = glm.fit_poisson_glm(design, y)
+
+    assert fit.converged
+    np.testing.assert_allclose(fit.coefficients, coefficients, atol=0.15)
+    # The score equations of the maximum likelihood estimate.
+    np.testing.assert_allclose(design.T @ (y - fit.fitted), 0, atol=1e-6)
+
+
+def test_fit_glm_nb():
+    design = glm.harmonic_design(np.arange(1, 1001), 52)
+    mu = np.exp(design @ np.array([1.5, 0.4, -0.3]))
+    y = np.random.default_rng(1).negative_binomial(3, 3 / (3 + mu))
+    fit, size = glm.fit_glm_nb(design, y)
+
+    assert fit.converged
+    assert 2 < size < 4
+    # The score equations of the maximum likelihood estimate for the estimated size.
+    np.testing.assert_allclose(
+        design.T @ ((y - fit.fitted) / (1 + fit.fitted / size)), 0, atol=1e-4
+    )
+
+
+def test_reference_index():
+    offsets = np.concatenate(
+        (
+            reference.recent_offsets(2),
+            reference.past_year_offsets(2, freq=10, before=1, after=1),
+        )
+    )
+    index = reference.reference_index(21, 23, offsets)
+    np.testing.assert_array_equal(
+        index, [[19, 20, 0, 1, 2, 10, 11, 12], [20, 21, 1, 2, 3, 11, 12, 13]]
+    )
+    with pytest.raises(ValueError):
+        reference.reference_index(1, 22, offsets)
+
+
+def test_rki_normal_approximation():
+    counts = np.array([30.0, 40, 50, 35, 45, 200, 41])
+    alarm, upperbound = rki.rki(
+        counts, 5, years_back=0, window_half_width=5, include_recent_year=True, freq=52
+    )
+    expected = [
+        counts[:5].mean() + 2 * counts[:5].std(ddof=1),
+        counts[1:6].mean() + 2 * counts[1:6].std(ddof=1),
+    ]
+    np.testing.assert_allclose(upperbound, expected)
+    np.testing.assert_array_equal(alarm, [True, False])
+
+
+@pytest.mark.parametrize("change", ["intercept", "epi"])
+def test_glr_cases_upperbound(change):
+    rng = np.random.default_rng(1)
+    counts = rng.poisson(4, size=80).astype(float)
+    counts[50:55] += 8
+    mu0 = np.full(len(counts), 4.0)
+    alarm, upperbound = glr.glr(
+        counts,
+        mu0,
+        5,
+        m=-1,
+        change=change,
+        direction=("inc",),
+        upperbound_statistic="cases",
+    )
+    assert alarm.any()
+    # With an alarm the chart restarts, so compare only up to the first alarm.
+    first = np.argmax(alarm) + 1
+    np.testing.assert_array_equal(
+        alarm[:first], counts[:first] >= np.nan_to_num(upperbound[:first], nan=np.inf)
+    )
+
+
+@pytest.mark.parametrize("change", ["intercept", "epi"])
+def test_glr_window_statistic_start(change):
+    rng = np.random.default_rng(4)
+    counts = rng.poisson(4, size=30).astype(float)
+    mu0 = np.full(len(counts), 4.0)
+    previous = np.concatenate(([0], counts[:-1]))
+    value, estimate = glr.window_statistic(counts, mu0, previous, change, 0.2, 1)
+    counts[-1] += 10
+    cold, _ = glr.window_statistic(counts, mu0, previous, change, 0.2, 1)
+    warm, _ = glr.window_statistic(counts, mu0, previous, change, 0.2, 1, estimate)
+    np.testing.assert_allclose(warm, cold, rtol=1e-8)
+    assert (warm >= value).all()
+
+
+def test_glr_window_limit():
+    counts = np.array([4.0] * 30 + [8.0] * 10)
+    mu0 = np.full(len(counts), 4.0)
+    _, unlimited = glr.glr(counts, mu0, 50, -1, "intercept", ("inc",), "value")
+    _, limited = glr.glr(counts, mu0, 50, 3, "intercept", ("inc",), "value")
+    np.testing.assert_allclose(limited[:34], unlimited[:34])
+    assert (limited[34:] < unlimited[34:]).all()
+
+
+def test_isotonic_blocks():
+    counts = [3.0, 1.0, 2.0, 5.0, 4.0, 4.0, 0.0, 9.0]
+    blocks = outbreak_p.IsotonicBlocks()
+    for count in counts:
+        blocks.append(count)
+    fitted = np.repeat(np.divide(blocks.sums, blocks.lengths), blocks.lengths)
+    np.testing.assert_allclose(fitted, [2, 2, 2, 3.25, 3.25, 3.25, 3.25, 9])
+    expected = 6 * np.log(2) + 13 * np.log(3.25) + 9 * np.log(9)
+    assert blocks.log_likelihood == pytest.approx(expected)
+
+
+def test_outbreak_p_needed_cases():
+    counts = np.random.default_rng(2).poisson(3, size=60).astype(float)
+    _, value = outbreak_p.outbreak_p(counts, 40, 100, "value", 1e5)
+    _, cases = outbreak_p.outbreak_p(counts, 40, 100, "cases", 1e5)
+    for i, k in enumerate(range(40, 60)):
+        if value[i] > 100:
+            continue
+        changed = counts[: k + 1].copy()
+        changed[k] = cases[i]
+        assert outbreak_p.outbreak_p(changed, k, 100, "value", 1e5)[1][0] > 100
+        changed[k] = cases[i] - 1
+        assert outbreak_p.outbreak_p(changed, k, 100, "value", 1e5)[1][0] <= 100
+
+
+def test_hmm_forward_backward():
+    counts = np.array([1.0, 0.0, 6.0, 7.0, 2.0])
+    log_rate = np.log(np.array([[1.0, 5.0]] * len(counts)))
+    transition = np.array([[0.8, 0.2], [0.3, 0.7]])
+    log_emission = hmm.log_emissions(counts, log_rate)
+    posterior, transitions, log_likelihood = hmm.forward_backward(
+        log_emission, transition
+    )
+    # Enumerate all state sequences starting in the first state.
+    paths = [(0,) + path for path in itertools.product((0, 1), repeat=len(counts) - 1)]
+    probabilities = np.array(
+        [
+            np.exp(log_emission[np.arange(len(counts)), path].sum())
+            * np.prod(transition[path[:-1], path[1:]])
+            for path in map(np.array, paths)
+        ]
+    )
+    assert log_likelihood == pytest.approx(np.log(probabilities.sum()))
+    expected = np.array([[p[t] == 1 for t in range(len(counts))] for p in paths])
+    np.testing.assert_allclose(
+        posterior[:, 1], probabilities @ expected / probabilities.sum()
+    )
+    assert transitions.sum() == pytest.approx(len(counts) - 1)
+    np.testing.assert_array_equal(
+        hmm.viterbi(log_emission, transition), paths[np.argmax(probabilities)]
+    )
+
+
+@pytest.mark.parametrize("prior", ["iid", "rw1", "rw2"])
+def test_boda_bordered_cholesky(prior):
+    rng = np.random.default_rng(3)
+    band, _ = boda.structure_band(30, prior)
+    band[0] += 1
+    border = rng.normal(size=(30, 4))
+    corner = border.T @ border + np.eye(4)
+    dense = np.zeros((34, 34))
+    for i, diagonal in enumerate(band):
+        dense[:30, :30] += np.diag(diagonal[: 30 - i], -i)
+        if i:
+            dense[:30, :30] += np.diag(diagonal[: 30 - i], i)
+    dense[:30, 30:] = border
+    dense[30:, :30] = border.T
+    dense[30:, 30:] = corner
+    cholesky = boda.BorderedCholesky(band, border, corner)
+    rhs = rng.normal(size=34)
+    np.testing.assert_allclose(cholesky.solve(rhs), np.linalg.solve(dense, rhs))
+    assert cholesky.log_det == pytest.approx(np.linalg.slogdet(dense)[1])
+
+
+@pytest.mark.parametrize("prior", ["rw1", "rw2"])
+def test_boda_structure_band(prior):
+    order = int(prior[-1])
+    differences = np.diff(np.eye(8), n=order, axis=0)
+    structure = differences.T @ differences
+    band, rank = boda.structure_band(8, prior)
+    assert rank == 8 - order
+    for i in range(order + 1):
+        np.testing.assert_array_equal(band[i, : 8 - i], np.diagonal(structure, -i))
+
+
+def test_boda_mixture_quantile():
+    size = np.array([2.0, 5.0, 50.0])
+    mu = np.array([3.0, 10.0, 20.0])
+    quantile = boda.mixture_quantile(0.9, size, mu)
+
+    def cdf(q):
+        return np.mean(nbinom.cdf(q, size, size / (size + mu)))
+
+    assert cdf(quantile) >= 0.9 > cdf(quantile - 1)
+
+
+def test_batched_glm_matches_single_fits():
+    rng = np.random.default_rng(4)
+    n_observations = [20, 14, 17]
+    design = np.zeros((3, 20, 2))
+    y = np.zeros((3, 20))
+    prior = np.zeros((3, 20))
+    singles = []
+    for i, n in enumerate(n_observations):
+        single_design = np.column_stack((np.ones(n), np.arange(n)))
+        single_y = rng.poisson(np.exp(1 + 0.05 * np.arange(n))).astype(float)
+        design[i, :n], y[i, :n], prior[i, :n] = single_design, single_y, 1
+        singles.append(glm.fit_poisson_glm(single_design, single_y))
+    fit = batched_glm.fit_glms(design, y, prior)
+    assert fit.converged.all()
+    for i, (n, single) in enumerate(zip(n_observations, singles)):
+        np.testing.assert_allclose(fit.coefficients[i], single.coefficients)
+        np.testing.assert_allclose(fit.cov_unscaled[i], single.cov_unscaled)
+        np.testing.assert_allclose(fit.fitted[i, :n], single.fitted)
+        assert fit.df_residual[i] == single.df_residual
+
+
+def test_batched_glm_reweighting_ignores_padding():
+    y = np.array([[2.0, 3.0, 1.0, 2.0, 30.0, 0.0], [2.0, 3.0, 1.0, 2.0, 30.0, 2.0]])
+    prior = np.array([[1.0, 1, 1, 1, 1, 0], [1, 1, 1, 1, 1, 1]])
+    design = np.ones(y.shape + (1,))
+    quasi = batched_glm.fit_quasi_poisson_glms(design, y, prior, reweight=True)
+    padded = quasi.weights[0]
+    assert padded[-1] == 0
+    assert padded.sum() == pytest.approx(5)
+    # The outlier is down-weighted.
+    assert padded[4] < padded[:4].min()
+    unpadded = batched_glm.fit_quasi_poisson_glms(
+        design[:1, :5], y[:1, :5], reweight=True
+    )
+    np.testing.assert_allclose(padded[:5], unpadded.weights[0])
+    np.testing.assert_allclose(quasi.phi[0], unpadded.phi[0])
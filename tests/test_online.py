@@ -0,0 +1,189 @@
+import json
+
+import numpy as np
+import pytest
+from pandas.testing import assert_frame_equal
+
+from epysurv.models.online import (
+    OnlineCusum,
+    OnlineEarsC1,
+    OnlineEarsC2,
+    OnlineEarsC3,
+    OnlineGLRNegativeBinomial,
+    OnlineGLRPoisson,
+)
+from epysurv.models.timepoint import (
+    Cusum,
+    EarsC1,
+    EarsC2,
+    EarsC3,
+    GLRNegativeBinomial,
+    GLRPoisson,
+)
+
+
+@pytest.mark.parametrize("expected_numbers_method", ["mean", "glm"])
+@pytest.mark.parametrize("transform", ["standard", "rossi", "anscombeNegBin"])
+def test_online_cusum_matches_batch(
+    train_data, test_data, expected_numbers_method, transform
+):
+    params = dict(expected_numbers_method=expected_numbers_method, transform=transform)
+    online = OnlineCusum(**params).fit(train_data).predict(test_data)
+    batch = Cusum(**params, engine="native").fit(train_data).predict(test_data)
+    np.testing.assert_array_equal(online["alarm"], batch["alarm"])
+    np.testing.assert_allclose(online["upperbound"], batch["upperbound"])
+
+
+def test_online_cusum_survives_serialization(train_data, test_data):
+    model = OnlineCusum(expected_numbers_method="glm").fit(train_data)
+    expected = OnlineCusum(expected_numbers_method="glm").fit(train_data)
+    expected = expected.predict(test_data)
+    first = model.predict(test_data.iloc[:50])
+    restored = OnlineCusum.from_dict(json.loads(json.dumps(model.to_dict())))
+    second = restored.predict(test_data.iloc[50:])
+    assert_frame_equal(first, expected.iloc[:50])
+    assert_frame_equal(second, expected.iloc[50:])
+
+
+def test_online_cusum_reset_on_alarm(train_data, test_data):
+    model = OnlineCusum(reset_on_alarm=True).fit(train_data)
+    mean = model.expected()
+    pred = model.predict(test_data)
+    without_reset = OnlineCusum().fit(train_data).predict(test_data)
+    first = pred["alarm"].values.argmax()
+    assert pred["alarm"].values[first]
+    assert_frame_equal(pred.iloc[: first + 1], without_reset.iloc[: first + 1])
+    # After the alarm the cumulative sum starts again from zero.
+    z = (pred["n_cases"].values[first + 1] - mean) / np.sqrt(mean)
+    assert pred["statistic"].values[first + 1] == pytest.approx(
+        max(0, z - model.reference_value)
+    )
+
+
+def test_online_cusum_rejects_wrong_date(train_data, test_data):
+    model = OnlineCusum().fit(train_data)
+    with pytest.raises(ValueError):
+        model.update(test_data.index[1], 3)
+    model.update(test_data.index[0], 3)
+
+
+@pytest.mark.parametrize(
+    "model",
+    [
+        OnlineCusum(),
+        OnlineEarsC1(),
+        OnlineGLRNegativeBinomial(),
+        OnlineGLRPoisson(refit_on_alarm=True),
+    ],
+    ids=lambda model: type(model).__name__,
+)
+def test_online_detector_keeps_no_training_data(train_data, test_data, model):
+    model.fit(train_data)
+    assert not hasattr(model, "_training_data")
+    assert not hasattr(model, "_history")
+    assert np.isfinite(model.score(test_data))
+
+
+@pytest.mark.parametrize(
+    "online_model, batch_model",
+    [(OnlineEarsC1, EarsC1), (OnlineEarsC2, EarsC2), (OnlineEarsC3, EarsC3)],
+)
+@pytest.mark.parametrize("min_sigma", [0, 0.5])
+def test_online_ears_matches_batch(
+    train_data, test_data, online_model, batch_model, min_sigma
+):
+    online = online_model(min_sigma=min_sigma).fit(train_data).predict(test_data)
+    batch = batch_model(min_sigma=min_sigma, engine="native")
+    batch = batch.fit(train_data).predict(test_data)
+    np.testing.assert_array_equal(online["alarm"], batch["alarm"])
+    np.testing.assert_allclose(online["upperbound"], batch["upperbound"])
+
+
+def test_online_ears_survives_serialization(train_data, test_data):
+    expected = OnlineEarsC3().fit(train_data).predict(test_data)
+    model = OnlineEarsC3().fit(train_data)
+    first = model.predict(test_data.iloc[:50])
+    restored = OnlineEarsC3.from_dict(json.loads(json.dumps(model.to_dict())))
+    second = restored.predict(test_data.iloc[50:])
+    assert_frame_equal(first, expected.iloc[:50])
+    assert_frame_equal(second, expected.iloc[50:])
+
+
+def test_online_ears_state_is_not_shared(train_data, test_data):
+    model = OnlineEarsC3().fit(train_data)
+    model.predict(test_data.iloc[:20])
+    state = model.to_dict()
+    snapshot = json.loads(json.dumps(state))
+    expected = model.predict(test_data.iloc[20:])
+    for _ in range(2):
+        restored = OnlineEarsC3.from_dict(state)
+        assert_frame_equal(restored.predict(test_data.iloc[20:]), expected)
+    assert json.loads(json.dumps(state)) == snapshot
+
+
+def test_online_ears_needs_full_baseline(train_data):
+    with pytest.raises(ValueError):
+        OnlineEarsC2(baseline=7).fit(train_data.iloc[:8])
+
+
+@pytest.mark.parametrize(
+    "online_model, batch_model, params",
+    [
+        (OnlineGLRPoisson, GLRPoisson, {}),
+        (OnlineGLRPoisson, GLRPoisson, dict(m=5)),
+        (OnlineGLRPoisson, GLRPoisson, dict(change="epi", m=10)),
+        (OnlineGLRPoisson, GLRPoisson, dict(upperbound_statistic="value")),
+        (OnlineGLRNegativeBinomial, GLRNegativeBinomial, dict(alpha=None, m=10)),
+        (OnlineGLRNegativeBinomial, GLRNegativeBinomial, dict(theta=0.5)),
+    ],
+)
+def test_online_glr_matches_batch(
+    train_data, test_data, online_model, batch_model, params
+):
+    online = online_model(**params).fit(train_data).predict(test_data)
+    batch = batch_model(**params, engine="native").fit(train_data).predict(test_data)
+    np.testing.assert_array_equal(online["alarm"], batch["alarm"])
+    np.testing.assert_allclose(online["upperbound"], batch["upperbound"])
+
+
+def test_online_glr_survives_serialization(train_data, test_data):
+    expected = OnlineGLRPoisson(m=10).fit(train_data).predict(test_data)
+    model = OnlineGLRPoisson(m=10).fit(train_data)
+    first = model.predict(test_data.iloc[:50])
+    restored = OnlineGLRPoisson.from_dict(json.loads(json.dumps(model.to_dict())))
+    second = restored.predict(test_data.iloc[50:])
+    assert_frame_equal(first, expected.iloc[:50])
+    assert_frame_equal(second, expected.iloc[50:])
+
+
+@pytest.mark.parametrize(
+    "params", [dict(m=10), dict(change="epi", m=10), dict(refit_on_alarm=True)]
+)
+def test_online_glr_state_is_not_shared(train_data, test_data, params):
+    model = OnlineGLRPoisson(**params).fit(train_data)
+    model.predict(test_data.iloc[:20])
+    state = model.to_dict()
+    snapshot = json.loads(json.dumps(state))
+    expected = model.predict(test_data.iloc[20:])
+    for _ in range(2):
+        restored = OnlineGLRPoisson.from_dict(state)
+        assert_frame_equal(restored.predict(test_data.iloc[20:]), expected)
+    assert json.loads(json.dumps(state)) == snapshot
+
+
+def test_online_glr_poisson_has_no_negative_binomial_parameters():
+    assert "m0" not in OnlineGLRPoisson().to_dict()["params"]
+    with pytest.raises(TypeError):
+        OnlineGLRPoisson(alpha=0.5)
+
+
+def test_online_glr_refits_only_after_alarm(train_data, test_data):
+    model = OnlineGLRPoisson(refit_on_alarm=True).fit(train_data)
+    without_refit = OnlineGLRPoisson().fit(train_data).predict(test_data)
+    first = without_refit["alarm"].values.argmax()
+    coefficients = model._coefficients
+    pred = model.predict(test_data.iloc[:first])
+    assert model._coefficients == coefficients
+    assert_frame_equal(pred, without_refit.iloc[:first])
+    model.predict(test_data.iloc[first : first + 1])
+    assert model._coefficients != coefficients
@@ -1,6 +1,10 @@
+import time
+
+import numpy as np
 import pandas as pd
 import pytest
 from pandas.testing import assert_frame_equal
+from scipy.stats import nbinom
 
 from epysurv.models.timepoint import (
     CDC,
@@ -18,7 +22,8 @@ from epysurv.models.timepoint import (
     GLRPoisson,
     OutbreakP,
 )
-
+from epysurv.models.timepoint.pool import IsolatedWorker, SurveillancePool
+from epysurv.models.timepoint.timing import PHASES, PhaseStats
 from tests.utils import drop_column_if_exists, load_predictions
 
 algos_to_test = [
@@ -36,6 +41,21 @@ algos_to_test = [
     CDC,
 ]
 
+native_algos_to_test = [
+    EarsC1,
+    EarsC2,
+    EarsC3,
+    Cusum,
+    CDC,
+    RKI,
+    Bayes,
+    Farrington,
+    FarringtonFlexible,
+    GLRPoisson,
+    GLRNegativeBinomial,
+    OutbreakP,
+]
+
 
 @pytest.mark.parametrize("Algo", algos_to_test)
 def test_prediction(train_data, test_data, shared_datadir, Algo):
@@ -53,6 +73,80 @@ def test_prediction(train_data, test_data, shared_datadir, Algo):
     assert_frame_equal(pred, saved_predictions)
 
 
+# The native upperbound of these algorithms is defined differently than in R. FarringtonFlexible
+# reports the upper limit also at time points without enough cases for an alarm.
+native_upperbound_differs = [EarsC3, FarringtonFlexible]
+
+
+@pytest.mark.parametrize("Algo", native_algos_to_test)
+def test_native_prediction(train_data, test_data, shared_datadir, Algo):
+    """The native engine reproduces the predictions of the R package surveillance."""
+    model = Algo(engine="native")
+    model.fit(train_data)
+    pred = model.predict(test_data)
+    saved_predictions = load_predictions(shared_datadir / f"{Algo.__name__}_pred.csv")
+
+    assert pred.upperbound.notna().all()
+    pred = drop_column_if_exists(pred, "upperbound")
+    saved_predictions = drop_column_if_exists(saved_predictions, "upperbound")
+
+    assert_frame_equal(pred, saved_predictions)
+
+
+@pytest.mark.parametrize(
+    "Algo", [a for a in native_algos_to_test if a not in native_upperbound_differs]
+)
+def test_native_upperbound_matches_saved(train_data, test_data, shared_datadir, Algo):
+    """The native upperbounds agree with the saved upperbounds computed by surveillance."""
+    saved_predictions = load_predictions(shared_datadir / f"{Algo.__name__}_pred.csv")
+    if "upperbound" not in saved_predictions:
+        pytest.skip(
+            "The saved predictions have no upperbounds of R, "
+            "run tests/regenerate_predictions.py with R to add them."
+        )
+    pred = Algo(engine="native").fit(train_data).predict(test_data)
+    np.testing.assert_allclose(
+        pred.upperbound, saved_predictions.upperbound, rtol=1e-6, atol=1e-8
+    )
+
+
+@pytest.mark.parametrize(
+    "Algo", [a for a in native_algos_to_test if a not in native_upperbound_differs]
+)
+def test_native_upperbound_matches_r(train_data, test_data, Algo):
+    """The native upperbounds agree with the upperbounds computed by surveillance."""
+    native = Algo(engine="native").fit(train_data).predict(test_data)
+    r = Algo(engine="r").fit(train_data).predict(test_data)
+    np.testing.assert_allclose(native.upperbound, r.upperbound, rtol=1e-6, atol=1e-8)
+
+
+@pytest.mark.parametrize("Algo", [EarsC1, EarsC2])
+def test_native_ears_alarm_agrees_with_upperbound(train_data, test_data, Algo):
+    pred = Algo(engine="native").fit(train_data).predict(test_data)
+    np.testing.assert_array_equal(pred["alarm"], pred["n_cases"] > pred["upperbound"])
+
+
+def test_native_farrington_upperbound_without_enough_cases(train_data, test_data):
+    model = Farrington(engine="native")
+    pred = model.fit(train_data).predict(test_data)
+    history = train_data.n_cases - train_data.n_outbreak_cases
+    recent = pd.concat((history, test_data.n_cases)).rolling(model.past_period_cutoff)
+    enough = recent.sum()[test_data.index] >= model.min_cases_in_past_periods
+    assert not enough.all()
+    assert (pred.upperbound[~enough] == 0).all()
+    assert (pred.upperbound[enough] > 0).all()
+
+
+def test_native_ears_c3_upperbound_predicts_next_alarm(train_data, test_data):
+    pred = EarsC3(engine="native").fit(train_data).predict(test_data)
+    upperbound = pred["upperbound"].values[:-1]
+    assert np.isfinite(upperbound).all()
+    np.testing.assert_array_equal(
+        pred["alarm"].values[1:],
+        (pred["n_cases"].values[:-1] > upperbound) | (upperbound == 0),
+    )
+
+
 # These algorithms take to long to be tested every time.
 long_algos_to_test = [
     HMM,
@@ -131,9 +225,10 @@ def test_prediction_witout_labels(train_data, test_data, shared_datadir, Algo):
     assert_frame_equal(pred, saved_predictions)
 
 
-def test_farrington_flexible__raises_on_too_less_reference_data():
+@pytest.mark.parametrize("engine", ["r", "native"])
+def test_farrington_flexible__raises_on_too_less_reference_data(engine):
 
-    model = FarringtonFlexible()
+    model = FarringtonFlexible(engine=engine)
 
     total_periods = 100
     test_size = 20
@@ -153,3 +248,188 @@ def test_farrington_flexible__raises_on_too_less_reference_data():
         match="You are trying to use reference data from 3 years back for predictions starting from 2019-01-20",
     ):
         _ = model.predict(test_data)
+
+
+def test_pool_predict_matches_sequential(train_data, test_data):
+    jobs = [(Algo(), train_data, test_data) for Algo in [EarsC1, Bayes, Farrington]]
+    with SurveillancePool(processes=2, max_tasks_per_worker=2) as pool:
+        predictions = list(pool.predict(jobs))
+
+    for (model, train, test), pred in zip(jobs, predictions):
+        expected = model.fit(train).predict(test)
+        assert_frame_equal(pred, expected[pred.columns])
+
+
+def test_isolated_worker_cancels_slow_jobs(train_data, test_data):
+    jobs = [
+        (HMM(n_observations=-1), train_data, test_data),
+        (EarsC1(), train_data, test_data),
+    ]
+    with IsolatedWorker(timeout=0.5) as worker:
+        slow, fast = list(worker.predict(jobs))
+
+    assert slow.status == "timeout"
+    assert slow.prediction is None
+    assert fast.ok
+    expected = EarsC1().fit(train_data).predict(test_data)
+    assert_frame_equal(fast.prediction, expected[fast.prediction.columns])
+
+
+def _never_ready(connection):
+    time.sleep(60)
+
+
+def _exit_when_ready(connection):
+    connection.send("ready")
+
+
+class _HangingWorker(IsolatedWorker):
+    _target = staticmethod(_never_ready)
+
+
+class _DyingWorker(IsolatedWorker):
+    _target = staticmethod(_exit_when_ready)
+
+
+def test_isolated_worker_start_timeout(train_data, test_data):
+    with _HangingWorker(timeout=1, start_timeout=1) as worker:
+        result = worker.run((EarsC1(), train_data, test_data))
+    assert result.status == "error"
+    assert "did not start" in result.error
+
+
+def test_isolated_worker_survives_dead_worker(train_data, test_data):
+    with _DyingWorker(timeout=30, start_timeout=30) as worker:
+        first, second = list(worker.predict([(EarsC1(), train_data, test_data)] * 2))
+    for result in (first, second):
+        assert result.status == "error"
+        assert "exited unexpectedly" in result.error
+
+
+@pytest.mark.parametrize("Algo", [EarsC1, Bayes, Cusum, FarringtonFlexible])
+def test_fit_predict_panel_matches_univariate(train_data, test_data, Algo):
+    train_panel = {
+        "a": train_data,
+        "b": train_data.assign(n_cases=train_data.n_cases * 2),
+    }
+    test_panel = {"a": test_data, "b": test_data.assign(n_cases=test_data.n_cases * 2)}
+    model = Algo()
+    predictions = model.fit_predict_panel(train_panel, test_panel)
+
+    assert set(predictions) == {"a", "b"}
+    for key, pred in predictions.items():
+        expected = Algo().fit(train_panel[key]).predict(test_panel[key])
+        assert_frame_equal(pred, expected)
+
+
+def test_fit_predict_panel_raises_for_univariate_algorithms(train_data, test_data):
+    model = Farrington()
+    with pytest.raises(NotImplementedError):
+        model.fit_predict_panel({"a": train_data}, {"a": test_data})
+
+
+def test_timing_records_every_phase(train_data, test_data):
+    recorded = []
+    stats = PhaseStats(callback=lambda *timing: recorded.append(timing))
+    for Algo in [EarsC1, Farrington]:
+        model = Algo()
+        assert model.enable_timing(stats) is stats
+        model.fit(train_data).predict(test_data)
+
+    frame = stats.to_frame()
+    assert list(frame.index) == list(PHASES)
+    assert (frame.calls == 2).all()
+    assert (frame.seconds > 0).all()
+    assert [(algo, phase) for algo, phase, _ in recorded] == [
+        (algo, phase) for algo in ["EarsC1", "Farrington"] for phase in PHASES
+    ]
+
+    model.disable_timing()
+    model.predict(test_data)
+    assert (stats.to_frame().calls == 2).all()
+
+
+@pytest.mark.parametrize("include_recent_year", [True, False])
+def test_native_bayes_years_back(train_data, test_data, include_recent_year):
+    model = Bayes(
+        years_back=2, include_recent_year=include_recent_year, engine="native"
+    )
+    pred = model.fit(train_data).predict(test_data)
+
+    full_data = pd.concat((model._training_data, test_data))
+    t = len(train_data) + 10
+    reference = list(full_data.n_cases.values[t - 52 - 6 : t - 52 + 7]) + list(
+        full_data.n_cases.values[t - 104 - 6 : t - 104 + 7]
+    )
+    if include_recent_year:
+        reference += list(full_data.n_cases.values[t - 6 : t])
+    n = len(reference)
+    expected = nbinom.ppf(0.95, sum(reference) + 0.5, n / (n + 1))
+    assert pred.upperbound.iloc[10] == expected
+
+
+@pytest.mark.parametrize("threshold_method", ["Noufaily", "muan"])
+def test_native_farrington_flexible_threshold_methods(
+    train_data, test_data, threshold_method
+):
+    model = FarringtonFlexible(threshold_method=threshold_method, engine="native")
+    pred = model.fit(train_data).predict(test_data)
+    assert pred["upperbound"].notna().all()
+    # The quantiles of the count distributions are integers.
+    np.testing.assert_array_equal(pred["upperbound"], np.round(pred["upperbound"]))
+    assert (
+        pred.loc[pred["alarm"], "n_cases"] > pred.loc[pred["alarm"], "upperbound"]
+    ).all()
+
+
+@pytest.mark.parametrize("alpha", [None, 0.2])
+@pytest.mark.parametrize("theta", [None, 1.2])
+def test_native_glrnb_parameters(train_data, test_data, alpha, theta):
+    model = GLRNegativeBinomial(alpha=alpha, theta=theta, engine="native")
+    pred = model.fit(train_data).predict(test_data)
+    # The chart restarts after an alarm, so the upperbound only applies until the first one.
+    first = pred["alarm"].values.argmax() + 1
+    np.testing.assert_array_equal(
+        pred["alarm"].values[:first],
+        pred["n_cases"].values[:first] >= pred["upperbound"].values[:first],
+    )
+
+
+def test_native_hmm_detects_outbreak(train_data, test_data):
+    pred = HMM(engine="native").fit(train_data).predict(test_data)
+    assert pred["upperbound"].between(0, 1).all()
+    # The weeks with the most cases are in the outbreak state.
+    largest = pred["n_cases"].nlargest(3).index
+    assert pred.loc[largest, "alarm"].all()
+    assert (pred.loc[largest, "upperbound"] > 0.5).all()
+
+
+def test_native_boda_detects_outbreak(train_data, test_data):
+    pred = Boda(engine="native", seed=1).fit(train_data).predict(test_data)
+    largest = pred["n_cases"].nlargest(3).index
+    assert pred.loc[largest, "alarm"].all()
+    assert pred["alarm"].sum() < 10
+
+
+def test_native_fit_predict_panel(train_data, test_data):
+    model = EarsC1(engine="native")
+    predictions = model.fit_predict_panel({"a": train_data}, {"a": test_data})
+    expected = EarsC1(engine="native").fit(train_data).predict(test_data)
+    assert_frame_equal(predictions["a"], expected)
+    with pytest.raises(ValueError, match="same series"):
+        model.fit_predict_panel({"a": train_data}, {"b": test_data})
+
+
+def test_native_fit_predict_panel_records_timing(train_data, test_data):
+    model = EarsC1(engine="native")
+    stats = model.enable_timing()
+    model.fit_predict_panel(
+        {"a": train_data, "b": train_data}, {"a": test_data, "b": test_data}
+    )
+    assert stats.phases["call_surveillance_algo"].calls == 2
+
+
+def test_unknown_engine(train_data, test_data):
+    model = EarsC1(engine="python").fit(train_data)
+    with pytest.raises(ValueError, match="Unknown engine"):
+        model.predict(test_data)
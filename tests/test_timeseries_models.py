@@ -1,12 +1,16 @@
+from dataclasses import dataclass
+
 import numpy as np
 import pandas as pd
 import pytest
 
+from epysurv.models.timepoint._base import TimepointSurveillanceAlgorithm
 from epysurv.models.timeseries import (  # type: ignore
     Farrington,
     FarringtonFlexible,
     GLRPoisson,
 )
+from epysurv.models.timeseries._base import NonLearningTimeseriesClassificationMixin
 
 from .utils import load_predictions
 
@@ -63,3 +67,63 @@ def test_outbreak_case_subtraction():
     model = Farrington()
     _ = model.predict(test_gen())
     assert np.alltrue(model._training_data.n_cases.values == 2)
+
+
+@dataclass
+class _Increase(TimepointSurveillanceAlgorithm):
+    """Raise an alarm whenever the counts increase. Counts its calls to ``predict``."""
+
+    n_predict_calls: int = 0
+
+    def predict(self, data):
+        super().predict(data)
+        self.n_predict_calls += 1
+        n_cases = pd.concat((self._training_data, data)).n_cases
+        return data.assign(alarm=(n_cases.diff() > 0).iloc[-len(data) :])
+
+
+class _TimeseriesIncrease(NonLearningTimeseriesClassificationMixin, _Increase):
+    pass
+
+
+def _growing_frames(n_cases, n_outbreak_cases, start=5):
+    data = pd.DataFrame(
+        {"n_cases": n_cases, "n_outbreak_cases": n_outbreak_cases},
+        index=pd.date_range("2020", freq="W-MON", periods=len(n_cases)),
+    )
+    for end in range(start, len(data)):
+        yield data.iloc[: end + 1], False
+
+
+def test_predict_appended_points_in_single_call():
+    n_cases = np.arange(20) % 3
+    model = _TimeseriesIncrease()
+    pred = model.predict(_growing_frames(n_cases, np.zeros(20)))
+
+    assert model.n_predict_calls == 1
+    expected = pd.Series(np.diff(n_cases)[4:] > 0, index=pred.index, name="alarm")
+    pd.testing.assert_series_equal(pred.alarm, expected)
+
+
+def test_predict_falls_back_on_revised_values():
+    def revised_frames():
+        for i, (frame, label) in enumerate(_growing_frames(np.ones(20), np.zeros(20))):
+            if i == 5:
+                frame = frame.copy()
+                frame.iloc[-2, 0] = 0
+            yield frame, label
+
+    model = _TimeseriesIncrease()
+    pred = model.predict(revised_frames())
+
+    assert model.n_predict_calls == 3
+    assert pred.alarm.tolist() == [False] * 5 + [True] + [False] * 9
+
+
+def test_predict_falls_back_on_outbreak_cases():
+    n_outbreak_cases = np.zeros(20)
+    n_outbreak_cases[10] = 1
+    model = _TimeseriesIncrease()
+    model.predict(_growing_frames(np.ones(20), n_outbreak_cases))
+
+    assert model.n_predict_calls == 2